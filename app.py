@@ -1,11 +1,9 @@
-from datetime import datetime
-from pathlib import Path
-
 import streamlit as st
 
-from src.adapters.csv.mapping import get_csv_adapter
-from src.adapters.ynab.source import YNABSourceAdapter
+from src.components.loaders import (background, csv_transactions, forget,
+                                    ynab_client, ynab_transactions)
 from src.components.sidebar import render_sidebar
+from src.money import format_amount
 
 st.set_page_config(
     page_title="Bank Transactions Analyzer",
@@ -31,38 +29,42 @@ def main():
         )
         
         if uploaded_file is not None:
+            from src.adapters.csv import bank_names
+            
             bank_name = st.selectbox(
                 "Select your bank",
-                options=['LHV', 'Wells Fargo', 'Bank of America']
+                options=['auto', *bank_names()],
+                format_func=lambda x: "Detect from file" if x == 'auto' else x
             )
             
-            # Save uploaded file temporarily
-            temp_path = Path("data/user_uploads/temp.csv")
-            temp_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(temp_path, "wb") as f:
-                f.write(uploaded_file.getvalue())
-            
             try:
-                adapter = get_csv_adapter(bank_name, str(temp_path))
-                transactions = adapter.load_transactions()
+                # Parsed once per upload; reruns reuse the cached batch
+                transactions, errors = csv_transactions(uploaded_file.file_id, bank_name, uploaded_file.getvalue())
                 
-                if transactions:
+                if not errors.empty:
+                    st.warning(f"Skipped {len(errors)} rows that could not be parsed")
+                    with st.expander("Skipped rows"):
+                        st.dataframe(errors)
+                
+                if len(transactions):
                     st.write(f"Found {len(transactions)} transactions")
-                    
-                    import pandas as pd
-                    df = pd.DataFrame([vars(t) for t in transactions])
-                    st.dataframe(df)
+                    st.dataframe(transactions.to_pandas())
                     
             except Exception as e:
                 st.error(f"Error processing file: {str(e)}")
     elif source_type == 'YNAB':
         try:
-            # Initialize adapter without budget_id first
-            ynab_adapter = YNABSourceAdapter(budget_id="")
+            client = ynab_client()
+            if st.button("Refresh budgets and accounts"):
+                client.invalidate_metadata()
+                forget('budgets', 'accounts')
             
-            # Get available budgets
-            budgets = ynab_adapter.get_budgets()
+            # Get available budgets without blocking the rest of the page
+            budgets = background(
+                ('budgets',), client.get_budgets, label="Loading budgets...", ttl=client.metadata_ttl
+            )
+            if budgets is None:
+                return
             if not budgets:
                 st.error("No budgets found in YNAB")
                 return
@@ -75,11 +77,13 @@ def main():
             )
             
             if selected_budget:
-                # Update adapter with selected budget
-                ynab_adapter = YNABSourceAdapter(budget_id=selected_budget.id)
-                
                 # Get accounts for selected budget
-                accounts = ynab_adapter.get_accounts()
+                accounts = background(
+                    ('accounts', selected_budget.id), client.get_accounts, selected_budget.id, label="Loading accounts...",
+                    ttl=client.metadata_ttl
+                )
+                if accounts is None:
+                    return
                 active_accounts = [a for a in accounts if not a.closed]
                 
                 if not active_accounts:
@@ -90,26 +94,28 @@ def main():
                 selected_account = st.selectbox(
                     "Select Account",
                     options=active_accounts,
-                    format_func=lambda x: f"{x.name} (Balance: {x.balance:,.2f})"
+                    format_func=lambda x: f"{x.name} (Balance: {format_amount(x.balance, selected_budget.currency)})"
                 )
                 
                 # Date selection
                 since_date = st.date_input("Since date")
+                full_resync = st.checkbox(
+                    "Force full resync",
+                    help="Ignore the local transaction cache and download everything from YNAB again"
+                )
                 
                 if st.button("Load Transactions"):
-                    # Create final adapter with all selections
-                    ynab_adapter = YNABSourceAdapter(
-                        budget_id=selected_budget.id,
-                        account_id=selected_account.id if selected_account else None,
-                        since_date=datetime.combine(since_date, datetime.min.time())
+                    if full_resync:
+                        ynab_transactions.clear()
+                    transactions = ynab_transactions(
+                        selected_budget.id,
+                        selected_account.id if selected_account else None,
+                        since_date,
+                        _full_resync=full_resync
                     )
-                    
-                    transactions = ynab_adapter.load_transactions()
-                    if transactions:
+                    if len(transactions):
                         st.write(f"Found {len(transactions)} transactions")
-                        import pandas as pd
-                        df = pd.DataFrame([vars(t) for t in transactions])
-                        st.dataframe(df)
+                        st.dataframe(transactions.to_pandas())
                     else:
                         st.info("No transactions found for the selected criteria")
                         
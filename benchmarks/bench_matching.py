@@ -0,0 +1,111 @@
+"""
+Compare the indexed matcher against the original nested-loop matcher.
+
+Run from the repository root:
+    python -m benchmarks.bench_matching --sizes 1000 2000 4000 8000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from src.adapters.base import Transaction
+from src.matching import find_matching_transactions, to_milliunits
+
+
+def find_matching_transactions_nested(ynab_trans, csv_trans, tolerance_days=1, amount_threshold=0.01):
+    """The original O(N×M) first-fit loop from the Transaction Matcher page"""
+    matches = []
+    unmatched_ynab = []
+    threshold = to_milliunits(amount_threshold)
+    
+    csv_matched = set()
+    
+    for yt in ynab_trans:
+        found_match = False
+        for i, ct in enumerate(csv_trans):
+            if i in csv_matched:
+                continue
+                
+            amount_matches = abs(yt.amount_milliunits - ct.amount_milliunits) <= threshold
+            date_diff = abs((yt.date - ct.date).days)
+            date_matches = date_diff <= tolerance_days
+            
+            if amount_matches and date_matches:
+                matches.append((yt, ct))
+                csv_matched.add(i)
+                found_match = True
+                break
+        
+        if not found_match:
+            unmatched_ynab.append(yt)
+    
+    unmatched_csv = [ct for i, ct in enumerate(csv_trans) if i not in csv_matched]
+    
+    return matches, unmatched_ynab, unmatched_csv
+
+
+def generate_pair(size: int, seed: int = 0) -> Tuple[List[Transaction], List[Transaction]]:
+    """Generate YNAB/CSV lists where most rows match with up to one day of drift"""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    span_days = max(size // 20, 30)
+
+    ynab, csv = [], []
+    for _ in range(size):
+        date = start + timedelta(days=rng.randrange(span_days))
+        amount = rng.randint(-50_000, 50_000) * 10  # Whole cents, in milliunits
+        ynab.append(Transaction(date=date, description="", amount_milliunits=amount, bank_name='YNAB'))
+        if rng.random() < 0.9:
+            drift = timedelta(days=rng.choice((-1, 0, 0, 1)))
+            csv.append(Transaction(date=date + drift, description="", amount_milliunits=amount, bank_name='LHV'))
+        else:
+            csv.append(Transaction(
+                date=start + timedelta(days=rng.randrange(span_days)),
+                description="",
+                amount_milliunits=rng.randint(-50_000, 50_000) * 10,
+                bank_name='LHV'
+            ))
+    rng.shuffle(csv)
+    return ynab, csv
+
+
+def _time(func, *args) -> Tuple[float, tuple]:
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 2000, 4000, 8000])
+    parser.add_argument('--mode', choices=['greedy', 'global'], default='greedy')
+    parser.add_argument('--nested-limit', type=int, default=8000,
+                        help="Skip the nested-loop baseline above this size")
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {args.mode + ' (s)':>12} {'nested (s)':>12} {'speedup':>9} {'same':>5}")
+    for size in args.sizes:
+        ynab, csv = generate_pair(size)
+        indexed_time, indexed = _time(
+            lambda y, c: find_matching_transactions(y, c, mode=args.mode), ynab, csv
+        )
+
+        if size > args.nested_limit:
+            print(f"{size:>8} {indexed_time:>12.3f} {'-':>12} {'-':>9} {'-':>5}")
+            continue
+
+        nested_time, nested = _time(find_matching_transactions_nested, ynab, csv)
+        if args.mode != 'greedy':
+            print(f"{size:>8} {indexed_time:>12.3f} {nested_time:>12.3f} "
+                  f"{nested_time / indexed_time:>8.1f}x {'n/a':>5}  "
+                  f"matched {len(indexed[0])} vs {len(nested[0])}")
+            continue
+        same = [(id(y), id(c)) for y, c in indexed[0]] == [(id(y), id(c)) for y, c in nested[0]]
+        print(f"{size:>8} {indexed_time:>12.3f} {nested_time:>12.3f} "
+              f"{nested_time / indexed_time:>8.1f}x {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main()
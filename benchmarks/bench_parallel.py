@@ -0,0 +1,44 @@
+"""
+Measure multi-process matching speedup on 1, 2, 4 and 8 workers.
+
+Run from the repository root:
+    python -m benchmarks.bench_parallel --accounts 4 --size 50000
+"""
+import argparse
+import os
+import time
+
+from benchmarks.bench_matching import generate_pair
+from src.matching import find_matching_transactions
+from src.matching.parallel import match_parallel
+
+
+def _pair_keys(results):
+    return [[(id(y), id(c)) for y, c in matches] for matches, _, _ in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--accounts', type=int, default=4)
+    parser.add_argument('--size', type=int, default=50000, help="Transactions per account and side")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--mode', choices=['greedy', 'global'], default='greedy')
+    args = parser.parse_args()
+
+    jobs = [generate_pair(args.size, seed=account) for account in range(args.accounts)]
+    print(f"{args.accounts} accounts x {args.size} rows per side, mode={args.mode}, {os.cpu_count()} CPUs")
+
+    started = time.perf_counter()
+    reference = _pair_keys([find_matching_transactions(y, c, mode=args.mode) for y, c in jobs])
+    serial_time = time.perf_counter() - started
+    print(f"{'unpartitioned':>14} {serial_time:>8.2f}s")
+
+    for workers in args.workers:
+        started = time.perf_counter()
+        results = match_parallel(jobs, mode=args.mode, max_workers=workers)
+        elapsed = time.perf_counter() - started
+        print(f"{workers:>6} workers {elapsed:>8.2f}s {serial_time / elapsed:>6.2f}x  "
+              f"identical to unpartitioned: {_pair_keys(results) == reference}")
+
+if __name__ == "__main__":
+    main()
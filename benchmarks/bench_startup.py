@@ -0,0 +1,80 @@
+"""
+Measure cold-start and rerun latency of the Streamlit pages.
+
+Each page runs in a fresh interpreter through Streamlit's AppTest harness:
+the first run pays for every import the page triggers (cold start), later
+runs are plain reruns like the ones a widget change causes.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup --reruns 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PAGES = ['app.py', 'pages/01_🔍_Transaction_Matcher.py']
+
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'requests']
+
+
+def _measure(page: str, reruns: int) -> dict:
+    """Runs inside the worker interpreter"""
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    harness_import = time.perf_counter() - started
+
+    loaded_before = {name for name in HEAVY_MODULES if name in sys.modules}
+    app = AppTest.from_file(str(ROOT / page), default_timeout=60)
+    started = time.perf_counter()
+    app.run()
+    cold = time.perf_counter() - started
+
+    timings = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - started)
+
+    return {
+        'page': page,
+        'harness_import': harness_import,
+        'cold': cold,
+        'rerun_median': statistics.median(timings) if timings else None,
+        'rerun_max': max(timings) if timings else None,
+        'page_imports': sorted(name for name in HEAVY_MODULES if name in sys.modules and name not in loaded_before),
+        'exceptions': [e.value for e in app.exception],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', nargs='+', default=PAGES)
+    parser.add_argument('--reruns', type=int, default=10)
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_measure(args.worker, args.reruns)))
+        return
+
+    print(f"{'page':<40} {'cold':>8} {'rerun p50':>10} {'rerun max':>10}  heavy imports")
+    for page in args.pages:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_startup', '--worker', page, '--reruns', str(args.reruns)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{page:<40} {result['cold'] * 1000:>6.0f}ms {result['rerun_median'] * 1000:>8.1f}ms "
+              f"{result['rerun_max'] * 1000:>8.1f}ms  {', '.join(result['page_imports']) or '-'}")
+        for error in result['exceptions']:
+            print(f"    exception: {error}")
+
+
+if __name__ == "__main__":
+    main()
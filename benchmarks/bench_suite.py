@@ -0,0 +1,227 @@
+"""
+Benchmark the reconciliation hot paths on synthetic data and track results.
+
+Stages, each on the same deterministic statement pair per size:
+    csv_parse[en|et]  LHV statement bytes -> Transactions (load_transactions)
+    ynab_load         YNAB /transactions payload -> Transactions
+    match[mode]       find_matching_transactions, scored against ground truth
+    groups            split/batch matching on the leftovers (--groups)
+    dedup             merge two statements overlapping by a third (merge_statements)
+
+Throughput, peak traced memory and accuracy are appended to a history file;
+each run is compared with the previous run of the same stage and size, and
+regressions beyond --tolerance are reported (exit status 1 with --check).
+
+Run from the repository root:
+    python -m benchmarks.bench_suite --sizes 1000 10000 100000
+    python -m benchmarks.bench_suite --sizes 1000000 --no-memory
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from benchmarks.synthetic import Synthetic, generate
+from src.adapters.csv import get_csv_adapter
+from src.adapters.dedup import merge_statements
+from src.adapters.ynab.source import _to_batch
+from src.matching import find_group_matches, find_matching_transactions
+
+DEFAULT_HISTORY = Path("data/benchmarks/history.jsonl")
+
+
+def _measure(func: Callable[[], Any], memory: bool, repeat: int = 1) -> Tuple[float, Optional[float], Any]:
+    """Best seconds of `repeat` untraced runs, plus peak MB of one more, traced run"""
+    seconds = float('inf')
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        seconds = min(seconds, time.perf_counter() - started)
+    peak = None
+    if memory:
+        del result
+        gc.collect()
+        tracemalloc.start()
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def _pair_accuracy(data: Synthetic, ynab, csv, matches) -> Dict[str, float]:
+    """Precision/recall of 1:1 matches; pairs of interchangeable duplicates count as correct"""
+    ynab_position = {id(t): i for i, t in enumerate(ynab)}
+    csv_position = {id(t): i for i, t in enumerate(csv)}
+    y = np.fromiter((ynab_position[id(yt)] for yt, _ in matches), dtype=np.int64, count=len(matches))
+    c = np.fromiter((csv_position[id(ct)] for _, ct in matches), dtype=np.int64, count=len(matches))
+    correct = int(((data.ynab_class[y] == data.csv_class[c]) & (data.csv_class[c] >= 0)).sum())
+    return {
+        'precision': correct / len(matches) if matches else 1.0,
+        'recall': correct / data.true_pairs if data.true_pairs else 1.0,
+    }
+
+
+def _split_recall(data: Synthetic, ynab, csv, groups) -> float:
+    ynab_position = {id(t): i for i, t in enumerate(ynab)}
+    csv_position = {id(t): i for i, t in enumerate(csv)}
+    found = 0
+    for group in groups:
+        if group.target_side != 'csv':
+            continue
+        split = data.csv_split[csv_position[id(group.target)]]
+        members = {ynab_position[id(m)] for m in group.members}
+        if split >= 0 and members == set(np.flatnonzero(data.ynab_split == split).tolist()):
+            found += 1
+    return found / data.splits if data.splits else 1.0
+
+
+def run(size: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    data = generate(size, seed=args.seed)
+    records = []
+
+    def record(stage: str, rows: int, seconds: float, peak: Optional[float], **extra):
+        records.append({
+            'stage': stage,
+            'size': size,
+            'rows': rows,
+            'seconds': seconds,
+            'rows_per_second': rows / seconds if seconds else None,
+            'peak_mb': peak,
+            **extra,
+        })
+
+    csv: Any = None
+    for language in ('en', 'et'):
+        content = data.csv[language]
+        seconds, peak, csv = _measure(
+            lambda: get_csv_adapter('LHV', content).load_transactions(), not args.no_memory, args.repeat
+        )
+        record(f'csv_parse[{language}]', len(csv), seconds, peak, mb_per_second=len(content) / 2 ** 20 / seconds)
+
+    raw = data.ynab['transactions']
+    seconds, peak, ynab = _measure(lambda: list(_to_batch(raw)), not args.no_memory, args.repeat)
+    record('ynab_load', len(ynab), seconds, peak)
+
+    seconds, peak, result = _measure(
+        lambda: find_matching_transactions(ynab, csv, tolerance_days=1, mode=args.mode, use_descriptions=args.use_descriptions),
+        not args.no_memory,
+        args.repeat
+    )
+    matches, unmatched_ynab, unmatched_csv = result
+    record(f'match[{args.mode}]', len(ynab) + len(csv), seconds, peak, **_pair_accuracy(data, ynab, csv, matches))
+
+    if args.groups:
+        seconds, peak, (groups, _, _) = _measure(
+            lambda: find_group_matches(unmatched_ynab, unmatched_csv, 1, 0.01), not args.no_memory, args.repeat
+        )
+        record('groups', len(unmatched_ynab) + len(unmatched_csv), seconds, peak,
+               split_recall=_split_recall(data, ynab, csv, groups))
+
+    # Every row of the overlapping third must collapse as an exact duplicate
+    statement = get_csv_adapter('LHV', data.csv['en']).load_batch()
+    third = len(statement) // 3
+    statements = [statement.take(np.arange(2 * third)), statement.take(np.arange(third, len(statement)))]
+    seconds, peak, merged = _measure(lambda: merge_statements(statements), not args.no_memory, args.repeat)
+    record('dedup', sum(len(s) for s in statements), seconds, peak,
+           recall=len(merged.exact) / third if third else 1.0)
+    return records
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _previous(history: Path) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    """Latest recorded result per (stage, size)"""
+    latest = {}
+    if history.exists():
+        with open(history) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    latest[(entry['stage'], entry['size'])] = entry
+    return latest
+
+
+def _regressions(current: Dict[str, Any], previous: Dict[str, Any], tolerance: float) -> List[str]:
+    found = []
+    if previous.get('rows_per_second') and current['rows_per_second'] < previous['rows_per_second'] * (1 - tolerance):
+        found.append(f"throughput {previous['rows_per_second']:,.0f} -> {current['rows_per_second']:,.0f} rows/s")
+    if previous.get('peak_mb') and current.get('peak_mb') and current['peak_mb'] > previous['peak_mb'] * (1 + tolerance):
+        found.append(f"peak memory {previous['peak_mb']:.1f} -> {current['peak_mb']:.1f} MB")
+    for metric in ('precision', 'recall', 'split_recall'):
+        if metric in previous and metric in current and current[metric] < previous[metric] - 1e-3:
+            found.append(f"{metric} {previous[metric]:.4f} -> {current[metric]:.4f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mode', choices=['greedy', 'global'], default='greedy')
+    parser.add_argument('--use-descriptions', action='store_true')
+    parser.add_argument('--groups', action='store_true', help="Also benchmark split/batch matching")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage; the fastest is reported")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced run that measures peak memory")
+    parser.add_argument('--history', type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument('--no-record', action='store_true', help="Compare with history without appending to it")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown or memory growth")
+    parser.add_argument('--check', action='store_true', help="Exit with status 1 on regressions")
+    args = parser.parse_args()
+
+    previous = _previous(args.history)
+    run_info = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'seed': args.seed,
+    }
+
+    print(f"{'stage':<16} {'size':>8} {'rows/s':>12} {'seconds':>9} {'peak MB':>9}  accuracy")
+    regressions = []
+    records = []
+    for size in args.sizes:
+        for entry in run(size, args):
+            records.append(dict(run_info, **entry))
+            accuracy = "  ".join(
+                f"{metric} {entry[metric]:.4f}" for metric in ('precision', 'recall', 'split_recall') if metric in entry
+            )
+            peak = f"{entry['peak_mb']:>9.1f}" if entry['peak_mb'] is not None else f"{'-':>9}"
+            print(f"{entry['stage']:<16} {size:>8} {entry['rows_per_second']:>12,.0f} {entry['seconds']:>9.3f} {peak}  {accuracy}")
+            before = previous.get((entry['stage'], size))
+            if before:
+                for problem in _regressions(entry, before, args.tolerance):
+                    regressions.append(f"{entry['stage']} size {size}: {problem} (vs {before.get('commit')})")
+
+    if not args.no_record:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.history, 'a') as f:
+            for entry in records:
+                f.write(json.dumps(entry) + "\n")
+
+    if regressions:
+        print("\nRegressions:")
+        for line in regressions:
+            print(f"  {line}")
+        if args.check:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
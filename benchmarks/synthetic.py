@@ -0,0 +1,220 @@
+"""
+Deterministic synthetic reconciliation data: an LHV statement (English or
+Estonian headers) and the matching YNAB /transactions payload, with known
+ground truth.
+
+Write a pair to disk, e.g. for the CLI or a local YNAB stub server:
+    python -m benchmarks.synthetic --size 100000 --out data/synthetic
+"""
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.adapters.csv.spec import load_bank_specs
+
+ACCOUNT_NO = "EE382200221020145685"
+YNAB_ACCOUNT_ID = "00000000-0000-4000-8000-000000000001"
+START_DATE = np.datetime64('2023-01-01')
+PAYEES = np.array([f"Payee {i:03d}" for i in range(250)], dtype=object)
+CATEGORIES = np.array(['Groceries', 'Rent', 'Transport', 'Eating Out', 'Utilities', 'Salary'], dtype=object)
+
+# Statement columns, as standard fields mapped through the LHV spec in banks.yaml
+FIELDS = [
+    'account_id', 'date', 'description', 'amount', 'transaction_type',
+    'counterparty_name', 'counterparty_account', 'reference',
+]
+
+# Row kinds
+MATCHED, DUPLICATE, YNAB_ONLY, CSV_ONLY, SPLIT = range(5)
+
+
+@dataclass
+class Synthetic:
+    csv: Dict[str, bytes]  # language -> LHV statement
+    ynab: Dict[str, Any]  # YNAB /transactions response data
+    # Ground truth, by row position. Rows of interchangeable 1:1 pairs (duplicates)
+    # share a class; -1 marks rows without a 1:1 partner
+    ynab_class: np.ndarray
+    csv_class: np.ndarray
+    # Split truth: split id per row, -1 elsewhere; one CSV row per split
+    ynab_split: np.ndarray
+    csv_split: np.ndarray
+
+    @property
+    def true_pairs(self) -> int:
+        return int((self.csv_class >= 0).sum())
+
+    @property
+    def splits(self) -> int:
+        return int((self.csv_split >= 0).sum())
+
+
+def generate(
+    size: int,
+    seed: int = 0,
+    drift_rate: float = 0.3,
+    max_drift: int = 1,
+    duplicate_rate: float = 0.05,
+    split_rate: float = 0.02,
+    missing_rate: float = 0.05
+) -> Synthetic:
+    """
+    Generate about `size` rows per side. Matched pairs drift by up to
+    `max_drift` days on `drift_rate` of rows; `duplicate_rate` of pairs get an
+    identical twin pair; `split_rate` of CSV rows are split into 2-3 YNAB rows;
+    `missing_rate` of rows exist on one side only.
+    """
+    rng = np.random.default_rng(seed)
+    span = max(size // 30, 60)
+
+    kinds = rng.choice(
+        [MATCHED, YNAB_ONLY, CSV_ONLY, SPLIT],
+        size=size,
+        p=[1 - missing_rate - split_rate, missing_rate / 2, missing_rate / 2, split_rate]
+    )
+    dates = START_DATE + rng.integers(0, span, size)
+    amounts = rng.integers(-50_000, 20_000, size) * 10  # Whole cents, in milliunits
+    amounts[amounts == 0] = -10
+    split = kinds == SPLIT
+    amounts[split] = -rng.integers(100, 50_000, split.sum()) * 10
+    payees = rng.integers(0, len(PAYEES), size)
+    classes = np.arange(size)
+
+    # Twins: identical copies of some matched pairs, interchangeable with the original
+    twins = np.flatnonzero((kinds == MATCHED) & (rng.random(size) < duplicate_rate))
+    kinds = np.concatenate([kinds, np.full(len(twins), DUPLICATE)])
+    dates = np.concatenate([dates, dates[twins]])
+    amounts = np.concatenate([amounts, amounts[twins]])
+    payees = np.concatenate([payees, payees[twins]])
+    classes = np.concatenate([classes, classes[twins]])
+    total = len(kinds)
+
+    drift = np.where(rng.random(total) < drift_rate, rng.integers(-max_drift, max_drift + 1, total), 0)
+    drift[kinds == DUPLICATE] = drift[twins]
+    paired = (kinds == MATCHED) | (kinds == DUPLICATE)
+
+    # CSV side: one row per pair, CSV-only row and split total
+    on_csv = paired | (kinds == CSV_ONLY) | (kinds == SPLIT)
+    csv_dates = dates[on_csv] + np.where(paired[on_csv], drift[on_csv], 0)
+    csv_rows = pd.DataFrame({
+        'date': csv_dates,
+        'amount': amounts[on_csv],
+        'payee': PAYEES[payees[on_csv]],
+        'class': np.where(paired[on_csv], classes[on_csv], -1),
+        'split': np.where(kinds[on_csv] == SPLIT, np.flatnonzero(on_csv), -1),
+    }).sort_values('date', kind='stable', ignore_index=True)
+
+    # YNAB side: one row per pair and YNAB-only row, 2-3 parts per split
+    on_ynab = paired | (kinds == YNAB_ONLY)
+    split_rows = np.flatnonzero(kinds == SPLIT)
+    parts = rng.integers(2, 4, len(split_rows))
+    part_source = np.repeat(split_rows, parts)
+    part_amounts = _split_amounts(rng, amounts[split_rows], parts)
+    ynab_rows = pd.DataFrame({
+        'date': np.concatenate([dates[on_ynab], dates[part_source]]),
+        'amount': np.concatenate([amounts[on_ynab], part_amounts]),
+        'payee': PAYEES[np.concatenate([payees[on_ynab], payees[part_source]])],
+        'class': np.concatenate([np.where(paired[on_ynab], classes[on_ynab], -1), np.full(len(part_source), -1)]),
+        'split': np.concatenate([np.full(on_ynab.sum(), -1), part_source]),
+    }).sort_values('date', kind='stable', ignore_index=True)
+
+    return Synthetic(
+        csv=_lhv_csv(csv_rows),
+        ynab=_ynab_payload(ynab_rows, rng),
+        ynab_class=ynab_rows['class'].to_numpy(),
+        csv_class=csv_rows['class'].to_numpy(),
+        ynab_split=ynab_rows['split'].to_numpy(),
+        csv_split=csv_rows['split'].to_numpy(),
+    )
+
+
+def _split_amounts(rng: np.random.Generator, totals: np.ndarray, parts: np.ndarray) -> np.ndarray:
+    """Cut each total (at least 1.00) into `parts` non-zero cent amounts that add up exactly"""
+    cents = np.abs(totals) // 10
+    first = rng.integers(1, cents - 1)
+    second = rng.integers(1, cents - 1)
+    low, high = np.minimum(first, second), np.maximum(first, second)
+    high = np.where(high == low, low + 1, high)
+    pieces = np.where(
+        parts[:, None] == 2,
+        np.stack([first, cents - first, np.zeros_like(cents)], axis=1),
+        np.stack([low, high - low, cents - high], axis=1)
+    )
+    keep = np.arange(3)[None, :] < parts[:, None]
+    return (pieces * np.sign(totals)[:, None] * 10)[keep]
+
+
+def _lhv_csv(rows: pd.DataFrame) -> Dict[str, bytes]:
+    """The statement once per header language; only the header line differs"""
+    amounts = rows['amount']
+    absolute = amounts.abs()
+    body = pd.DataFrame({
+        'account_id': ACCOUNT_NO,
+        'date': rows['date'].dt.strftime('%Y-%m-%d'),
+        'description': "Card payment " + rows['payee'],
+        'amount': (absolute // 1000).astype(str) + "," + (absolute % 1000 // 10).astype(str).str.zfill(2),
+        'transaction_type': np.where(amounts < 0, 'D', 'C'),
+        'counterparty_name': rows['payee'].str.upper(),
+        'counterparty_account': '',
+        'reference': '',
+    }).to_csv(index=False, header=False).encode('utf-8')
+
+    statements = {}
+    for language, columns in load_bank_specs()['LHV'].columns.items():
+        header = ",".join(columns[field] for field in FIELDS) + "\n"
+        statements[language] = header.encode('utf-8') + body
+    return statements
+
+
+def _ynab_payload(rows: pd.DataFrame, rng: np.random.Generator) -> Dict[str, Any]:
+    count = len(rows)
+    categories = CATEGORIES[rng.integers(0, len(CATEGORIES), count)]
+    transactions: List[Dict[str, Any]] = [
+        {
+            'id': f"00000000-0000-4000-9000-{i:012d}",
+            'date': date,
+            'amount': amount,
+            'memo': None,
+            'cleared': 'uncleared',
+            'approved': True,
+            'account_id': YNAB_ACCOUNT_ID,
+            'account_name': 'Checking',
+            'payee_name': payee,
+            'category_name': category,
+            'import_id': None,
+            'deleted': False,
+        }
+        for i, (date, amount, payee, category) in enumerate(zip(
+            rows['date'].dt.strftime('%Y-%m-%d').tolist(),
+            rows['amount'].tolist(),
+            rows['payee'].tolist(),
+            categories.tolist()
+        ))
+    ]
+    return {'transactions': transactions, 'server_knowledge': count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', type=Path, default=Path('data/synthetic'))
+    args = parser.parse_args()
+
+    data = generate(args.size, seed=args.seed)
+    args.out.mkdir(parents=True, exist_ok=True)
+    for language, content in data.csv.items():
+        (args.out / f"lhv_{language}.csv").write_bytes(content)
+    with open(args.out / "ynab_transactions.json", 'w') as f:
+        json.dump({'data': data.ynab}, f)
+    print(f"Wrote {len(data.csv_class)} CSV and {len(data.ynab_class)} YNAB rows "
+          f"({data.true_pairs} true pairs, {data.splits} splits) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,15 @@
 from datetime import datetime, timedelta
-from pathlib import Path
+from itertools import chain
+from typing import List
 
-import pandas as pd
 import streamlit as st
 
-from src.adapters.csv.mapping import get_csv_adapter
-from src.adapters.ynab.source import YNABSourceAdapter
+from src.components.loaders import (background, forget, ynab_client,
+                                    ynab_transactions)
 from src.components.sidebar import render_sidebar
+from src.components.trace_panel import render_trace_panel, start_trace
+from src.money import currency_decimals, format_amount, minor_unit
+from src.tracing import span
 
 st.set_page_config(
     page_title="Transaction Matcher",
@@ -16,8 +19,15 @@ st.set_page_config(
 
 def load_ynab_transactions():
     try:
-        ynab_adapter = YNABSourceAdapter(budget_id="")
-        budgets = ynab_adapter.get_budgets()
+        client = ynab_client()
+        if st.button("Refresh budgets and accounts"):
+            client.invalidate_metadata()
+            forget('budgets', 'accounts')
+        budgets = background(
+            ('budgets',), client.get_budgets, label="Loading budgets...", ttl=client.metadata_ttl
+        )
+        if budgets is None:
+            return None, None
         
         selected_budget = st.selectbox(
             "Select YNAB Budget",
@@ -26,89 +36,66 @@ def load_ynab_transactions():
         )
         
         if selected_budget:
-            ynab_adapter = YNABSourceAdapter(budget_id=selected_budget.id)
-            accounts = ynab_adapter.get_accounts()
+            accounts = background(
+                ('accounts', selected_budget.id), client.get_accounts, selected_budget.id, label="Loading accounts...",
+                ttl=client.metadata_ttl
+            )
+            if accounts is None:
+                return selected_budget, None
             active_accounts = [a for a in accounts if not a.closed]
             
             selected_account = st.selectbox(
                 "Select Account",
                 options=active_accounts,
-                format_func=lambda x: f"{x.name} (Balance: {x.balance:,.2f})"
+                format_func=lambda x: f"{x.name} (Balance: {format_amount(x.balance, selected_budget.currency)})"
             )
             
-            return ynab_adapter, selected_budget, selected_account
+            return selected_budget, selected_account
     except Exception as e:
         st.error(f"Error accessing YNAB: {str(e)}")
-        return None, None, None
+    return None, None
 
 def load_csv_transactions():
-    uploaded_file = st.file_uploader(
-        "Choose a CSV file",
+    uploaded_files = st.file_uploader(
+        "Choose CSV files",
         type=['csv'],
-        help="Upload your bank transaction CSV file"
+        accept_multiple_files=True,
+        help="Upload one or more bank transaction CSV files; rows repeated by overlapping statements are matched once"
     )
     
-    if uploaded_file is not None:
+    if uploaded_files:
+        from src.adapters.csv import (StatementCache, bank_names,
+                                      get_csv_adapter)
+        
         bank_name = st.selectbox(
             "Select your bank",
-            options=['LHV']  # Add other banks as needed
+            options=['auto', *bank_names()],
+            format_func=lambda x: "Detect from file" if x == 'auto' else x
         )
         
-        temp_path = Path("data/user_uploads/temp.csv")
-        temp_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.getvalue())
-        
         try:
-            adapter = get_csv_adapter(bank_name, str(temp_path))
-            return adapter
+            
+            # Parsed straight from the upload buffer; statements seen before come from the parse cache
+            adapters = [get_csv_adapter(bank_name, f.getvalue(), cache=StatementCache()) for f in uploaded_files]
+            return adapters, (tuple(f.file_id for f in uploaded_files), bank_name)
         except Exception as e:
             st.error(f"Error processing CSV: {str(e)}")
-            return None
+    return None, None
 
-def find_matching_transactions(ynab_trans, csv_trans, tolerance_days=1, amount_threshold=0.01):
-    matches = []
-    unmatched_ynab = []
-    unmatched_csv = []
-    
-    csv_matched = set()
-    
-    for yt in ynab_trans:
-        found_match = False
-        for i, ct in enumerate(csv_trans):
-            if i in csv_matched:
-                continue
-                
-            amount_matches = abs(yt.amount - ct.amount) <= amount_threshold
-            date_diff = abs((yt.date - ct.date).days)
-            date_matches = date_diff <= tolerance_days
-            
-            if amount_matches and date_matches:
-                matches.append((yt, ct))
-                csv_matched.add(i)
-                found_match = True
-                break
-        
-        if not found_match:
-            unmatched_ynab.append(yt)
-    
-    for i, ct in enumerate(csv_trans):
-        if i not in csv_matched:
-            unmatched_csv.append(ct)
-    
-    return matches, unmatched_ynab, unmatched_csv
+# CSV rows this many days outside the date range are loaded so edge matches are kept
+CSV_MARGIN_DAYS = 7
 
 # Main content
 st.title("Transaction Matcher")
 render_sidebar()
+start_trace()
 
 # Create two columns for YNAB and CSV inputs
 col1, col2 = st.columns(2)
 
 with col1:
     st.header("YNAB Source")
-    ynab_adapter, selected_budget, selected_account = load_ynab_transactions()
+    selected_budget, selected_account = load_ynab_transactions()
     
     # Add date range selection for YNAB
     st.subheader("Date Range")
@@ -128,68 +115,217 @@ with col1:
     
     if start_date > end_date:
         st.error("Start date must be before end date")
+    
+    full_resync = st.checkbox(
+        "Force full resync",
+        help="Ignore the local transaction cache and download everything from YNAB again"
+    )
 
 with col2:
     st.header("CSV Source")
-    csv_adapter = load_csv_transactions()
+    csv_adapters, csv_key = load_csv_transactions()
 
 # Matching parameters
 st.header("Matching Parameters")
-col3, col4 = st.columns(2)
+col3, col4, col_mode = st.columns(3)
 with col3:
     tolerance_days = st.number_input("Date Tolerance (days)", min_value=0, value=1)
 with col4:
-    amount_threshold = st.number_input("Amount Threshold", min_value=0.0, value=0.01)
+    # One minor unit of the budget's currency by default; amounts are compared exactly in milliunits
+    currency = selected_budget.currency if selected_budget else None
+    amount_step = minor_unit(currency) / 1000
+    amount_threshold = st.number_input(
+        "Amount Threshold",
+        min_value=0.0,
+        value=amount_step,
+        step=amount_step,
+        format=f"%.{currency_decimals(currency)}f",
+        help="Largest amount difference still considered a match; 0 requires identical amounts"
+    )
+with col_mode:
+    match_mode = st.selectbox(
+        "Matching Mode",
+        options=['greedy', 'global'],
+        format_func=lambda x: {'greedy': "Greedy (first fit)", 'global': "Global (best assignment)"}[x],
+        help="Global mode considers all candidates at once and avoids pairing a transaction with the wrong one of two similar rows"
+    )
+use_descriptions = st.checkbox(
+    "Use description similarity",
+    help="Prefer the candidate whose payee/description is most similar instead of the first one in the window"
+)
+col_groups, col_group_size = st.columns(2)
+with col_groups:
+    match_groups = st.checkbox(
+        "Match split and batch payments",
+        help="Match leftover transactions against 2 or more transactions on the other side that add up to the same amount"
+    )
+with col_group_size:
+    max_group_size = st.number_input("Max group size", min_value=2, max_value=8, value=4, disabled=not match_groups)
+
+def load_session(budget_id, account_id, csv_adapters, start_date, end_date, full_resync, match_mode, use_descriptions):
+    """
+    Load both sources into a reconciliation session for the selected range,
+    with the duplicates collapsed on each side
+    """
+    from src.adapters.base import TransactionFilter
+    from src.adapters.dedup import StatementMerger, dedup_ynab
+    from src.matching import ReconciliationSession
+
+    # Push the date range into both sources instead of filtering afterwards
+    if full_resync:
+        ynab_transactions.clear()
+    ynab_batch = ynab_transactions(budget_id, account_id, start_date, end_date, _full_resync=full_resync)
+    ynab_duplicates = dedup_ynab(ynab_batch)
+    
+    # CSV rows just outside the range can still match YNAB rows at its edges
+    margin = timedelta(days=CSV_MARGIN_DAYS)
+    csv_filter = TransactionFilter(start_date=start_date - margin, end_date=end_date + margin)
+    
+    # Stream CSV batches through the merger straight into the session instead of loading whole statements
+    merger = StatementMerger()
+    csv_batches = (
+        merger.add(batch, source=position)
+        for position, adapter in enumerate(csv_adapters)
+        for batch in adapter.iter_transactions(filters=csv_filter)
+    )
+    
+    session = ReconciliationSession(
+        ynab_duplicates.batch, chain.from_iterable(csv_batches), mode=match_mode, use_descriptions=use_descriptions
+    )
+    return session, merger.result(), ynab_duplicates
 
 # Only show the match button if both sources are ready and dates are valid
-if all([ynab_adapter, selected_budget, selected_account, csv_adapter]) and start_date <= end_date:
+if all([selected_budget, selected_account, csv_adapters]) and start_date <= end_date:
+    source_key = (selected_budget.id, selected_account.id, start_date, end_date, csv_key, match_mode, use_descriptions)
+    
     if st.button("Find Matches"):
-        # Create final YNAB adapter with date range
-        ynab_adapter = YNABSourceAdapter(
-            budget_id=selected_budget.id,
-            account_id=selected_account.id,
-            since_date=datetime.combine(start_date, datetime.min.time())
-        )
-        
-        # Get transactions from both sources
-        ynab_transactions = ynab_adapter.load_transactions()
+        import pandas as pd
         
-        # Filter YNAB transactions by date range
-        end_datetime = datetime.combine(end_date, datetime.max.time())
-        ynab_transactions = [
-            t for t in ynab_transactions 
-            if start_date <= t.date.date() <= end_date
-        ]
+        session, csv_duplicates, ynab_duplicates = load_session(
+            selected_budget.id, selected_account.id, csv_adapters, start_date, end_date, full_resync, match_mode,
+            use_descriptions
+        )
+        csv_errors = pd.concat([adapter.errors for adapter in csv_adapters], ignore_index=True)
+        st.session_state['reconciliation'] = (source_key, session, csv_errors, csv_duplicates, ynab_duplicates)
+    
+    # Keep the loaded session across reruns so tolerance changes only re-match what changed
+    stored = st.session_state.get('reconciliation')
+    if stored and stored[0] != source_key:
+        st.info("Sources changed; click \"Find Matches\" to reload")
+    elif stored and tolerance_days > CSV_MARGIN_DAYS:
+        st.info(f"Date tolerance above {CSV_MARGIN_DAYS} days needs a reload; click \"Find Matches\"")
+    elif stored:
+        from src.adapters.base import TransactionBatch
+        from src.matching import GroupMatch, find_group_matches
         
-        csv_transactions = csv_adapter.load_transactions()
+        _, session, csv_errors, csv_duplicates, ynab_duplicates = stored
+        matches, unmatched_ynab, unmatched_csv = session.match(tolerance_days, amount_threshold)
+        group_matches: List[GroupMatch] = []
+        if match_groups:
+            group_matches, unmatched_ynab, unmatched_csv = find_group_matches(
+                unmatched_ynab, unmatched_csv, tolerance_days, amount_threshold, max_group_size
+            )
+        unmatched_csv = [t for t in unmatched_csv if start_date <= t.date.date() <= end_date]
+        csv_count = len(matches) + len(unmatched_csv)
         
-        # Find matches and unmatched transactions
-        matches, unmatched_ynab, unmatched_csv = find_matching_transactions(
-            ynab_transactions,
-            csv_transactions,
-            tolerance_days,
-            amount_threshold
-        )
+        if not csv_errors.empty:
+            st.warning(f"Skipped {len(csv_errors)} CSV rows that could not be parsed")
+            with st.expander("Skipped CSV rows"):
+                st.dataframe(csv_errors)
+        if csv_duplicates.duplicates:
+            st.info(
+                f"Ignored {csv_duplicates.duplicates} CSV rows repeated by overlapping statements "
+                f"({len(csv_duplicates.exact)} exact, {len(csv_duplicates.near)} with a shifted date)"
+            )
+            with st.expander("Repeated CSV rows"):
+                st.dataframe(csv_duplicates.to_pandas())
+        if ynab_duplicates.duplicates:
+            st.warning(
+                f"Found {ynab_duplicates.duplicates} possible duplicates in YNAB "
+                f"({len(ynab_duplicates.exact)} imported twice, {len(ynab_duplicates.near)} entered by hand next to an import); "
+                "they are left out of matching"
+            )
+            with st.expander("Possible duplicates in YNAB"):
+                st.dataframe(ynab_duplicates.to_pandas())
         
         # Display results
         st.header("Results")
         st.write(f"Found {len(matches)} matching transactions")
-        st.write(f"Analyzed {len(ynab_transactions)} YNAB transactions and {len(csv_transactions)} CSV transactions")
+        if group_matches:
+            st.write(f"Found {len(group_matches)} grouped matches")
+            with st.expander("Grouped matches"), span('render', rows=len(group_matches), table='groups'):
+                st.dataframe([
+                    {
+                        'date': g.target.date,
+                        'side': g.target_side.upper(),
+                        'description': g.target.description,
+                        'amount': g.target.amount,
+                        'matched': ", ".join(
+                            f"{m.description} ({format_amount(m.amount_milliunits, currency)})" for m in g.members
+                        ),
+                    }
+                    for g in group_matches
+                ])
+        st.write(f"Analyzed {len(session.ynab_index)} YNAB transactions and {csv_count} CSV transactions")
         
         # Display unmatched transactions
         col5, col6 = st.columns(2)
         with col5:
             st.subheader(f"Unmatched YNAB Transactions ({len(unmatched_ynab)})")
             if unmatched_ynab:
-                df_ynab = pd.DataFrame([vars(t) for t in unmatched_ynab])
-                st.dataframe(df_ynab)
+                with span('render', rows=len(unmatched_ynab), table='unmatched_ynab'):
+                    df_ynab = TransactionBatch.from_transactions(unmatched_ynab).to_pandas()
+                    st.dataframe(df_ynab)
             else:
                 st.info("No unmatched YNAB transactions")
         
         with col6:
             st.subheader(f"Unmatched CSV Transactions ({len(unmatched_csv)})")
             if unmatched_csv:
-                df_csv = pd.DataFrame([vars(t) for t in unmatched_csv])
-                st.dataframe(df_csv)
+                with span('render', rows=len(unmatched_csv), table='unmatched_csv'):
+                    df_csv = TransactionBatch.from_transactions(unmatched_csv).to_pandas()
+                    st.dataframe(df_csv)
             else:
                 st.info("No unmatched CSV transactions")
+        
+        # Write the results back in bulk instead of editing YNAB one transaction at a time
+        from src.adapters.ynab.writeback import clear_payloads, create_payloads
+        
+        new_transactions = create_payloads(unmatched_csv, selected_account.id, statement=session.csv_index)
+        cleared_updates = clear_payloads(matches, group_matches)
+        
+        st.header("Update YNAB")
+        col_create, col_clear = st.columns(2)
+        with col_create:
+            create = st.button(
+                f"Create {len(new_transactions)} missing transactions",
+                disabled=not new_transactions,
+                help="Add the unmatched CSV transactions to YNAB as cleared, unapproved transactions; "
+                     "rows imported before are skipped"
+            )
+        with col_clear:
+            clear = st.button(
+                f"Mark {len(cleared_updates)} matched transactions cleared",
+                disabled=not cleared_updates,
+                help="Set uncleared YNAB transactions that matched a bank row, alone or in a group, to cleared"
+            )
+        
+        if create or clear:
+            client = ynab_client()
+            if create:
+                result = client.create_transactions(selected_budget.id, new_transactions)
+                st.success(
+                    f"Created {len(result.transactions)} transactions in {result.requests} requests"
+                    + (f"; {len(result.duplicate_import_ids)} were already imported" if result.duplicate_import_ids else "")
+                )
+            else:
+                result = client.update_transactions(selected_budget.id, cleared_updates)
+                st.success(f"Marked {len(result.transactions)} transactions cleared in {result.requests} requests")
+            if result.failed:
+                st.error(f"{len(result.failed)} transactions could not be written")
+                st.dataframe([dict(payload, error=error) for payload, error in result.failed])
+            ynab_transactions.clear()
+            st.info("Click \"Find Matches\" to reload the updated YNAB account")
+
+render_trace_panel()
+
@@ -1,4 +1,9 @@
-from .base import DataSourceAdapter, Transaction
-from .ynab.source import YNABSourceAdapter
+from .base import (DataSourceAdapter, Transaction, TransactionBatch,
+                   TransactionFilter)
+from .dedup import Deduplicated, StatementMerger, dedup_ynab, merge_statements
+from .ynab.source import AccountFetch, YNABSourceAdapter
 
-__all__ = ['DataSourceAdapter', 'Transaction', 'YNABSourceAdapter']
+__all__ = [
+    'AccountFetch', 'DataSourceAdapter', 'Deduplicated', 'StatementMerger', 'Transaction', 'TransactionBatch',
+    'TransactionFilter', 'YNABSourceAdapter', 'dedup_ynab', 'merge_statements',
+]
@@ -1,27 +1,326 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Dict, List
+from datetime import date, datetime
+from typing import (Any, Collection, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple, Union, overload)
 
+import numpy as np
 
-@dataclass
+from ..money import MILLIUNITS, Amount, to_milliunits
+from ..tracing import span
+
+
+@dataclass(slots=True)
 class Transaction:
     date: datetime
     description: str
-    amount: float
+    amount_milliunits: int  # Exact; compare and add these, never `amount`
     category: str = ""
     transaction_type: str = ""
     account_id: str = ""
     bank_name: str = ""
+    counterparty: str = ""
     raw_data: Dict[str, Any] = None  # Store original data if needed
 
+    @property
+    def amount(self) -> float:
+        """The amount in currency units, for display"""
+        return self.amount_milliunits / MILLIUNITS
+
+
+# Text fields that repeat heavily and are stored dictionary-encoded in a batch
+CATEGORICAL_FIELDS = ('category', 'transaction_type', 'account_id', 'bank_name')
+
+# datetime.toordinal() of 1970-01-01, to turn datetime64 days into ordinals
+_EPOCH_ORDINAL = 719163
+
+Categorical = Tuple[np.ndarray, np.ndarray]
+
+
+def to_day_ordinals(dates: np.ndarray) -> np.ndarray:
+    """datetime64 values as int64 proleptic ordinals, comparable with datetime.toordinal()"""
+    return dates.astype('datetime64[D]').astype(np.int64) + _EPOCH_ORDINAL
+
+
+def _encode(values: Union[None, str, Categorical, Sequence[str]], length: int) -> Categorical:
+    """Dictionary-encode a column into (int32 codes, categories)"""
+    if values is None or isinstance(values, str):
+        return np.zeros(length, dtype=np.int32), np.array([values or ''], dtype=object)
+    if isinstance(values, tuple):
+        codes, categories = values
+        return np.asarray(codes, dtype=np.int32), np.asarray(categories, dtype=object)
+    categories, codes = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+    return codes.astype(np.int32), categories
+
+
+def _concat_categoricals(parts: List[Categorical]) -> Categorical:
+    """Concatenate encoded columns, merging their categories instead of re-encoding every row"""
+    first = parts[0][1]
+    if all(categories is first for _, categories in parts):
+        return np.concatenate([codes for codes, _ in parts]).astype(np.int32), first
+    categories, inverse = np.unique(np.concatenate([c for _, c in parts]), return_inverse=True)
+    remapped, offset = [], 0
+    for codes, part_categories in parts:
+        remapped.append(inverse[offset:offset + len(part_categories)][codes])
+        offset += len(part_categories)
+    return np.concatenate(remapped).astype(np.int32), categories
+
+
+class TransactionBatch:
+    """
+    Columnar batch of transactions backed by NumPy arrays.
+
+    Amounts are int64 milliunits, dates are datetime64[s] and the repetitive
+    text fields (see CATEGORICAL_FIELDS) are stored as int32 codes plus a
+    categories array. `Transaction` objects are only materialised when rows
+    are indexed or iterated.
+    """
+
+    def __init__(
+        self,
+        dates: Any,
+        amounts: Any,
+        descriptions: Any,
+        category: Any = None,
+        transaction_type: Any = None,
+        account_id: Any = None,
+        bank_name: Any = None,
+        counterparties: Any = None,
+        raw_data: Any = None
+    ):
+        self.dates = np.asarray(dates, dtype='datetime64[s]')
+        self.amounts = np.asarray(amounts, dtype=np.int64)
+        self.descriptions = np.asarray(descriptions, dtype=object)
+        length = len(self.amounts)
+        if counterparties is None:
+            counterparties = np.full(length, '', dtype=object)
+        self.counterparties = np.asarray(counterparties, dtype=object)
+        self.categoricals: Dict[str, Categorical] = {
+            'category': _encode(category, length),
+            'transaction_type': _encode(transaction_type, length),
+            'account_id': _encode(account_id, length),
+            'bank_name': _encode(bank_name, length),
+        }
+        # Either a list of dicts (one per row) or a DataFrame of source rows
+        self.raw_data = raw_data
+
+    @classmethod
+    def from_transactions(cls, transactions: Iterable[Transaction]) -> 'TransactionBatch':
+        transactions = list(transactions)
+        return cls(
+            dates=[t.date for t in transactions],
+            amounts=[t.amount_milliunits for t in transactions],
+            descriptions=[t.description for t in transactions],
+            category=[t.category for t in transactions],
+            transaction_type=[t.transaction_type for t in transactions],
+            account_id=[t.account_id for t in transactions],
+            bank_name=[t.bank_name for t in transactions],
+            counterparties=[t.counterparty for t in transactions],
+            raw_data=[t.raw_data for t in transactions]
+        )
+
+    @classmethod
+    def concat(cls, batches: Iterable['TransactionBatch']) -> 'TransactionBatch':
+        batches = list(batches)
+        if not batches:
+            return cls([], [], [])
+        raw_data = None
+        if all(b.raw_data is not None and not isinstance(b.raw_data, list) for b in batches):
+            import pandas as pd
+
+            raw_data = pd.concat([b.raw_data for b in batches], ignore_index=True)
+        elif all(b.raw_data is not None for b in batches):
+            raw_data = [row for b in batches for row in b.raw_rows()]
+        return cls(
+            dates=np.concatenate([b.dates for b in batches]),
+            amounts=np.concatenate([b.amounts for b in batches]),
+            descriptions=np.concatenate([b.descriptions for b in batches]),
+            counterparties=np.concatenate([b.counterparties for b in batches]),
+            raw_data=raw_data,
+            **{
+                name: _concat_categoricals([b.categoricals[name] for b in batches])
+                for name in CATEGORICAL_FIELDS
+            }
+        )
+
+    @property
+    def days(self) -> np.ndarray:
+        """Dates as int64 proleptic ordinals, comparable with datetime.toordinal()"""
+        return to_day_ordinals(self.dates)
+
+    def column(self, name: str) -> np.ndarray:
+        """Decode a categorical column into an object array of strings"""
+        codes, categories = self.categoricals[name]
+        return categories[codes]
+
+    def raw_rows(self) -> List[Optional[Dict[str, Any]]]:
+        if self.raw_data is None:
+            return [None] * len(self)
+        if isinstance(self.raw_data, list):
+            return self.raw_data
+        return self.raw_data.to_dict('records')
+
+    def take(self, indices: Any) -> 'TransactionBatch':
+        """Select rows by integer positions or a boolean mask"""
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        raw_data = self.raw_data
+        if isinstance(raw_data, list):
+            raw_data = [raw_data[i] for i in indices.tolist()]
+        elif raw_data is not None:
+            raw_data = raw_data.iloc[indices]
+        return TransactionBatch(
+            dates=self.dates[indices],
+            amounts=self.amounts[indices],
+            descriptions=self.descriptions[indices],
+            counterparties=self.counterparties[indices],
+            raw_data=raw_data,
+            **{
+                name: (codes[indices], categories)
+                for name, (codes, categories) in self.categoricals.items()
+            }
+        )
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    @overload
+    def __getitem__(self, key: Union[int, np.integer]) -> Transaction: ...
+
+    @overload
+    def __getitem__(self, key: Union[slice, Sequence[int], np.ndarray]) -> 'TransactionBatch': ...
+
+    def __getitem__(self, key: Any) -> Union[Transaction, 'TransactionBatch']:
+        if isinstance(key, slice):
+            return self.take(np.arange(len(self))[key])
+        if isinstance(key, (int, np.integer)):
+            return next(iter(self.take([key])))
+        return self.take(key)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        # Column decoding, raw rows included, is the up-front cost of materialising Transactions
+        with span('batch.decode', rows=len(self)):
+            columns = [
+                self.dates.astype(datetime).tolist(),
+                self.descriptions.tolist(),
+                self.amounts.tolist(),
+                *(self.column(name).tolist() for name in CATEGORICAL_FIELDS),
+                self.counterparties.tolist(),
+                self.raw_rows()
+            ]
+        for date, description, amount, category, transaction_type, account_id, bank_name, counterparty, raw in zip(*columns):
+            yield Transaction(
+                date=date,
+                description=description,
+                amount_milliunits=amount,
+                category=category,
+                transaction_type=transaction_type,
+                account_id=account_id,
+                bank_name=bank_name,
+                counterparty=counterparty,
+                raw_data=raw
+            )
+
+    def to_pandas(self):
+        """
+        Return a DataFrame view of the batch. The date and milliunit columns
+        share memory with the batch; text columns become pandas categoricals
+        over the existing codes.
+        """
+        import pandas as pd
+
+        data = {
+            'date': self.dates,
+            'description': self.descriptions,
+            'amount': self.amounts / MILLIUNITS,
+            'amount_milliunits': self.amounts,
+            'counterparty': self.counterparties,
+        }
+        for name, (codes, categories) in self.categoricals.items():
+            data[name] = pd.Categorical.from_codes(codes, categories=categories)
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        """Return a pyarrow Table; numeric columns are wrapped without copying"""
+        import pyarrow as pa
+
+        columns = {
+            'date': pa.array(self.dates),
+            'description': pa.array(self.descriptions, type=pa.string()),
+            'amount_milliunits': pa.array(self.amounts),
+            'counterparty': pa.array(self.counterparties, type=pa.string()),
+        }
+        for name, (codes, categories) in self.categoricals.items():
+            columns[name] = pa.DictionaryArray.from_arrays(
+                pa.array(codes), pa.array(categories, type=pa.string())
+            )
+        return pa.table(columns)
+
+
+@dataclass
+class TransactionFilter:
+    """
+    Row predicates pushed down into adapters. Dates are inclusive calendar
+    days; amounts are signed and compared in milliunits.
+    """
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    min_amount: Optional[Amount] = None
+    max_amount: Optional[Amount] = None
+    account_ids: Optional[Collection[str]] = None
+
+    def mask(self, days: np.ndarray, amounts: np.ndarray, account_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Boolean mask over day ordinals, milliunit amounts and account ids"""
+        keep = np.ones(len(days), dtype=bool)
+        if self.start_date is not None:
+            keep &= days >= self.start_date.toordinal()
+        if self.end_date is not None:
+            keep &= days <= self.end_date.toordinal()
+        if self.min_amount is not None:
+            keep &= amounts >= to_milliunits(self.min_amount)
+        if self.max_amount is not None:
+            keep &= amounts <= to_milliunits(self.max_amount)
+        if self.account_ids is not None and account_ids is not None:
+            keep &= np.isin(account_ids, list(self.account_ids))
+        return keep
+
+    def apply(self, batch: 'TransactionBatch') -> 'TransactionBatch':
+        with span('filter', rows=len(batch)):
+            keep = self.mask(batch.days, batch.amounts, batch.column('account_id'))
+            return batch if keep.all() else batch.take(keep)
+
+
 class DataSourceAdapter(ABC):
+    DEFAULT_CHUNKSIZE = 50_000
+
     @abstractmethod
-    def load_transactions(self) -> List[Transaction]:
-        """Load transactions from the data source"""
+    def load_transactions(self, filters: Optional[TransactionFilter] = None) -> List[Transaction]:
+        """Load transactions from the data source, applying `filters` as early as possible"""
         pass
 
+    def load_batch(self, filters: Optional[TransactionFilter] = None) -> TransactionBatch:
+        """
+        Load transactions as a columnar batch. Adapters that can build the
+        columns directly should override this to skip per-row objects.
+        """
+        return TransactionBatch.from_transactions(self.load_transactions(filters))
+
+    def iter_transactions(
+        self,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        filters: Optional[TransactionFilter] = None
+    ) -> Iterator[TransactionBatch]:
+        """
+        Yield transactions lazily in batches of at most `chunksize`.
+        Sources that can stream should override this; the default loads
+        everything and slices it.
+        """
+        batch = self.load_batch(filters)
+        for start in range(0, len(batch), chunksize):
+            yield batch[start:start + chunksize]
+
     @abstractmethod
     def get_source_type(self) -> str:
         """Return the type of data source"""
-        pass
\ No newline at end of file
+        pass
@@ -1,5 +1,20 @@
 from .base_csv import BaseCSVAdapter
-from .lhv_csv import LHVCSVAdapter
-from .mapping import get_csv_adapter
+from .cache import StatementCache
+from .mapping import (BANK_NAMES, bank_names, detect_csv_adapter,
+                      get_csv_adapter, refresh_adapters, register_adapter)
+from .spec import BankSpec, SpecCSVAdapter, compile_spec, load_bank_specs
 
-__all__ = ['BaseCSVAdapter', 'LHVCSVAdapter', 'get_csv_adapter']
\ No newline at end of file
+__all__ = [
+    'BANK_NAMES',
+    'BankSpec',
+    'BaseCSVAdapter',
+    'SpecCSVAdapter',
+    'StatementCache',
+    'bank_names',
+    'compile_spec',
+    'detect_csv_adapter',
+    'get_csv_adapter',
+    'load_bank_specs',
+    'refresh_adapters',
+    'register_adapter',
+]
@@ -1,16 +1,62 @@
+import csv
+import hashlib
+import io
+import os
 from abc import abstractmethod
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import (Any, BinaryIO, Dict, Iterator, List, Optional, Sequence,
+                    Union)
 
+import numpy as np
 import pandas as pd
 
-from ..base import DataSourceAdapter, Transaction
+from ...money import Amount, to_milliunits
+from ...tracing import span
+from ..base import (DataSourceAdapter, Transaction, TransactionBatch,
+                    TransactionFilter, to_day_ordinals)
+from .cache import StatementCache
+
+# A path on disk, the raw bytes of an upload, or a binary file-like object
+CSVSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+
+def read_source(source: CSVSource) -> Union[str, bytes]:
+    """
+    Normalise a CSV source to a path or an immutable bytes buffer.
+    File-like objects are read once; paths are left for pandas to open.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    data = source.read()
+    return data.encode('utf-8') if isinstance(data, str) else data
+
+
+# Columns added by `_parse_frame`; everything else is the raw, renamed CSV row
+PARSED_COLUMNS = ['_date', '_amount', '_error']
 
 
 class BaseCSVAdapter(DataSourceAdapter):
-    def __init__(self, file_path: str):
-        self.file_path = file_path
+    # Bump when parsing changes so statements in the parse cache are parsed again
+    VERSION = 2
+
+    # File conventions, declared up front so the adapter registry can pick the
+    # adapter (and variant, e.g. export language) from one sniff of the header
+    HEADER_SIGNATURES: Dict[str, Sequence[str]] = {}  # variant -> columns that identify it
+    DELIMITER = ','
+    ENCODING = 'utf-8'
+    DECIMAL = '.'
+    CURRENCY: Optional[str] = None  # ISO code; amounts are rounded to its minor unit
+
+    def __init__(self, source: CSVSource, cache: Optional[StatementCache] = None, variant: Optional[str] = None):
+        self.source = read_source(source)
+        self.cache = cache
+        self.variant = variant if variant is not None else self._detect_variant()
         self.column_mapping: Dict[str, str] = self._get_column_mapping()
+        self.errors: pd.DataFrame = pd.DataFrame()
         
     @abstractmethod
     def _get_column_mapping(self) -> Dict[str, str]:
@@ -21,8 +67,8 @@ class BaseCSVAdapter(DataSourceAdapter):
         pass
 
     @abstractmethod
-    def _preprocess_amount(self, amount: Any) -> float:
-        """Handle bank-specific amount formatting"""
+    def _preprocess_amount(self, amount: Any) -> Amount:
+        """Handle bank-specific amount formatting; return a Decimal or decimal string, not a float"""
         pass
 
     @abstractmethod
@@ -30,34 +76,234 @@ class BaseCSVAdapter(DataSourceAdapter):
         """Handle bank-specific date formatting"""
         pass
 
-    def load_transactions(self) -> List[Transaction]:
-        df = pd.read_csv(self.file_path)
-        
-        # Rename columns based on mapping
-        df = df.rename(columns={v: k for k, v in self.column_mapping.items()})
-        
-        transactions = []
+    def _parse_dates(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Parse the whole 'date' column at once. Unparseable values become NaT.
+        Falls back to `_parse_date` per row; override with a vectorized
+        transform (e.g. `pd.to_datetime` with a fixed format) where possible.
+        """
+        def parse(value):
+            try:
+                return self._parse_date(value)
+            except (TypeError, ValueError):
+                return pd.NaT
+
+        return pd.to_datetime(df['date'].map(parse), errors='coerce')
+
+    def _preprocess_amounts(self, df: pd.DataFrame) -> pd.Series:
+        """
+        Parse the whole 'amount' column at once into nullable Int64 milliunits.
+        Unparseable values become <NA>. Falls back to `_preprocess_amount` per
+        row; override with a vectorized transform (see `money.parse_milliunits`)
+        where possible.
+        """
+        amounts: List[Optional[int]] = []
         for _, row in df.iterrows():
             try:
                 self._current_row = row  # Store current row for processing context
-                transaction = Transaction(
-                    date=self._parse_date(row['date']),
-                    description=str(row['description']),
-                    amount=self._preprocess_amount(row['amount']),
-                    category=str(row.get('category', '')),
-                    transaction_type=str(row.get('transaction_type', '')),
-                    account_id=str(row.get('account_id', '')),
-                    bank_name=self.get_bank_name(),
-                    raw_data=row.to_dict()
-                )
-                transactions.append(transaction)
-            except Exception as e:
-                # Log error and continue
-                print(f"Error processing row: {row}, Error: {e}")
+                amounts.append(to_milliunits(self._preprocess_amount(row['amount'])))
+            except (TypeError, ValueError, KeyError, ArithmeticError):
+                amounts.append(None)
             finally:
                 self._current_row = None  # Clear the context
-                
-        return transactions
+        return pd.Series(amounts, index=df.index, dtype='Int64')
+
+    def _parse_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Parse dates and amounts of a renamed frame into '_date' and '_amount'
+        (milliunits) columns. Rows that fail get a message in '_error'.
+        """
+        with span('csv.parse', rows=len(df)):
+            return self._parse_columns(df)
+
+    def _parse_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        dates = self._parse_dates(df)
+        amounts = self._preprocess_amounts(df)
+
+        bad_date = dates.isna()
+        bad_amount = amounts.isna()
+        error = pd.Series(None, index=df.index, dtype=object)
+        error[bad_date] = "invalid date"
+        error[bad_amount & ~bad_date] = "invalid amount"
+        error[bad_amount & bad_date] = "invalid date and amount"
+
+        return df.assign(
+            _date=dates,
+            _amount=amounts.fillna(0).astype(np.int64),
+            _error=error
+        )
+
+    def _batch_from_parsed(self, parsed: pd.DataFrame, filters: Optional[TransactionFilter] = None) -> TransactionBatch:
+        """
+        Build a columnar batch from a parsed frame, collecting bad rows in
+        `self.errors`. Filtered-out rows are dropped before the text columns
+        are materialised.
+        """
+        if filters is not None and filters.account_ids is not None and 'account_id' in parsed:
+            parsed = parsed[parsed['account_id'].astype(str).isin(list(filters.account_ids))]
+
+        bad = parsed['_error'].notna()
+        if bad.any():
+            errors = parsed[bad].drop(columns=PARSED_COLUMNS, errors='ignore')
+            errors['error'] = parsed.loc[bad, '_error']
+            self.errors = pd.concat([self.errors, errors])
+            parsed = parsed[~bad]
+
+        dates = parsed['_date'].to_numpy(dtype='datetime64[s]')
+        amounts = parsed['_amount'].to_numpy(dtype=np.int64)
+        df = parsed.drop(columns=PARSED_COLUMNS, errors='ignore')
+        if filters is not None:
+            keep = filters.mask(to_day_ordinals(dates), amounts)
+            if not keep.all():
+                df, dates, amounts = df[keep], dates[keep], amounts[keep]
+
+        def text_column(name: str):
+            if name not in df:
+                return ''
+            codes, categories = pd.factorize(df[name].fillna('').astype(str))
+            return codes, np.asarray(categories, dtype=object)
+
+        return TransactionBatch(
+            dates=dates,
+            amounts=amounts,
+            descriptions=df['description'].fillna('').astype(str).to_numpy(dtype=object),
+            category=text_column('category'),
+            transaction_type=text_column('transaction_type'),
+            account_id=text_column('account_id'),
+            bank_name=self.get_bank_name(),
+            counterparties=(
+                df['counterparty_name'].fillna('').astype(str).to_numpy(dtype=object)
+                if 'counterparty_name' in df else None
+            ),
+            raw_data=df
+        )
+
+    def _to_batch(self, df: pd.DataFrame, filters: Optional[TransactionFilter] = None) -> TransactionBatch:
+        """Parse a renamed frame into a batch; other accounts are dropped before parsing"""
+        if filters is not None and filters.account_ids is not None and 'account_id' in df:
+            df = df[df['account_id'].astype(str).isin(list(filters.account_ids))]
+        return self._batch_from_parsed(self._parse_frame(df), filters)
+
+    @classmethod
+    def parse_header(cls, line: bytes) -> List[str]:
+        """Split a raw header line using this adapter's encoding and delimiter"""
+        text = line.decode(cls.ENCODING, errors='replace').lstrip('\ufeff')
+        return next(csv.reader([text], delimiter=cls.DELIMITER), [])
+
+    def _header_columns(self) -> List[str]:
+        """Column names from the first line of the source, without parsing the rest"""
+        if isinstance(self.source, bytes):
+            end = self.source.find(b'\n')
+            line = memoryview(self.source)[:end if end >= 0 else len(self.source)].tobytes()
+        else:
+            with open(self.source, 'rb') as f:
+                line = f.readline()
+        return self.parse_header(line)
+
+    def _detect_variant(self) -> Optional[str]:
+        """The declared variant sharing the most columns with the header; the first one on a tie"""
+        if not self.HEADER_SIGNATURES:
+            return None
+        header = set(self._header_columns())
+        return max(self.HEADER_SIGNATURES, key=lambda variant: len(header.intersection(self.HEADER_SIGNATURES[variant])))
+
+    def _open(self) -> Union[str, io.BytesIO]:
+        """Something pd.read_csv can consume; in-memory sources are never written to disk"""
+        if isinstance(self.source, bytes):
+            return io.BytesIO(self.source)  # Shares the buffer until written to
+        return self.source
+
+    def _read_options(self) -> Dict[str, Any]:
+        return {'dtype': str, 'sep': self.DELIMITER, 'encoding': self.ENCODING}
+
+    def _read_frames(self, chunksize: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Read the CSV whole or in chunks, with columns renamed to standard fields.
+        Every column is read as text so account and reference numbers keep
+        their leading zeros and rows hash the same in every statement.
+        """
+        columns = {v: k for k, v in self.column_mapping.items()}
+        if chunksize is None:
+            with span('csv.read', bytes=self._source_size()) as read_span:
+                df = pd.read_csv(self._open(), **self._read_options()).rename(columns=columns)
+                read_span.rows = len(df)
+            yield df
+            return
+        with pd.read_csv(self._open(), chunksize=chunksize, **self._read_options()) as reader:
+            for chunk in reader:
+                yield chunk.rename(columns=columns)
+
+    def _source_size(self) -> int:
+        return len(self.source) if isinstance(self.source, bytes) else os.path.getsize(self.source)
+
+    def load_transactions(self, filters: Optional[TransactionFilter] = None) -> List[Transaction]:
+        return list(self.load_batch(filters))
+
+    def _cache_namespace(self) -> str:
+        """Parse cache namespace: adapter class and version plus the statement's header"""
+        header = hashlib.sha256("\x1f".join(self._header_columns()).encode('utf-8')).hexdigest()[:16]
+        return f"{type(self).__name__}-v{self.VERSION}-{header}"
+
+    def _parsed_statement(self, cache: StatementCache) -> pd.DataFrame:
+        """The whole statement parsed, reusing the parse cache where possible"""
+        with span('csv.cache', bytes=self._source_size()) as cache_span:
+            key = cache.statement_key(self._cache_namespace(), self.source)
+            parsed = cache.load(key)
+            cache_span.annotate(hit=parsed is not None)
+        if parsed is None:
+            parsed = self._parse_frame(next(self._read_frames()))
+            cache.store(key, parsed)
+        return parsed
+
+    def load_batch(self, filters: Optional[TransactionFilter] = None) -> TransactionBatch:
+        self.errors = pd.DataFrame()
+        with span('csv.load', bank=self.get_bank_name(), bytes=self._source_size()) as load_span:
+            if self.cache is not None:
+                batch = self._batch_from_parsed(self._parsed_statement(self.cache), filters)
+            else:
+                batch = self._to_batch(next(self._read_frames()), filters)
+            load_span.rows = len(batch)
+        return batch
+
+    def iter_transactions(
+        self,
+        chunksize: int = DataSourceAdapter.DEFAULT_CHUNKSIZE,
+        filters: Optional[TransactionFilter] = None
+    ) -> Iterator[TransactionBatch]:
+        """
+        Stream the CSV in chunks; only one chunk's DataFrame is held at a time.
+        With a parse cache a hit streams the cached statement in record
+        batches, and a miss parses chunk by chunk while writing the cache
+        entry, which is kept only if the statement is read to the end.
+        """
+        self.errors = pd.DataFrame()
+        if self.cache is None:
+            for df in self._read_frames(chunksize):
+                with span('csv.chunk', rows=len(df)):
+                    batch = self._to_batch(df, filters)
+                if len(batch):
+                    yield batch
+            return
+
+        with span('csv.cache', bytes=self._source_size()) as cache_span:
+            key = self.cache.statement_key(self._cache_namespace(), self.source)
+            frames = self.cache.iter_frames(key, chunksize)
+            cache_span.annotate(hit=frames is not None)
+        if frames is not None:
+            for parsed in frames:
+                with span('csv.chunk', rows=len(parsed)):
+                    batch = self._batch_from_parsed(parsed, filters)
+                if len(batch):
+                    yield batch
+            return
+        with self.cache.writer(key) as writer:
+            for df in self._read_frames(chunksize):
+                with span('csv.chunk', rows=len(df)):
+                    parsed = self._parse_frame(df)
+                    writer.write(parsed)
+                    batch = self._batch_from_parsed(parsed, filters)
+                if len(batch):
+                    yield batch
 
     @abstractmethod
     def get_bank_name(self) -> str:
@@ -65,4 +311,4 @@ class BaseCSVAdapter(DataSourceAdapter):
         pass
 
     def get_source_type(self) -> str:
-        return "CSV"
\ No newline at end of file
+        return "CSV"
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STATEMENT_CACHE_PATH = Path("data/cache/statements")
+DEFAULT_STATEMENT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def _to_pandas(table) -> pd.DataFrame:
+    """Arrow table to pandas with missing text as NaN, as read_csv gives it, so a cache hit matches a fresh parse"""
+    frame = table.to_pandas()
+    for name in table.column_names:
+        column = table.column(name)
+        if column.null_count and frame[name].dtype == object:
+            values = frame[name].to_numpy()
+            values[column.is_null().to_numpy(zero_copy_only=False)] = np.nan
+            frame[name] = values
+    return frame
+
+
+def _schema(frame: pd.DataFrame):
+    """Arrow schema of a parsed frame; columns empty in this frame are typed as the text they hold elsewhere"""
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(frame, preserve_index=False)
+    for i, column in enumerate(schema):
+        if pa.types.is_null(column.type):
+            schema = schema.set(i, column.with_type(pa.string()))
+    return schema
+
+
+class StatementWriter:
+    """
+    Writes a parsed statement frame by frame to a temporary file, which is
+    moved into the cache only when the `with` block finishes without an
+    error; a statement read halfway is never cached.
+    """
+
+    def __init__(self, cache: 'StatementCache', name: str):
+        self.cache = cache
+        self.name = name
+        self.temp = cache.path / f".{name}.{uuid.uuid4().hex}.tmp"
+        # pyarrow objects, created with the first frame
+        self._sink: Any = None
+        self._writer: Any = None
+        self._schema: Any = None
+
+    def write(self, frame: pd.DataFrame):
+        import pyarrow as pa
+
+        if self._writer is None:
+            self._schema = _schema(frame)
+            self._sink = pa.OSFile(str(self.temp), 'wb')
+            self._writer = pa.ipc.new_file(self._sink, self._schema)
+        self._writer.write_table(pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False))
+
+    def __enter__(self) -> 'StatementWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._writer is not None:
+            self._writer.close()
+            self._sink.close()
+            # Renamed into place so concurrent readers never see a partial file
+            if exc_type is None:
+                os.replace(self.temp, self.cache._file(self.name))
+                self.cache._evict(keep=self.cache._file(self.name))
+        self.temp.unlink(missing_ok=True)
+
+
+class StatementCache:
+    """
+    On-disk cache of parsed bank statements stored as Arrow IPC files.
+
+    Whole statements are keyed by the SHA-256 of their bytes plus the adapter
+    namespace (class, version and header), so re-uploading a file skips
+    parsing. Files are evicted least recently used once the cache grows past
+    `max_bytes`.
+    """
+
+    def __init__(self, path: Path = DEFAULT_STATEMENT_CACHE_PATH, max_bytes: int = DEFAULT_STATEMENT_CACHE_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def statement_key(namespace: str, source: Union[bytes, str, Path]) -> str:
+        """Namespace plus the SHA-256 of the statement's bytes; files are hashed in blocks"""
+        digest = hashlib.sha256()
+        if isinstance(source, bytes):
+            digest.update(source)
+        else:
+            with open(source, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+        return f"{namespace}-{digest.hexdigest()}"
+
+    def _file(self, name: str) -> Path:
+        return self.path / f"{name}.arrow"
+
+    def _read(self, name: str) -> Optional[pd.DataFrame]:
+        import pyarrow as pa
+
+        path = self._file(name)
+        try:
+            with pa.memory_map(str(path)) as source:
+                frame = _to_pandas(pa.ipc.open_file(source).read_all())
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        os.utime(path)  # Mark as recently used for eviction
+        return frame
+
+    def _evict(self, keep: Path):
+        files = []
+        for path in self.path.glob('*.arrow'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        """A previously parsed statement, or None"""
+        return self._read(key)
+
+    def iter_frames(self, key: str, chunksize: int) -> Optional[Iterator[pd.DataFrame]]:
+        """
+        A previously parsed statement as frames of at most `chunksize` rows,
+        read lazily from the memory-mapped file, or None
+        """
+        import pyarrow as pa
+
+        path = self._file(key)
+        try:
+            source = pa.memory_map(str(path))
+        except FileNotFoundError:
+            return None
+        try:
+            reader = pa.ipc.open_file(source)
+        except pa.ArrowInvalid:
+            source.close()
+            return None
+        os.utime(path)
+
+        def frames() -> Iterator[pd.DataFrame]:
+            with source:
+                for i in range(reader.num_record_batches):
+                    record_batch = reader.get_batch(i)
+                    for start in range(0, record_batch.num_rows, chunksize):
+                        yield _to_pandas(pa.Table.from_batches([record_batch.slice(start, chunksize)]))
+        return frames()
+
+    def writer(self, key: str) -> StatementWriter:
+        """Cache a statement written frame by frame; see StatementWriter"""
+        return StatementWriter(self, key)
+
+    def store(self, key: str, parsed: pd.DataFrame):
+        with self.writer(key) as writer:
+            writer.write(parsed)
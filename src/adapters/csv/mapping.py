@@ -1,15 +1,119 @@
-from typing import Dict, Type
+import threading
+from typing import Dict, List, Optional, Tuple, Type, Union
 
-from .base_csv import BaseCSVAdapter
-from .lhv_csv import LHVCSVAdapter
+from .base_csv import BaseCSVAdapter, CSVSource, read_source
+from .cache import StatementCache
+from .spec import BankSpec, compile_spec, load_bank_specs
 
-BANK_ADAPTER_MAPPING: Dict[str, Type[BaseCSVAdapter]] = {
-    'lhv': LHVCSVAdapter,
-    # Add other banks here
-}
+# Bytes read from the head of a file to detect its format
+SNIFF_BYTES = 4096
 
-def get_csv_adapter(bank_name: str, file_path: str) -> BaseCSVAdapter:
-    adapter_class = BANK_ADAPTER_MAPPING.get(bank_name.lower())
-    if not adapter_class:
+AUTO_DETECT = 'auto'
+
+BANK_ADAPTER_MAPPING: Dict[str, Type[BaseCSVAdapter]] = {}
+BANK_NAMES: List[str] = []
+
+# Normalised header column -> (adapter, variant, signature) entries that contain it
+_SIGNATURE_INDEX: Dict[str, List[Tuple[Type[BaseCSVAdapter], str, frozenset]]] = {}
+
+# Adapters written in Python, kept when the registry is rebuilt from banks.yaml
+_REGISTERED: Dict[str, Type[BaseCSVAdapter]] = {}
+# The specs the registry was last built from; load_bank_specs returns the same dict until banks.yaml is modified
+_specs: Optional[Dict[str, BankSpec]] = None
+_registry_lock = threading.Lock()
+
+
+def _normalize(column: str) -> str:
+    return column.strip().casefold()
+
+
+def _add(bank_name: str, adapter_class: Type[BaseCSVAdapter]):
+    BANK_ADAPTER_MAPPING[bank_name.lower()] = adapter_class
+    if bank_name not in BANK_NAMES:
+        BANK_NAMES.append(bank_name)
+    for variant, columns in adapter_class.HEADER_SIGNATURES.items():
+        signature = frozenset(_normalize(c) for c in columns)
+        for column in signature:
+            _SIGNATURE_INDEX.setdefault(column, []).append((adapter_class, variant, signature))
+
+
+def register_adapter(bank_name: str, adapter_class: Type[BaseCSVAdapter]):
+    """Make an adapter selectable by name and detectable by its header signatures"""
+    with _registry_lock:
+        _REGISTERED[bank_name] = adapter_class
+        _add(bank_name, adapter_class)
+
+
+def refresh_adapters():
+    """Rebuild the registry from banks.yaml if the file changed since it was last read"""
+    global _specs
+    with _registry_lock:
+        specs = load_bank_specs()
+        if specs is _specs or specs == _specs:
+            return
+        _specs = specs
+        BANK_ADAPTER_MAPPING.clear()
+        BANK_NAMES.clear()
+        _SIGNATURE_INDEX.clear()
+        for spec in specs.values():
+            _add(spec.name, compile_spec(spec))
+        for bank_name, adapter_class in _REGISTERED.items():
+            _add(bank_name, adapter_class)
+
+
+def bank_names() -> List[str]:
+    """Names of the registered banks, with banks.yaml re-read if it changed"""
+    refresh_adapters()
+    return list(BANK_NAMES)
+
+
+refresh_adapters()
+
+
+def _sniff_head(source: Union[str, bytes]) -> bytes:
+    if isinstance(source, bytes):
+        return memoryview(source)[:SNIFF_BYTES].tobytes()
+    with open(source, 'rb') as f:
+        return f.read(SNIFF_BYTES)
+
+
+def detect_csv_adapter(source: CSVSource) -> Tuple[Type[BaseCSVAdapter], str]:
+    """
+    Pick the adapter and variant for a file from its header line. The header
+    is split once per registered encoding/delimiter convention and looked up
+    in the signature index; the most specific fully matching signature wins.
+    """
+    refresh_adapters()
+    head = _sniff_head(read_source(source))
+    line = head.split(b'\n', 1)[0]
+
+    conventions = {(c.ENCODING, c.DELIMITER): c for c in BANK_ADAPTER_MAPPING.values()}
+    best = None
+    for adapter_class in conventions.values():
+        header = {_normalize(c) for c in adapter_class.parse_header(line)}
+        for column in header:
+            for candidate, variant, signature in _SIGNATURE_INDEX.get(column, ()):
+                if (candidate.ENCODING, candidate.DELIMITER) != (adapter_class.ENCODING, adapter_class.DELIMITER):
+                    continue
+                if signature <= header and (best is None or len(signature) > len(best[2])):
+                    best = (candidate, variant, signature)
+    if best is None:
+        raise ValueError("Could not detect the bank from the CSV header")
+    return best[0], best[1]
+
+
+def get_csv_adapter(
+    bank_name: Optional[str],
+    source: CSVSource,
+    cache: Optional[StatementCache] = None
+) -> BaseCSVAdapter:
+    """Adapter for a bank by name, or detected from the header when `bank_name` is None or 'auto'"""
+    source = read_source(source)
+    if bank_name is None or bank_name.lower() == AUTO_DETECT:
+        adapter_class, variant = detect_csv_adapter(source)
+        return adapter_class(source, cache, variant)
+
+    refresh_adapters()
+    if bank_name.lower() not in BANK_ADAPTER_MAPPING:
         raise ValueError(f"No adapter found for bank: {bank_name}")
-    return adapter_class(file_path) 
\ No newline at end of file
+    return BANK_ADAPTER_MAPPING[bank_name.lower()](source, cache)
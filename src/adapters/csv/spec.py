@@ -0,0 +1,159 @@
+import hashlib
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import pandas as pd
+import yaml
+
+from ...money import parse_milliunits
+from .base_csv import BaseCSVAdapter
+
+# banks.yaml lives next to config.yaml in the repository root
+DEFAULT_BANKS_PATH = Path(__file__).resolve().parents[3] / "banks.yaml"
+
+REQUIRED_FIELDS = ('date', 'description', 'amount')
+OPTIONAL_FIELDS = (
+    'account_id', 'transaction_type', 'category', 'counterparty_name', 'counterparty_account', 'reference'
+)
+DEFAULT_VARIANT = 'default'
+
+
+@dataclass
+class BankSpec:
+    """Declarative description of one bank's CSV export format"""
+    name: str
+    columns: Dict[str, Dict[str, str]]  # variant -> standard field -> CSV header
+    date_format: str
+    encoding: str = 'utf-8'
+    delimiter: str = ','
+    decimal: str = '.'
+    thousands: Optional[str] = None
+    currency: Optional[str] = None  # ISO code; amounts are rounded to its minor unit
+    sign_column: Optional[str] = None  # Standard field whose value marks debits
+    debit_values: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, name: str, settings: Dict[str, Any]) -> 'BankSpec':
+        columns = settings.get('columns') or {}
+        if columns and all(isinstance(v, str) for v in columns.values()):
+            columns = {DEFAULT_VARIANT: columns}  # Single-variant shorthand
+        if not columns:
+            raise ValueError(f"Bank spec '{name}' has no columns")
+        for variant, mapping in columns.items():
+            missing = [f for f in REQUIRED_FIELDS if f not in mapping]
+            unknown = [f for f in mapping if f not in REQUIRED_FIELDS + OPTIONAL_FIELDS]
+            if missing or unknown:
+                raise ValueError(
+                    f"Bank spec '{name}' variant '{variant}': missing {missing or 'none'}, unknown {unknown or 'none'}"
+                )
+        if 'date_format' not in settings:
+            raise ValueError(f"Bank spec '{name}' has no date_format")
+
+        sign = settings.get('sign') or {}
+        debit = sign.get('debit', [])
+        return cls(
+            name=name,
+            columns={str(v): {f: str(c) for f, c in m.items()} for v, m in columns.items()},
+            date_format=settings['date_format'],
+            encoding=settings.get('encoding', 'utf-8'),
+            delimiter=settings.get('delimiter', ','),
+            decimal=settings.get('decimal', '.'),
+            thousands=settings.get('thousands'),
+            currency=settings.get('currency'),
+            sign_column=sign.get('column'),
+            debit_values=[str(v) for v in (debit if isinstance(debit, list) else [debit])]
+        )
+
+    @property
+    def digest(self) -> str:
+        """Stable hash of the spec; changes whenever parsing would"""
+        return hashlib.sha256(json.dumps(asdict(self), sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class SpecCSVAdapter(BaseCSVAdapter):
+    """CSV adapter driven by a BankSpec; use `compile_spec` to get one per bank"""
+    SPEC: BankSpec
+
+    def _get_column_mapping(self) -> Dict[str, str]:
+        return dict(self.SPEC.columns[self.variant or DEFAULT_VARIANT])
+
+    def _cache_namespace(self) -> str:
+        return f"{super()._cache_namespace()}-{self.SPEC.digest}"
+
+    def _amount_text(self, values: pd.Series) -> pd.Series:
+        values = values.astype(str).str.strip()
+        if self.SPEC.thousands:
+            values = values.str.replace(self.SPEC.thousands, '', regex=False)
+        if self.DECIMAL != '.':
+            values = values.str.replace(self.DECIMAL, '.', regex=False)
+        return values
+
+    def _parse_dates(self, df: pd.DataFrame) -> pd.Series:
+        return pd.to_datetime(df['date'], format=self.SPEC.date_format, errors='coerce')
+
+    def _preprocess_amounts(self, df: pd.DataFrame) -> pd.Series:
+        amounts = parse_milliunits(self._amount_text(df['amount']), self.CURRENCY)
+        if self.SPEC.sign_column and self.SPEC.sign_column in df:
+            amounts = amounts.where(~df[self.SPEC.sign_column].isin(self.SPEC.debit_values), -amounts.abs())
+        return amounts
+
+    def _preprocess_amount(self, amount: Any) -> Decimal:
+        value = Decimal(self._amount_text(pd.Series([amount])).iloc[0])
+        row = self._current_row
+        if self.SPEC.sign_column and row is not None and row.get(self.SPEC.sign_column) in self.SPEC.debit_values:
+            value = -abs(value)
+        return value
+
+    def _parse_date(self, date_str: str) -> datetime:
+        return datetime.strptime(date_str, self.SPEC.date_format)
+
+    def get_bank_name(self) -> str:
+        return self.SPEC.name
+
+
+_COMPILED: Dict[str, Type[SpecCSVAdapter]] = {}
+
+
+def compile_spec(spec: BankSpec) -> Type[SpecCSVAdapter]:
+    """
+    Build (once per distinct spec) an adapter class whose conventions and
+    header signatures come from the spec; parsing runs on the vectorized path.
+    """
+    key = f"{spec.name}-{spec.digest}"
+    if key not in _COMPILED:
+        class_name = re.sub(r'\W', '', spec.name) + 'CSVAdapter'
+        _COMPILED[key] = type(class_name, (SpecCSVAdapter,), {
+            'SPEC': spec,
+            'HEADER_SIGNATURES': {variant: tuple(mapping.values()) for variant, mapping in spec.columns.items()},
+            'DELIMITER': spec.delimiter,
+            'ENCODING': spec.encoding,
+            'DECIMAL': spec.decimal,
+            'CURRENCY': spec.currency,
+            '__module__': __name__,
+        })
+    return _COMPILED[key]
+
+
+_LOADED: Dict[Path, Tuple[int, Dict[str, BankSpec]]] = {}
+
+
+def load_bank_specs(path: Path = DEFAULT_BANKS_PATH) -> Dict[str, BankSpec]:
+    """Bank specs by name; the file is re-read only when it changes"""
+    path = Path(path)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _LOADED.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, encoding='utf-8') as f:
+            settings = yaml.safe_load(f) or {}
+        cached = _LOADED[path] = (mtime, {
+            str(name): BankSpec.from_dict(str(name), bank or {}) for name, bank in settings.items()
+        })
+    return cached[1]
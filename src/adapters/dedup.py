@@ -0,0 +1,306 @@
+"""
+Duplicate and overlap detection before matching.
+
+Bank statements: consecutive exports overlap, so the same row can arrive
+once per statement. Rows are fingerprinted by (account, date, amount,
+reference, counterparty) plus their occurrence number within their own
+statement, so two equal coffees on one day stay two rows while the same two
+coffees in an overlapping export collapse. Rows of a later statement whose
+only difference is a date shift of up to `tolerance_days` (booking vs. value
+date) collapse as near duplicates, but only on days both statements cover:
+consecutive exports that do not overlap never lose a row to a near match.
+Rows are never compared with rows of their own statement.
+
+YNAB: transactions are fingerprinted by (account, import_id), or by id when
+they were entered by hand. A hand-entered transaction with the same account,
+amount and payee (payee id, or payee/description text) as an imported one
+within `tolerance_days` is a near duplicate; two same-amount purchases from
+different payees on adjacent days are both kept.
+
+Both run in linear time with dict lookups; nothing is compared pairwise.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ..tracing import span
+from .base import Transaction, TransactionBatch
+
+EXACT = 'exact'
+NEAR = 'near'
+
+# Raw (renamed) CSV columns that take part in the statement fingerprint
+RAW_KEY_FIELDS = ('reference',)
+
+
+def _raw_column(batch: TransactionBatch, name: str) -> List[str]:
+    """A raw column as strings; '' where the source has no such field"""
+    raw = batch.raw_data
+    if raw is None:
+        return [''] * len(batch)
+    if isinstance(raw, list):
+        return [str((row or {}).get(name) or '') for row in raw]
+    if name not in raw:
+        return [''] * len(batch)
+    return raw[name].fillna('').astype(str).tolist()
+
+
+@dataclass
+class Deduplicated:
+    """Unique rows plus the collapsed duplicates, reported by kind"""
+    batch: TransactionBatch
+    # Collapsed rows with the position in `batch` of the row each one repeats
+    exact: TransactionBatch
+    exact_of: np.ndarray
+    near: TransactionBatch
+    near_of: np.ndarray
+
+    @property
+    def duplicates(self) -> int:
+        return len(self.exact) + len(self.near)
+
+    def pairs(self) -> Iterable[Tuple[str, Transaction, Transaction]]:
+        """(kind, kept, duplicate) for every collapsed row"""
+        for kind, rows, kept in ((EXACT, self.exact, self.exact_of), (NEAR, self.near, self.near_of)):
+            kept_rows = self.batch.take(kept)
+            for original, duplicate in zip(kept_rows, rows):
+                yield kind, original, duplicate
+
+    def to_pandas(self):
+        """One row per collapsed duplicate, next to the row that was kept"""
+        import pandas as pd
+
+        return pd.DataFrame([
+            {
+                'duplicate': kind,
+                'date': duplicate.date,
+                'amount': duplicate.amount,
+                'description': duplicate.description,
+                'account_id': duplicate.account_id,
+                'kept_date': original.date,
+                'kept_description': original.description,
+            }
+            for kind, original, duplicate in self.pairs()
+        ], columns=['duplicate', 'date', 'amount', 'description', 'account_id', 'kept_date', 'kept_description'])
+
+
+@dataclass
+class _Statement:
+    occurrences: Dict[int, int] = field(default_factory=dict)
+    # Kept positions this statement contributed or already repeats; none of them can be claimed again
+    covered: Set[int] = field(default_factory=set)
+    # Day ordinals of the statement's first and last row seen so far
+    first_day: int = 0
+    last_day: int = -1
+
+    def covers(self, day: int) -> bool:
+        return self.first_day <= day <= self.last_day
+
+
+class StatementMerger:
+    """
+    Merge bank statements into one deduplicated stream.
+
+    Feed each statement (in one or several chunks, tagged with the same
+    `source`) to `add`, which returns only its new rows; `result` gives the
+    merged batch and the duplicates that were collapsed.
+    """
+
+    def __init__(self, tolerance_days: int = 1):
+        self.tolerance_days = tolerance_days
+        self._kept: List[TransactionBatch] = []
+        self._size = 0
+        # Keys are interned as small ints; a key id stands for (near key id, day)
+        self._key_ids: Dict[Tuple, int] = {}
+        self._near_key_ids: Dict[Tuple, int] = {}
+        # Key id -> kept positions in order, so the n-th occurrence of a key repeats positions[n - 1]
+        self._positions: Dict[int, List[int]] = {}
+        self._owners: List[_Statement] = []  # kept position -> statement it came from
+        self._statements: Dict[Hashable, _Statement] = {}
+        self._dropped: Dict[str, List[TransactionBatch]] = {EXACT: [], NEAR: []}
+        self._dropped_of: Dict[str, List[int]] = {EXACT: [], NEAR: []}
+
+    def add(self, batch: TransactionBatch, source: Hashable = None) -> TransactionBatch:
+        """Add a statement (or the next chunk of `source`) and return its rows not seen before"""
+        source = len(self._statements) if source is None else source
+        statement = self._statements.setdefault(source, _Statement())
+        with span('dedup.statements', rows=len(batch)) as dedup_span:
+            keys, near_keys, days = self._keys(batch)
+            if days:
+                first, last = min(days), max(days)
+                if statement.first_day > statement.last_day:
+                    statement.first_day, statement.last_day = first, last
+                else:
+                    statement.first_day = min(statement.first_day, first)
+                    statement.last_day = max(statement.last_day, last)
+            keep, exact, near = self._classify(keys, near_keys, days, statement)
+            for kind, found in ((EXACT, exact), (NEAR, near)):
+                if found:
+                    self._dropped[kind].append(batch.take(np.array([row for row, _ in found], dtype=np.int64)))
+                    self._dropped_of[kind].extend(kept for _, kept in found)
+            self._index([keys[row] for row in keep], statement)
+            unique = batch.take(np.array(keep, dtype=np.int64)) if len(keep) < len(batch) else batch
+            self._kept.append(unique)
+            dedup_span.annotate(exact=len(exact), near=len(near))
+        return unique
+
+    def _keys(self, batch: TransactionBatch) -> Tuple[List[int], List[int], List[int]]:
+        """Exact key ids, near key ids (the exact key without the date) and day ordinals per row"""
+        days = batch.days.tolist()
+        near_rows = zip(
+            batch.column('account_id').tolist(),
+            batch.amounts.tolist(),
+            *(_raw_column(batch, name) for name in RAW_KEY_FIELDS),
+            [c.strip().casefold() for c in batch.counterparties.tolist()]
+        )
+        near_ids = self._near_key_ids
+        near_keys = [near_ids.setdefault(key, len(near_ids)) for key in near_rows]
+        key_ids = self._key_ids
+        keys = [key_ids.setdefault(key, len(key_ids)) for key in zip(near_keys, days)]
+        return keys, near_keys, days
+
+    def _classify(self, keys: List[int], near_keys: List[int], days: List[int], statement: _Statement):
+        """Split rows into (new rows, exact duplicates, near duplicates); duplicates come with the kept position"""
+        positions, occurrences, covered = self._positions, statement.occurrences, statement.covered
+        exact, unmatched = [], []
+        for row, key in enumerate(keys):
+            occurrence = occurrences[key] = occurrences.get(key, 0) + 1
+            kept_rows = positions.get(key, ())
+            if len(kept_rows) >= occurrence and kept_rows[occurrence - 1] not in covered:
+                covered.add(kept_rows[occurrence - 1])
+                exact.append((row, kept_rows[occurrence - 1]))
+            else:
+                unmatched.append(row)
+
+        # Near duplicates may only take kept rows that no exact duplicate of this statement claimed
+        keep: List[int] = []
+        near: List[Tuple[int, int]] = []
+        for row in unmatched:
+            kept = self._near(near_keys[row], days[row], covered)
+            if kept is None:
+                keep.append(row)
+            else:
+                covered.add(kept)
+                near.append((row, kept))
+        return keep, exact, near
+
+    def _near(self, near_key: int, day: int, covered: Set[int]) -> Optional[int]:
+        """
+        The closest-dated kept row with the same near key, at most
+        `tolerance_days` away, from a statement that also covers `day`
+        """
+        for offset in range(1, self.tolerance_days + 1):
+            for candidate_day in (day - offset, day + offset):
+                key = self._key_ids.get((near_key, candidate_day))
+                if key is None:
+                    continue
+                for kept in self._positions.get(key, ()):
+                    if kept not in covered and self._owners[kept].covers(day):
+                        return kept
+        return None
+
+    def _index(self, keys: List[int], statement: _Statement) -> None:
+        """Append kept rows with these key ids; the statement covers them from now on"""
+        positions = self._positions
+        start = self._size
+        for position, key in enumerate(keys, start):
+            positions.setdefault(key, []).append(position)
+        self._size = start + len(keys)
+        self._owners.extend([statement] * len(keys))
+        statement.covered.update(range(start, self._size))
+
+    def result(self) -> Deduplicated:
+        def dropped(kind: str) -> Tuple[TransactionBatch, np.ndarray]:
+            rows = TransactionBatch.concat(self._dropped[kind])
+            return rows, np.array(self._dropped_of[kind], dtype=np.int64)
+
+        exact, exact_of = dropped(EXACT)
+        near, near_of = dropped(NEAR)
+        return Deduplicated(
+            batch=TransactionBatch.concat(self._kept),
+            exact=exact,
+            exact_of=exact_of,
+            near=near,
+            near_of=near_of,
+        )
+
+
+def merge_statements(statements: Iterable[TransactionBatch], tolerance_days: int = 1) -> Deduplicated:
+    """Merge whole statements, in order, into one deduplicated batch"""
+    merger = StatementMerger(tolerance_days)
+    for statement in statements:
+        merger.add(statement)
+    return merger.result()
+
+
+def dedup_ynab(batch: TransactionBatch, tolerance_days: int = 1) -> Deduplicated:
+    """
+    Collapse YNAB transactions loaded twice or imported twice (same import
+    id, or same id) and hand-entered transactions that repeat an import of
+    the same payee.
+    """
+    with span('dedup.ynab', rows=len(batch)) as dedup_span:
+        accounts = batch.column('account_id').tolist()
+        import_ids = _raw_column(batch, 'import_id')
+        ids = _raw_column(batch, 'id')
+        payee_ids = _raw_column(batch, 'payee_id')
+        texts = [' '.join((d or '').casefold().split()) for d in batch.descriptions.tolist()]
+        days = batch.days.tolist()
+        amounts = batch.amounts.tolist()
+
+        def same_payee(a: int, b: int) -> bool:
+            if payee_ids[a] and payee_ids[a] == payee_ids[b]:
+                return True
+            return bool(texts[a]) and texts[a] == texts[b]
+
+        seen: Dict[Tuple[str, str], int] = {}
+        keep: List[int] = []
+        exact: List[Tuple[int, int]] = []
+        manual: List[int] = []
+        for row, (account, import_id, transaction_id) in enumerate(zip(accounts, import_ids, ids)):
+            fingerprint = (account, import_id) if import_id else ('', transaction_id or f'#{row}')
+            first = seen.get(fingerprint)
+            if first is not None:
+                exact.append((row, first))
+                continue
+            seen[fingerprint] = row
+            (keep if import_id else manual).append(row)
+
+        # Imported rows by (account, amount, day); each absorbs at most one hand-entered row of its payee
+        imported: Dict[Tuple[str, int, int], List[int]] = {}
+        for row in keep:
+            imported.setdefault((accounts[row], amounts[row], days[row]), []).append(row)
+        offsets = sorted(range(-tolerance_days, tolerance_days + 1), key=abs)
+        near = []
+        for row in manual:
+            match = None
+            for offset in offsets:
+                candidates = imported.get((accounts[row], amounts[row], days[row] + offset))
+                if candidates:
+                    match = next((c for c in candidates if same_payee(row, c)), None)
+                    if match is not None:
+                        candidates.remove(match)
+                        break
+            if match is None:
+                keep.append(row)
+            else:
+                near.append((row, match))
+        dedup_span.annotate(exact=len(exact), near=len(near))
+
+    keep.sort()
+    position = {row: i for i, row in enumerate(keep)}
+
+    def dropped(found: List[Tuple[int, int]]) -> Tuple[TransactionBatch, np.ndarray]:
+        rows = [row for row, _ in found]
+        return batch.take(np.array(rows, dtype=np.int64)), np.array([position[kept] for _, kept in found], dtype=np.int64)
+
+    exact_rows, exact_of = dropped(exact)
+    near_rows, near_of = dropped(near)
+    return Deduplicated(
+        batch=batch.take(np.array(keep, dtype=np.int64)) if len(keep) < len(batch) else batch,
+        exact=exact_rows,
+        exact_of=exact_of,
+        near=near_rows,
+        near_of=near_of,
+    )
@@ -1,18 +1,44 @@
-from datetime import datetime
-from typing import List, Optional
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-from ...services.ynab.client import YNABAccount, YNABBudget, YNABClient
+import numpy as np
+
+from ...services.ynab.cache import TransactionCache
+from ...services.ynab.client import (YNABAccount, YNABBudget, YNABClient,
+                                     get_shared_client)
 from ...services.ynab.config import YNABConfig
-from ..base import DataSourceAdapter, Transaction
+from ...tracing import span
+from ..base import (DataSourceAdapter, Transaction, TransactionBatch,
+                    TransactionFilter)
+
+
+class AccountFetch(NamedTuple):
+    budget_id: str
+    account_id: Optional[str] = None
+    since_date: Optional[datetime] = None
 
 
 class YNABSourceAdapter(DataSourceAdapter):
-    def __init__(self, budget_id: str, account_id: Optional[str] = None, since_date: Optional[datetime] = None):
-        self.config = YNABConfig.load()
-        self.client = YNABClient(self.config)
+    def __init__(
+        self,
+        budget_id: str,
+        account_id: Optional[str] = None,
+        since_date: Optional[datetime] = None,
+        cache: Optional[TransactionCache] = None,
+        full_resync: bool = False,
+        client: Optional[YNABClient] = None
+    ):
+        if client is None:
+            client = get_shared_client(YNABConfig.load())
+        self.client = client
+        self.config = client.config
         self.budget_id = budget_id
         self.account_id = account_id
         self.since_date = since_date
+        self.cache = cache
+        self.full_resync = full_resync
     
     def get_budgets(self) -> List[YNABBudget]:
         return self.client.get_budgets()
@@ -20,28 +46,119 @@ class YNABSourceAdapter(DataSourceAdapter):
     def get_accounts(self) -> List[YNABAccount]:
         return self.client.get_accounts(self.budget_id)
     
-    def load_transactions(self) -> List[Transaction]:
-        raw_transactions = self.client.get_transactions(
-            self.budget_id,
-            self.account_id,
-            self.since_date
-        )
-        
-        transactions = []
-        for t in raw_transactions:
-            transaction = Transaction(
-                date=datetime.strptime(t['date'], '%Y-%m-%d'),
-                description=t['payee_name'] or t.get('memo', ''),
-                amount=float(t['amount']) / 1000,
-                category=t.get('category_name', ''),
-                transaction_type='outflow' if t['amount'] < 0 else 'inflow',
-                account_id=t['account_id'],
-                bank_name='YNAB',
-                raw_data=t
+    def load_transactions(self, filters: Optional[TransactionFilter] = None) -> List[Transaction]:
+        return list(self.load_batch(filters))
+    
+    def _fetch_raw(
+        self,
+        budget_id: str,
+        account_id: Optional[str],
+        since_date: Optional[datetime],
+        until_date: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        if self.cache is not None:
+            return self.cache.get_transactions(
+                self.client,
+                budget_id,
+                account_id,
+                since_date,
+                full_resync=self.full_resync,
+                until_date=until_date
             )
-            transactions.append(transaction)
+        return self.client.get_transactions(budget_id, account_id, since_date)
+    
+    def load_batch(self, filters: Optional[TransactionFilter] = None) -> TransactionBatch:
+        """
+        Load transactions, pushing the filter's start date into YNAB's
+        since_date and its end date into the cache query; the remaining
+        predicates are applied to the batch columns.
+        """
+        since_date = self.since_date
+        until_date = None
+        if filters is not None:
+            if filters.start_date is not None:
+                start = datetime.combine(filters.start_date, datetime.min.time())
+                since_date = max(since_date, start) if since_date else start
+            until_date = filters.end_date
+        
+        with span('ynab.load', budget_id=self.budget_id) as load_span:
+            batch = _to_batch(self._fetch_raw(self.budget_id, self.account_id, since_date, until_date))
+            load_span.rows = len(batch)
+        return filters.apply(batch) if filters is not None else batch
+    
+    def load_many(
+        self,
+        fetches: Sequence[Tuple[str, Optional[str], Optional[datetime]]],
+        max_workers: int = 4,
+        whole_budget_min_accounts: int = 3
+    ) -> TransactionBatch:
+        """
+        Fetch several (budget_id, account_id, since_date) selections concurrently
+        and return them as one batch; rows are tagged by their `account_id`.
+
+        Budgets with at least `whole_budget_min_accounts` requested accounts are
+        fetched with a single budget-wide /transactions call and split locally.
+        All fetches share this adapter's client, and so its rate limiter.
+        """
+        by_budget: Dict[str, List[AccountFetch]] = {}
+        for fetch in (AccountFetch(*f) for f in fetches):
+            by_budget.setdefault(fetch.budget_id, []).append(fetch)
+
+        jobs = []
+        for budget_id, budget_fetches in by_budget.items():
+            if len(budget_fetches) >= whole_budget_min_accounts and all(f.account_id for f in budget_fetches):
+                jobs.append((budget_id, budget_fetches))
+            else:
+                jobs.extend((budget_id, [fetch]) for fetch in budget_fetches)
+
+        def run(job: Tuple[str, List[AccountFetch]]) -> List[Dict[str, Any]]:
+            budget_id, job_fetches = job
+            if len(job_fetches) == 1:
+                fetch = job_fetches[0]
+                return self._fetch_raw(budget_id, fetch.account_id, fetch.since_date)
             
-        return transactions
+            earliest: Optional[datetime] = None
+            if all(f.since_date for f in job_fetches):
+                earliest = min(f.since_date for f in job_fetches if f.since_date)
+            raw_transactions = self._fetch_raw(budget_id, None, earliest)
+            
+            since_by_account = {
+                f.account_id: f.since_date.strftime('%Y-%m-%d') if f.since_date else ''
+                for f in job_fetches
+            }
+            return [
+                t for t in raw_transactions
+                if t['account_id'] in since_by_account and t['date'] >= since_by_account[t['account_id']]
+            ]
+
+        with span('ynab.load', jobs=len(jobs)) as load_span:
+            # Each job runs in its own copy of this thread's context so its requests join the active trace
+            contexts = [contextvars.copy_context() for _ in jobs]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(lambda context, job: context.run(run, job), contexts, jobs))
+            batch = TransactionBatch.concat(_to_batch(raw) for raw in results)
+            load_span.rows = len(batch)
+        return batch
     
     def get_source_type(self) -> str:
         return "YNAB"
+
+
+def _to_batch(raw_transactions: List[Dict[str, Any]]) -> TransactionBatch:
+    """Map raw YNAB transaction payloads onto a columnar batch"""
+    with span('ynab.map', rows=len(raw_transactions)):
+        return _build_batch(raw_transactions)
+
+
+def _build_batch(raw_transactions: List[Dict[str, Any]]) -> TransactionBatch:
+    amounts = np.fromiter((t['amount'] for t in raw_transactions), dtype=np.int64, count=len(raw_transactions))
+    return TransactionBatch(
+        dates=np.array([t['date'] for t in raw_transactions], dtype='datetime64[s]'),
+        amounts=amounts,
+        descriptions=[t['payee_name'] or t.get('memo') or '' for t in raw_transactions],
+        category=[t.get('category_name') or '' for t in raw_transactions],
+        transaction_type=(np.where(amounts < 0, 0, 1).astype(np.int32), np.array(['outflow', 'inflow'], dtype=object)),
+        account_id=[t['account_id'] for t in raw_transactions],
+        bank_name='YNAB',
+        raw_data=raw_transactions
+    )
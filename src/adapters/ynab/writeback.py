@@ -0,0 +1,75 @@
+"""
+Build YNAB bulk write payloads from reconciliation results.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ...matching.groups import GroupMatch
+from ..base import Transaction
+
+# YNAB's own file-import scheme: YNAB:[milliunit amount]:[iso date]:[occurrence]
+IMPORT_ID_PREFIX = "YNAB"
+
+# Field limits of the YNAB API
+PAYEE_NAME_LENGTH = 200
+MEMO_LENGTH = 200
+
+
+def import_ids(statement: Iterable[Transaction]) -> Dict[int, str]:
+    """
+    Import ids keyed by id(transaction). The occurrence counts transactions
+    with the same amount and date in statement order, so a statement always
+    yields the same ids and a re-run is skipped by YNAB as duplicates.
+    """
+    seen: Dict[Tuple[int, str], int] = {}
+    ids = {}
+    for transaction in statement:
+        key = (transaction.amount_milliunits, transaction.date.strftime('%Y-%m-%d'))
+        seen[key] = seen.get(key, 0) + 1
+        ids[id(transaction)] = f"{IMPORT_ID_PREFIX}:{key[0]}:{key[1]}:{seen[key]}"
+    return ids
+
+
+def create_payloads(
+    missing: Sequence[Transaction],
+    account_id: str,
+    statement: Optional[Iterable[Transaction]] = None
+) -> List[Dict[str, Any]]:
+    """
+    New YNAB transactions for bank rows missing from YNAB. Pass the whole
+    `statement` the rows came from so occurrences, and with them import ids,
+    stay stable whichever rows are missing.
+    """
+    ids = import_ids(statement if statement is not None else missing)
+    return [
+        {
+            'account_id': account_id,
+            'date': t.date.strftime('%Y-%m-%d'),
+            'amount': t.amount_milliunits,
+            'payee_name': (t.counterparty or t.description)[:PAYEE_NAME_LENGTH] or None,
+            'memo': t.description[:MEMO_LENGTH] or None,
+            'cleared': 'cleared',
+            'approved': False,
+            'import_id': ids[id(t)],
+        }
+        for t in missing
+    ]
+
+
+def clear_payloads(
+    matches: Iterable[Tuple[Transaction, Transaction]],
+    groups: Iterable[GroupMatch] = ()
+) -> List[Dict[str, Any]]:
+    """
+    Mark matched YNAB transactions cleared: the YNAB side of one-to-one
+    matches and of group matches (the target, or every member when the
+    target is the bank row). Already cleared or reconciled ones are skipped.
+    """
+    matched = [ynab_transaction for ynab_transaction, _ in matches]
+    for group in groups:
+        matched.extend([group.target] if group.target_side == 'ynab' else group.members)
+    updates = []
+    for ynab_transaction in matched:
+        raw = ynab_transaction.raw_data or {}
+        if raw.get('id') and raw.get('cleared') == 'uncleared':
+            updates.append({'id': raw['id'], 'cleared': 'cleared'})
+    return updates
@@ -0,0 +1,287 @@
+"""
+Headless batch reconciliation.
+
+    python harmonizer.py match exports/ --budget "My Budget" --account Checking \
+        --start 2024-01-01 --end 2024-12-31 --output results.jsonl
+
+Every CSV in the export directory is parsed in parallel, YNAB accounts are
+fetched concurrently through the local transaction cache, and matching runs
+on the multi-process engine. Overlapping exports are merged and duplicated
+YNAB transactions collapsed before matching. Results are streamed to JSONL
+or Parquet. Streamlit is never imported.
+"""
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .adapters.base import Transaction, TransactionBatch, TransactionFilter
+from .adapters.csv import StatementCache, get_csv_adapter
+from .adapters.dedup import (RAW_KEY_FIELDS, Deduplicated, StatementMerger,
+                             dedup_ynab)
+from .adapters.ynab.source import YNABSourceAdapter
+from .matching.groups import GroupMatch, find_group_matches
+from .matching.parallel import match_parallel
+from .services.ynab.cache import TransactionCache
+from .tracing import Trace, span
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _parse_export(args: Tuple[str, str, Optional[TransactionFilter], bool]) -> Tuple[str, Optional[TransactionBatch], str]:
+    """Worker: parse one bank export into a batch carrying only the dedup key columns, or None with the reason it was skipped"""
+    path, bank, filters, use_cache = args
+    try:
+        adapter = get_csv_adapter(bank, path, cache=StatementCache() if use_cache else None)
+        batch = adapter.load_batch(filters)
+    except KeyError as e:
+        return path, None, f"missing column {e}"
+    except ValueError as e:
+        return path, None, str(e)
+    batch.raw_data = batch.raw_data.reindex(columns=list(RAW_KEY_FIELDS)) if batch.raw_data is not None else None
+    return path, batch, f"{adapter.get_bank_name()}, {len(batch)} transactions, {len(adapter.errors)} rows skipped"
+
+
+def _select(items: Sequence, selector: str, kind: str):
+    """Pick a budget/account by id or (case-insensitive) name"""
+    for item in items:
+        if selector == item.id or selector.lower() == item.name.lower():
+            return item
+    raise SystemExit(f"No {kind} matching '{selector}'")
+
+
+def _row(transaction: Transaction, prefix: str) -> Dict[str, object]:
+    row = {
+        f'{prefix}date': transaction.date.strftime('%Y-%m-%d'),
+        f'{prefix}amount': transaction.amount,
+        f'{prefix}amount_milliunits': transaction.amount_milliunits,
+        f'{prefix}description': transaction.description,
+        f'{prefix}account_id': transaction.account_id,
+    }
+    if prefix == 'ynab_':
+        row['ynab_id'] = (transaction.raw_data or {}).get('id')
+    return row
+
+
+def _duplicate_records(kind: str, deduplicated: Deduplicated) -> Iterator[Dict[str, object]]:
+    """One record per row collapsed before matching"""
+    prefix = 'ynab_' if kind == 'duplicate_ynab' else 'csv_'
+    for duplicate_kind, _, duplicate in deduplicated.pairs():
+        yield {'kind': kind, 'duplicate': duplicate_kind, **_row(duplicate, prefix)}
+
+
+def _records(account: str, matches, unmatched_ynab, unmatched_csv, groups) -> Iterator[Dict[str, object]]:
+    for yt, ct in matches:
+        yield {'kind': 'match', 'account': account, **_row(yt, 'ynab_'), **_row(ct, 'csv_')}
+    for group in groups:
+        target_prefix, member_prefix = ('csv_', 'ynab_') if group.target_side == 'csv' else ('ynab_', 'csv_')
+        for member in group.members:
+            yield {'kind': 'group', 'account': account, **_row(group.target, target_prefix), **_row(member, member_prefix)}
+    for yt in unmatched_ynab:
+        yield {'kind': 'unmatched_ynab', 'account': account, **_row(yt, 'ynab_')}
+    for ct in unmatched_csv:
+        yield {'kind': 'unmatched_csv', 'account': account, **_row(ct, 'csv_')}
+
+
+class _JSONLWriter:
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def write(self, records: Iterator[Dict[str, object]]) -> None:
+        for record in records:
+            self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+    def close(self) -> None:
+        if self.stream is not sys.stdout:
+            self.stream.close()
+
+
+class _ParquetWriter:
+    FIELDS = [
+        'kind', 'account', 'duplicate',
+        'ynab_date', 'ynab_amount', 'ynab_amount_milliunits', 'ynab_description', 'ynab_account_id', 'ynab_id',
+        'csv_date', 'csv_amount', 'csv_amount_milliunits', 'csv_description', 'csv_account_id',
+    ]
+    TYPES = {'amount': 'float64', 'amount_milliunits': 'int64'}
+
+    def __init__(self, path: Path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([
+            (name, pa.type_for_alias(self.TYPES.get(name.split('_', 1)[-1], 'string'))) for name in self.FIELDS
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, records: Iterator[Dict[str, object]]) -> None:
+        rows = list(records)
+        columns = {name: [row.get(name) for row in rows] for name in self.FIELDS}
+        self.writer.write_table(self.pa.table(columns, schema=self.schema))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def _open_writer(output: str):
+    if output == '-':
+        return _JSONLWriter(sys.stdout)
+    path = Path(output)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == '.parquet':
+        return _ParquetWriter(path)
+    return _JSONLWriter(open(path, 'w', encoding='utf-8'))
+
+
+def _account_selectors(values: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """Parse 'YNAB_ACCOUNT[=BANK_ACCOUNT_NO]' selectors"""
+    selectors = []
+    for value in values:
+        name, _, bank_account = value.partition('=')
+        selectors.append((name, bank_account or None))
+    return selectors
+
+
+def run_match(args: argparse.Namespace) -> int:
+    exports = sorted(Path(args.exports).glob('*.csv'))
+    if not exports:
+        print(f"No CSV files found in {args.exports}", file=sys.stderr)
+        return 1
+
+    selectors = _account_selectors(args.account)
+    if len(selectors) > 1 and any(bank_account is None for _, bank_account in selectors):
+        raise SystemExit("With several --account options, map each as YNAB_ACCOUNT=BANK_ACCOUNT_NO")
+
+    # CSV rows just outside the range can still match YNAB rows at its edges
+    csv_filter = None
+    if args.start or args.end:
+        csv_filter = TransactionFilter(
+            start_date=date.fromordinal(args.start.toordinal() - args.tolerance_days) if args.start else None,
+            end_date=date.fromordinal(args.end.toordinal() + args.tolerance_days) if args.end else None,
+        )
+
+    # Exports are parsed in worker processes, so the trace sees this stage as a whole
+    with span('csv.exports', bytes=sum(path.stat().st_size for path in exports), files=len(exports)) as exports_span:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            parsed = list(executor.map(_parse_export, [(str(path), args.bank, csv_filter, not args.no_parse_cache) for path in exports]))
+        exports_span.rows = sum(len(batch) for _, batch, _ in parsed if batch is not None)
+    for path, batch, summary in parsed:
+        print(f"{path}: {summary if batch is not None else 'skipped, ' + summary}", file=sys.stderr)
+    merger = StatementMerger(args.tolerance_days)
+    for path, batch, _ in parsed:
+        if batch is not None:
+            merger.add(batch, source=path)
+    csv_deduplicated = merger.result()
+    csv_batch = csv_deduplicated.batch if not args.keep_duplicates else TransactionBatch.concat(
+        batch for _, batch, _ in parsed if batch is not None
+    )
+
+    adapter = YNABSourceAdapter(budget_id="", cache=TransactionCache(), full_resync=args.full_resync)
+    budget = _select(adapter.get_budgets(), args.budget, "budget")
+    accounts = [
+        (_select(adapter.client.get_accounts(budget.id), name, "account"), bank_account)
+        for name, bank_account in selectors
+    ]
+
+    since = datetime.combine(args.start, datetime.min.time()) if args.start else None
+    ynab_batch = adapter.load_many([(budget.id, account.id, since) for account, _ in accounts])
+    ynab_batch = TransactionFilter(start_date=args.start, end_date=args.end).apply(ynab_batch)
+    ynab_deduplicated = dedup_ynab(ynab_batch, args.tolerance_days)
+    if not args.keep_duplicates:
+        ynab_batch = ynab_deduplicated.batch
+    for label, deduplicated in (("bank exports", csv_deduplicated), ("YNAB", ynab_deduplicated)):
+        if deduplicated.duplicates:
+            print(f"{label}: {len(deduplicated.exact)} exact and {len(deduplicated.near)} near duplicates "
+                  f"{'kept' if args.keep_duplicates else 'collapsed'}", file=sys.stderr)
+
+    jobs = []
+    ynab_accounts = ynab_batch.column('account_id')
+    csv_accounts = csv_batch.column('account_id')
+    for account, bank_account in accounts:
+        csv_rows = csv_batch if bank_account is None else csv_batch.take(csv_accounts == bank_account)
+        jobs.append((ynab_batch.take(ynab_accounts == account.id), csv_rows))
+
+    results = match_parallel(
+        jobs,
+        tolerance_days=args.tolerance_days,
+        amount_threshold=args.amount_threshold,
+        mode=args.mode,
+        use_descriptions=args.use_descriptions,
+        max_workers=args.workers
+    )
+
+    writer = _open_writer(args.output)
+    try:
+        writer.write(_duplicate_records('duplicate_csv', csv_deduplicated))
+        writer.write(_duplicate_records('duplicate_ynab', ynab_deduplicated))
+        for (account, _), (matches, unmatched_ynab, unmatched_csv) in zip(accounts, results):
+            groups: List[GroupMatch] = []
+            if args.max_group_size:
+                groups, unmatched_ynab, unmatched_csv = find_group_matches(
+                    unmatched_ynab, unmatched_csv, args.tolerance_days, args.amount_threshold, args.max_group_size
+                )
+            if args.start or args.end:
+                unmatched_csv = [
+                    t for t in unmatched_csv
+                    if (not args.start or t.date.date() >= args.start) and (not args.end or t.date.date() <= args.end)
+                ]
+            writer.write(_records(account.name, matches, unmatched_ynab, unmatched_csv, groups))
+            print(f"{account.name}: {len(matches)} matched, {len(groups)} grouped, "
+                  f"{len(unmatched_ynab)} unmatched in YNAB, {len(unmatched_csv)} unmatched in bank exports",
+                  file=sys.stderr)
+    finally:
+        writer.close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='harmonizer', description="Reconcile bank exports against YNAB")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    match = commands.add_parser('match', help="Match a directory of bank exports against YNAB accounts")
+    match.add_argument('exports', help="Directory containing bank CSV exports")
+    match.add_argument('--bank', default='auto', help="Bank format of the exports ('auto' detects it per file)")
+    match.add_argument('--budget', required=True, help="YNAB budget name or id")
+    match.add_argument('--account', action='append', required=True,
+                       help="YNAB account name or id; repeat as NAME=BANK_ACCOUNT_NO to map several accounts")
+    match.add_argument('--start', type=_parse_date, help="First date (YYYY-MM-DD)")
+    match.add_argument('--end', type=_parse_date, help="Last date (YYYY-MM-DD)")
+    match.add_argument('--tolerance-days', type=int, default=1)
+    match.add_argument('--amount-threshold', type=Decimal, default=Decimal('0.01'))
+    match.add_argument('--mode', choices=['greedy', 'global'], default='greedy')
+    match.add_argument('--use-descriptions', action='store_true', help="Prefer similar descriptions in greedy mode")
+    match.add_argument('--max-group-size', type=int, default=0,
+                       help="Also match split/batch payments of up to this many transactions (0 = off)")
+    match.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    match.add_argument('--full-resync', action='store_true', help="Ignore the local YNAB transaction cache")
+    match.add_argument('--keep-duplicates', action='store_true',
+                       help="Match overlapping exports and duplicated YNAB transactions as they are (still reported)")
+    match.add_argument('--no-parse-cache', action='store_true', help="Parse every export again instead of using the statement cache")
+    match.add_argument('--output', default='-', help="Output .jsonl or .parquet file ('-' for stdout JSONL)")
+    match.add_argument('--trace', type=Path, help="Time each stage; write a Chrome trace here and a summary to stderr")
+    match.set_defaults(func=run_match)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if not getattr(args, 'trace', None):
+        return args.func(args)
+
+    with Trace() as trace:
+        status = args.func(args)
+    args.trace.write_text(trace.to_chrome_trace())
+    print(f"\n{'stage':<20} {'calls':>6} {'seconds':>9} {'rows':>10} {'MB':>8}", file=sys.stderr)
+    for entry in trace.summary():
+        rows = f"{entry['rows']:>10}" if entry['rows'] is not None else f"{'-':>10}"
+        size = f"{entry['bytes'] / 2 ** 20:>8.2f}" if entry['bytes'] is not None else f"{'-':>8}"
+        print(f"{entry['name']:<20} {entry['calls']:>6} {entry['seconds']:>9.3f} {rows} {size}", file=sys.stderr)
+    print(f"Trace written to {args.trace}", file=sys.stderr)
+    return status
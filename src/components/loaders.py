@@ -0,0 +1,122 @@
+"""
+Cached and non-blocking data loading for the Streamlit pages.
+
+Adapter and API modules (pandas, numpy, requests) are imported inside the
+loaders so the first widgets render before any of them are loaded.
+"""
+import contextvars
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import streamlit as st
+
+
+@st.cache_resource
+def _executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="harmonizer-loader")
+
+
+@st.cache_resource(show_spinner=False)
+def ynab_client():
+    """The YNAB client shared by every session and rerun"""
+    from src.services.ynab.client import get_shared_client
+    from src.services.ynab.config import YNABConfig
+
+    return get_shared_client(YNABConfig.load())
+
+
+@dataclass
+class _Call:
+    """A background call kept in the session; `expires` is set once its result is first returned"""
+    future: Future
+    ttl: Optional[float]
+    expires: Optional[float] = None
+
+
+def _calls() -> Dict[Hashable, _Call]:
+    return st.session_state.setdefault('_background', {})
+
+
+@st.fragment(run_every=0.3)
+def _wait(key: Hashable, label: str):
+    """Placeholder shown while a background call runs; reruns the page when it is done"""
+    call = _calls().get(key)
+    if call is None or call.future.done():
+        st.rerun()
+    st.info(label, icon="⏳")
+
+
+def background(
+    key: Hashable,
+    fn: Callable[..., Any],
+    *args,
+    label: str = "Loading...",
+    ttl: Optional[float] = None
+) -> Optional[Any]:
+    """
+    Run `fn(*args)` off the script thread, once per session and key.
+
+    Returns the result once it is available, otherwise renders a placeholder
+    and returns None; the page reruns when it finishes. A result is kept for
+    `ttl` seconds (for the whole session if None) and the call is then run
+    again. An error is re-raised once and the next rerun retries the call.
+    """
+    calls = _calls()
+    now = time.monotonic()
+    for stale in [k for k, c in calls.items() if c.expires is not None and c.expires <= now]:
+        del calls[stale]
+
+    call = calls.get(key)
+    if call is None:
+        # Run in a copy of the script's context so an active trace records the call
+        future = _executor().submit(contextvars.copy_context().run, fn, *args)
+        call = calls[key] = _Call(future, ttl)
+    if not call.future.done():
+        _wait(key, label)
+        return None
+    if call.future.exception() is not None:
+        del calls[key]
+    elif call.expires is None and call.ttl is not None:
+        call.expires = now + call.ttl
+    return call.future.result()
+
+
+def forget(*names: str):
+    """Drop finished or pending background calls whose key starts with one of `names`"""
+    calls = _calls()
+    for key in list(calls):
+        if (key[0] if isinstance(key, tuple) else key) in names:
+            del calls[key]
+
+
+@st.cache_data(ttl=60, show_spinner="Loading YNAB transactions...")
+def ynab_transactions(budget_id: str, account_id: Optional[str], start_date, end_date=None, _full_resync: bool = False):
+    """
+    Load a YNAB account through the local transaction cache.
+
+    `_full_resync` is not part of the cache key; call `ynab_transactions.clear()`
+    first when forcing a resync.
+    """
+    from src.adapters.base import TransactionFilter
+    from src.adapters.ynab.source import YNABSourceAdapter
+    from src.services.ynab.cache import TransactionCache
+
+    adapter = YNABSourceAdapter(
+        budget_id=budget_id,
+        account_id=account_id,
+        cache=TransactionCache(),
+        full_resync=_full_resync,
+        client=ynab_client()
+    )
+    return adapter.load_batch(TransactionFilter(start_date=start_date, end_date=end_date))
+
+
+@st.cache_data(max_entries=8, show_spinner="Parsing CSV...")
+def csv_transactions(file_id: str, bank_name: str, _data: bytes):
+    """Parse an uploaded CSV in memory once per upload; returns (batch, skipped rows)"""
+    from src.adapters.csv import StatementCache, get_csv_adapter
+
+    adapter = get_csv_adapter(bank_name, _data, cache=StatementCache())
+    return adapter.load_batch(), adapter.errors
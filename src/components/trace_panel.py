@@ -0,0 +1,75 @@
+"""
+Opt-in timing of the page's pipeline stages.
+
+Call `start_trace()` at the top of a page and `render_trace_panel()` at the
+bottom. While "Record timings" is on, spans from every rerun of the session
+(background loads included) collect in one trace until it is reset.
+"""
+from datetime import datetime
+from typing import Optional
+
+import streamlit as st
+
+from src.tracing import Trace, activate
+
+
+def start_trace() -> Optional[Trace]:
+    """Activate the session's trace for this rerun, or turn tracing off"""
+    with st.sidebar:
+        enabled = st.checkbox(
+            "Record timings",
+            key='record_timings',
+            help="Time YNAB requests, CSV parsing, filtering, matching and rendering"
+        )
+    trace = None
+    if enabled:
+        trace = st.session_state.get('_trace')
+        if trace is None:
+            trace = st.session_state['_trace'] = Trace()
+    else:
+        st.session_state.pop('_trace', None)
+    activate(trace)
+    return trace
+
+
+def render_trace_panel():
+    trace = st.session_state.get('_trace')
+    if trace is None:
+        return
+    with st.expander(f"Timings ({len(trace.spans)} spans)"):
+        summary = trace.summary()
+        if summary:
+            st.dataframe(
+                [
+                    {
+                        'stage': entry['name'],
+                        'calls': entry['calls'],
+                        'total ms': round(entry['seconds'] * 1000, 1),
+                        'max ms': round(entry['max_seconds'] * 1000, 1),
+                        'rows': entry['rows'],
+                        'bytes': entry['bytes'],
+                        'rows/s': round(entry['rows'] / entry['seconds']) if entry['rows'] and entry['seconds'] else None,
+                    }
+                    for entry in summary
+                ],
+                hide_index=True
+            )
+        else:
+            st.info("Nothing recorded yet; stages are timed from the next action on")
+
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        col_json, col_chrome, col_reset = st.columns(3)
+        with col_json:
+            st.download_button("Download JSON", trace.to_json(), f"timings-{stamp}.json", mime="application/json")
+        with col_chrome:
+            st.download_button(
+                "Download Chrome trace",
+                trace.to_chrome_trace(),
+                f"trace-{stamp}.json",
+                mime="application/json",
+                help="Open in chrome://tracing or ui.perfetto.dev"
+            )
+        with col_reset:
+            if st.button("Reset timings"):
+                st.session_state['_trace'] = Trace()
+                st.rerun()
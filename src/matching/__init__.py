@@ -0,0 +1,21 @@
+from ..money import to_milliunits
+from .description import (DescriptionIndex, description_similarity,
+                          normalize_description)
+from .engine import find_matching_transactions
+from .groups import GroupMatch, find_group_matches
+from .index import TransactionIndex
+from .parallel import match_parallel
+from .session import ReconciliationSession
+
+__all__ = [
+    'DescriptionIndex',
+    'GroupMatch',
+    'ReconciliationSession',
+    'TransactionIndex',
+    'description_similarity',
+    'find_group_matches',
+    'find_matching_transactions',
+    'match_parallel',
+    'normalize_description',
+    'to_milliunits',
+]
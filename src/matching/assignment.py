@@ -0,0 +1,327 @@
+from collections import deque
+from typing import Dict, List, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from ..adapters.base import Transaction, TransactionBatch
+from .description import (normalize_description, similarity, transaction_text,
+                          trigrams)
+
+# Relative weights of the cost terms. Each term is normalised to [0, 1].
+DATE_WEIGHT = 1.0
+AMOUNT_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 1.0
+
+# Components larger than this (per side) are solved in date-ordered blocks
+# so the per-component dense matrix stays bounded; the block results are then
+# grown to a maximum matching, but their total cost is no longer minimal.
+MAX_BLOCK_SIZE = 128
+
+# A list of transactions, or a batch read through its arrays
+Rows = Union[Sequence[Transaction], TransactionBatch]
+
+_AMOUNT_OFFSET = 1 << 39
+_DAY_SCALE = 1 << 40
+
+
+def _day_array(transactions: Rows) -> np.ndarray:
+    if isinstance(transactions, TransactionBatch):
+        return transactions.days
+    return np.fromiter((t.date.toordinal() for t in transactions), dtype=np.int64, count=len(transactions))
+
+
+def _amount_array(transactions: Rows) -> np.ndarray:
+    if isinstance(transactions, TransactionBatch):
+        return transactions.amounts
+    return np.fromiter((t.amount_milliunits for t in transactions), dtype=np.int64, count=len(transactions))
+
+
+def candidate_pairs(
+    ynab_days: np.ndarray,
+    ynab_amounts: np.ndarray,
+    csv_days: np.ndarray,
+    csv_amounts: np.ndarray,
+    tolerance_days: int,
+    threshold: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return (ynab_positions, csv_positions) for every pair inside the window.
+
+    CSV rows are sorted by a composite (day, amount) key; for each day offset
+    the amount window of every YNAB row is located with one vectorised
+    `searchsorted`, so only real candidates are ever materialised.
+    """
+    csv_keys = csv_days * _DAY_SCALE + (csv_amounts + _AMOUNT_OFFSET)
+    order = np.argsort(csv_keys, kind='stable')
+    sorted_keys = csv_keys[order]
+
+    rows, cols = [], []
+    for offset in range(-tolerance_days, tolerance_days + 1):
+        base = (ynab_days + offset) * _DAY_SCALE + _AMOUNT_OFFSET + ynab_amounts
+        lo = np.searchsorted(sorted_keys, base - threshold, side='left')
+        hi = np.searchsorted(sorted_keys, base + threshold, side='right')
+        counts = hi - lo
+        total = int(counts.sum())
+        if not total:
+            continue
+        starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        rows.append(np.repeat(np.arange(len(ynab_days)), counts))
+        cols.append(order[starts + np.arange(total)])
+
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+def _texts(transactions: Rows) -> Sequence[str]:
+    if isinstance(transactions, TransactionBatch):
+        return [
+            f"{d} {c}" if c else d
+            for d, c in zip(transactions.descriptions.tolist(), transactions.counterparties.tolist())
+        ]
+    return [transaction_text(t) for t in transactions]
+
+
+def _description_similarity(
+    ynab_trans: Rows,
+    csv_trans: Rows,
+    rows: np.ndarray,
+    cols: np.ndarray
+) -> np.ndarray:
+    """Trigram similarity for each candidate pair; texts are normalised once per row"""
+    ynab_texts = _texts(ynab_trans)
+    csv_texts = _texts(csv_trans)
+    ynab_grams: Dict[int, frozenset] = {}
+    csv_grams: Dict[int, frozenset] = {}
+    scores = np.zeros(len(rows))
+    for k, (r, c) in enumerate(zip(rows.tolist(), cols.tolist())):
+        a = ynab_grams.get(r)
+        if a is None:
+            a = ynab_grams[r] = trigrams(normalize_description(ynab_texts[r]))
+        b = csv_grams.get(c)
+        if b is None:
+            b = csv_grams[c] = trigrams(normalize_description(csv_texts[c]))
+        scores[k] = similarity(a, b)
+    return scores
+
+
+def edge_costs(
+    ynab_days: np.ndarray,
+    ynab_amounts: np.ndarray,
+    csv_days: np.ndarray,
+    csv_amounts: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    similarity: np.ndarray,
+    tolerance_days: int,
+    threshold: int
+) -> np.ndarray:
+    """Weighted cost of each candidate pair; lower is a better match"""
+    date_cost = np.abs(ynab_days[rows] - csv_days[cols]) / (tolerance_days + 1)
+    amount_cost = np.abs(ynab_amounts[rows] - csv_amounts[cols]) / (threshold + 1)
+    return DATE_WEIGHT * date_cost + AMOUNT_WEIGHT * amount_cost + DESCRIPTION_WEIGHT * (1.0 - similarity)
+
+
+def _components(rows: np.ndarray, cols: np.ndarray, n_ynab: int) -> Dict[int, List[int]]:
+    """Group edge indices by connected component (union-find over both sides)"""
+    parent = list(range(n_ynab + int(cols.max()) + 1)) if len(cols) else []
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for r, c in zip(rows.tolist(), (cols + n_ynab).tolist()):
+        root_r, root_c = find(r), find(c)
+        if root_r != root_c:
+            parent[root_r] = root_c
+
+    groups: Dict[int, List[int]] = {}
+    for edge, r in enumerate(rows.tolist()):
+        groups.setdefault(find(r), []).append(edge)
+    return groups
+
+
+def solve_assignment(cost: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Minimum-cost assignment for a dense (rows x cols) matrix.
+
+    Shortest augmenting path variant of the Hungarian algorithm with the
+    inner column scan vectorised. Every row of the smaller side is assigned.
+    """
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used
+            free[0] = False
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            improve = free[1:] & (reduced < minv[1:])
+            minv[1:][improve] = reduced[improve]
+            way[1:][improve] = j0
+            masked = np.where(free, minv, np.inf)
+            j1 = int(np.argmin(masked))
+            delta = masked[j1]
+            used_columns = np.flatnonzero(used)
+            u[p[used_columns]] += delta
+            v[used_columns] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    pairs = [(int(p[j]) - 1, j - 1) for j in range(1, m + 1) if p[j]]
+    if transposed:
+        pairs = [(c, r) for r, c in pairs]
+    return pairs
+
+
+def _solve_block(
+    edges: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    costs: np.ndarray
+) -> List[Tuple[int, int]]:
+    block_rows, row_index = np.unique(rows[edges], return_inverse=True)
+    block_cols, col_index = np.unique(cols[edges], return_inverse=True)
+    if len(block_rows) == 1 and len(block_cols) == 1:
+        return [(int(block_rows[0]), int(block_cols[0]))]
+
+    # Missing edges get a cost that outweighs any set of real edges, so the
+    # solver maximises the number of matches before minimising their cost.
+    missing = (costs[edges].max() + 1.0) * (min(len(block_rows), len(block_cols)) + 1)
+    dense = np.full((len(block_rows), len(block_cols)), missing)
+    dense[row_index, col_index] = costs[edges]
+
+    return [
+        (int(block_rows[r]), int(block_cols[c]))
+        for r, c in solve_assignment(dense)
+        if dense[r, c] < missing
+    ]
+
+
+def _augment(
+    pairs: List[Tuple[int, int]],
+    edges: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    costs: np.ndarray
+) -> List[Tuple[int, int]]:
+    """Grow `pairs` to a maximum matching along shortest augmenting paths"""
+    adjacency: Dict[int, List[int]] = {}
+    for edge in edges[np.argsort(costs[edges], kind='stable')].tolist():
+        adjacency.setdefault(int(rows[edge]), []).append(int(cols[edge]))
+    row_match = dict(pairs)
+    col_match = {c: r for r, c in pairs}
+
+    for free_row in adjacency:
+        if free_row in row_match:
+            continue
+        # Breadth-first search over alternating paths; reached[c] is the row
+        # that reached column c, so the path can be walked back and flipped.
+        reached: Dict[int, int] = {}
+        queue = deque([free_row])
+        end = None
+        while queue and end is None:
+            r = queue.popleft()
+            for c in adjacency[r]:
+                if c in reached:
+                    continue
+                reached[c] = r
+                if c not in col_match:
+                    end = c
+                    break
+                queue.append(col_match[c])
+        while end is not None:
+            r = reached[end]
+            row_match[r], end = end, row_match.get(r)
+            col_match[row_match[r]] = r
+    return list(row_match.items())
+
+
+def _solve_component(
+    edges: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    costs: np.ndarray,
+    ynab_days: np.ndarray
+) -> List[Tuple[int, int]]:
+    component_rows = np.unique(rows[edges])
+    if len(component_rows) <= MAX_BLOCK_SIZE and len(np.unique(cols[edges])) <= MAX_BLOCK_SIZE:
+        return _solve_block(edges, rows, cols, costs)
+
+    # Oversized components (e.g. a daily same-amount payment over years) are
+    # solved block by block in date order; columns taken by earlier blocks
+    # are dropped from later ones. A row left out this way may still be
+    # reachable by shifting earlier pairs, so augmenting paths over the whole
+    # component restore the maximum number of matches.
+    ordered_rows = component_rows[np.argsort(ynab_days[component_rows], kind='stable')]
+    taken: Set[int] = set()
+    pairs = []
+    for start in range(0, len(ordered_rows), MAX_BLOCK_SIZE):
+        block_rows = ordered_rows[start:start + MAX_BLOCK_SIZE]
+        block_edges = edges[np.isin(rows[edges], block_rows)]
+        if taken:
+            block_edges = block_edges[~np.isin(cols[block_edges], list(taken))]
+        if not len(block_edges):
+            continue
+        block_pairs = _solve_block(block_edges, rows, cols, costs)
+        taken.update(c for _, c in block_pairs)
+        pairs.extend(block_pairs)
+    return _augment(pairs, edges, rows, cols, costs)
+
+
+def match_global(
+    ynab_trans: Rows,
+    csv_trans: Rows,
+    tolerance_days: int,
+    threshold: int
+) -> List[Tuple[int, int]]:
+    """
+    Return (ynab_position, csv_position) pairs from a global assignment.
+
+    The assignment has the largest possible number of pairs and, among those,
+    the lowest total cost. Candidate pairs form a sparse bipartite graph; each
+    connected component is solved independently, so the dense N x M matrix is
+    never built. Components above MAX_BLOCK_SIZE keep the maximum number of
+    pairs but their cost is only minimised block by block.
+    """
+    if not len(ynab_trans) or not len(csv_trans):
+        return []
+
+    ynab_days, ynab_amounts = _day_array(ynab_trans), _amount_array(ynab_trans)
+    csv_days, csv_amounts = _day_array(csv_trans), _amount_array(csv_trans)
+
+    rows, cols = candidate_pairs(ynab_days, ynab_amounts, csv_days, csv_amounts, tolerance_days, threshold)
+    if not len(rows):
+        return []
+
+    similarity = _description_similarity(ynab_trans, csv_trans, rows, cols)
+    costs = edge_costs(
+        ynab_days, ynab_amounts, csv_days, csv_amounts, rows, cols, similarity, tolerance_days, threshold
+    )
+
+    pairs = []
+    for edges in _components(rows, cols, len(ynab_trans)).values():
+        pairs.extend(_solve_component(np.asarray(edges), rows, cols, costs, ynab_days))
+    return sorted(pairs)
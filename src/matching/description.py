@@ -0,0 +1,129 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from ..adapters.base import Transaction, TransactionBatch
+
+# Tokens that carry no information about the merchant or counterparty
+# (compared after accents are stripped)
+NOISE_TOKENS = frozenset({
+    'card', 'kaart', 'pos', 'payment', 'makse', 'purchase', 'ost', 'transfer',
+    'ulekanne', 'eur', 'ee', 'www', 'com', 'ltd', 'as', 'ou', 'uab', 'sia'
+})
+
+_NON_WORD = re.compile(r'[^\w]+')
+_DIGITS = re.compile(r'\d+')
+
+# Large enough to hold every description of a multi-year statement pair
+NORMALIZE_CACHE_SIZE = 200_000
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_description(text: str) -> str:
+    """
+    Lowercase, strip accents, digits (card numbers, dates, references) and
+    noise tokens. Memoised, so repeat runs over cached data skip the work.
+    """
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii').lower()
+    tokens = _NON_WORD.sub(' ', _DIGITS.sub(' ', text)).split()
+    return ' '.join(t for t in tokens if len(t) > 1 and t not in NOISE_TOKENS)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def trigrams(normalized: str) -> frozenset:
+    """Character trigrams of each token, padded so short words still produce some"""
+    grams: Set[str] = set()
+    for token in normalized.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def transaction_text(transaction: Transaction) -> str:
+    """Text compared for a transaction: payee/description plus counterparty name"""
+    if transaction.counterparty:
+        return f"{transaction.description} {transaction.counterparty}"
+    return transaction.description or ''
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    """Jaccard similarity of two trigram sets"""
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+def description_similarity(a: str, b: str) -> float:
+    return similarity(trigrams(normalize_description(a)), trigrams(normalize_description(b)))
+
+
+class DescriptionIndex:
+    """
+    Normalised trigram sets for a list of transactions plus an inverted
+    trigram -> positions index.
+
+    Scoring is always restricted to a set of candidate positions (the
+    date/amount window); the inverted index is used when that set is large,
+    direct set intersections when it is small.
+    """
+
+    # Below this many candidates, intersecting sets beats walking postings
+    POSTINGS_MIN_CANDIDATES = 32
+
+    def __init__(self, transactions: Iterable[Transaction] = ()):
+        self.grams: List[frozenset] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.extend(transactions)
+
+    @classmethod
+    def from_texts(cls, texts: Sequence[str]) -> 'DescriptionIndex':
+        index = cls()
+        index._add_texts(texts)
+        return index
+
+    def extend(self, transactions: Iterable[Transaction]) -> None:
+        if isinstance(transactions, TransactionBatch):
+            texts = [
+                f"{d} {c}" if c else d
+                for d, c in zip(transactions.descriptions.tolist(), transactions.counterparties.tolist())
+            ]
+        else:
+            texts = [transaction_text(t) for t in transactions]
+        self._add_texts(texts)
+
+    def _add_texts(self, texts: Sequence[str]) -> None:
+        start = len(self.grams)
+        for position, text in enumerate(texts, start):
+            grams = trigrams(normalize_description(text))
+            self.grams.append(grams)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+
+    def scores(self, query: frozenset, positions: Sequence[int]) -> List[float]:
+        """Similarity of `query` to each candidate position"""
+        if len(positions) < self.POSTINGS_MIN_CANDIDATES:
+            return [similarity(query, self.grams[p]) for p in positions]
+
+        candidates = set(positions)
+        shared: Dict[int, int] = {}
+        for gram in query:
+            for position in self.postings.get(gram, ()):
+                if position in candidates:
+                    shared[position] = shared.get(position, 0) + 1
+        return [
+            shared[p] / (len(query) + len(self.grams[p]) - shared[p]) if p in shared else 0.0
+            for p in positions
+        ]
+
+    def best(self, query: frozenset, positions: Sequence[int]) -> Optional[int]:
+        """Most similar candidate; ties (including no overlap) go to the earliest position"""
+        if not positions:
+            return None
+        scores = self.scores(query, positions)
+        best_score = max(scores)
+        return min(p for p, score in zip(positions, scores) if score == best_score)
+
+    def __len__(self) -> int:
+        return len(self.grams)
@@ -0,0 +1,108 @@
+from typing import Iterable, List, Optional, Tuple
+
+from ..adapters.base import Transaction, TransactionBatch
+from ..money import Amount, to_milliunits
+from ..tracing import span
+from .assignment import match_global
+from .description import (DescriptionIndex, normalize_description,
+                          transaction_text, trigrams)
+from .index import TransactionIndex
+
+MatchResult = Tuple[List[Tuple[Transaction, Transaction]], List[Transaction], List[Transaction]]
+
+MATCH_MODES = ('greedy', 'global')
+
+
+def find_candidate(
+    index: TransactionIndex,
+    transaction: Transaction,
+    tolerance_days: int,
+    threshold: int,
+    descriptions: Optional[DescriptionIndex] = None
+) -> Optional[int]:
+    """
+    Pick an unclaimed position in `index` for `transaction`: the first fit,
+    or with `descriptions` the most similar description inside the window.
+    """
+    amount = transaction.amount_milliunits
+    if descriptions is None:
+        return index.find(transaction.date, amount, tolerance_days, threshold)
+    query = trigrams(normalize_description(transaction_text(transaction)))
+    return descriptions.best(query, index.find_all(transaction.date, amount, tolerance_days, threshold))
+
+
+def _match_greedy(ynab_trans: Iterable[Transaction], csv_trans: Iterable[Transaction],
+                  tolerance_days: int, threshold: int, use_descriptions: bool) -> MatchResult:
+    index = TransactionIndex(csv_trans)
+    descriptions = DescriptionIndex(index) if use_descriptions else None
+
+    matches = []
+    unmatched_ynab = []
+
+    for yt in ynab_trans:
+        position = find_candidate(index, yt, tolerance_days, threshold, descriptions)
+        if position is None:
+            unmatched_ynab.append(yt)
+            continue
+        matches.append((yt, index.claim(position)))
+
+    return matches, unmatched_ynab, index.unclaimed()
+
+
+def _match_global(ynab_trans: Iterable[Transaction], csv_trans: Iterable[Transaction],
+                  tolerance_days: int, threshold: int) -> MatchResult:
+    # Batches are matched on their arrays directly; rows are materialised after
+    if not isinstance(ynab_trans, TransactionBatch):
+        ynab_trans = list(ynab_trans)
+    if not isinstance(csv_trans, TransactionBatch):
+        csv_trans = list(csv_trans)
+
+    pairs = match_global(ynab_trans, csv_trans, tolerance_days, threshold)
+    ynab_trans, csv_trans = list(ynab_trans), list(csv_trans)
+    matched_ynab = {y for y, _ in pairs}
+    matched_csv = {c for _, c in pairs}
+
+    matches = [(ynab_trans[y], csv_trans[c]) for y, c in pairs]
+    unmatched_ynab = [t for i, t in enumerate(ynab_trans) if i not in matched_ynab]
+    unmatched_csv = [t for i, t in enumerate(csv_trans) if i not in matched_csv]
+    return matches, unmatched_ynab, unmatched_csv
+
+
+def find_matching_transactions(
+    ynab_trans: Iterable[Transaction],
+    csv_trans: Iterable[Transaction],
+    tolerance_days: int = 1,
+    amount_threshold: Amount = 0.01,
+    mode: str = 'greedy',
+    use_descriptions: bool = False
+) -> MatchResult:
+    """
+    Pair YNAB transactions with CSV transactions by date and amount.
+
+    mode='greedy': each YNAB transaction takes the first unmatched CSV
+    transaction (in CSV order) within `tolerance_days` and `amount_threshold`.
+    Candidates are looked up through a `TransactionIndex`, so the cost grows
+    with the number of transactions inside the window rather than with the
+    full CSV list. With `use_descriptions`, the candidate with the most
+    similar payee/description (trigram similarity) wins instead of the
+    first one, so same-day, same-amount rows are no longer paired by order.
+
+    mode='global': pairs are chosen by a minimum-cost assignment over all
+    candidates (date distance, amount delta, description similarity), which
+    maximises the number of matches and avoids first-fit mis-pairings.
+    Description similarity is always part of its cost.
+
+    Returns (matches, unmatched_ynab, unmatched_csv).
+    """
+    threshold = to_milliunits(amount_threshold)
+    if mode not in MATCH_MODES:
+        raise ValueError(f"Unknown matching mode: {mode}")
+    with span('match', mode=mode) as match_span:
+        if mode == 'greedy':
+            result = _match_greedy(ynab_trans, csv_trans, tolerance_days, threshold, use_descriptions)
+        else:
+            result = _match_global(ynab_trans, csv_trans, tolerance_days, threshold)
+        matches, unmatched_ynab, unmatched_csv = result
+        match_span.rows = 2 * len(matches) + len(unmatched_ynab) + len(unmatched_csv)
+        match_span.annotate(matches=len(matches))
+    return result
@@ -0,0 +1,172 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from ..adapters.base import Transaction
+from ..money import Amount, to_milliunits
+from ..tracing import span
+from .index import TransactionIndex
+
+# Candidates considered per target; beyond this the closest in date are kept.
+# Meet-in-the-middle enumerates at most sum(C(12, k), k <= max_size) subsets per half.
+MAX_CANDIDATES = 24
+
+
+@dataclass
+class GroupMatch:
+    """One transaction matched against several on the other side (e.g. a card settlement)"""
+    target: Transaction
+    members: List[Transaction]
+    target_side: str  # 'ynab' or 'csv'
+
+
+def _subset_sums(amounts: Sequence[int], offset: int, limit: int, max_size: int) -> List[Tuple[int, Tuple[int, ...]]]:
+    """All subsets of up to max_size items whose (positive) sum stays within limit"""
+    sums: List[Tuple[int, Tuple[int, ...]]] = [(0, ())]
+    for i, amount in enumerate(amounts):
+        sums += [
+            (total + amount, members + (offset + i,))
+            for total, members in sums
+            if len(members) < max_size and total + amount <= limit
+        ]
+    return sums
+
+
+def find_subset(amounts: Sequence[int], target: int, threshold: int, max_size: int) -> Optional[Tuple[int, ...]]:
+    """
+    Smallest subset (2..max_size items) of positive `amounts` summing to
+    `target` within `threshold`, found by meet-in-the-middle: subset sums of
+    each half are enumerated with pruning and the halves joined by binary
+    search.
+    """
+    limit = target + threshold
+    half = len(amounts) // 2
+    left = _subset_sums(amounts[:half], 0, limit, max_size)
+    right = sorted(_subset_sums(amounts[half:], half, limit, max_size))
+    right_sums = [total for total, _ in right]
+
+    best = None
+    for total, members in left:
+        lo = bisect_left(right_sums, target - threshold - total)
+        hi = bisect_right(right_sums, limit - total)
+        for _, other in right[lo:hi]:
+            size = len(members) + len(other)
+            if 2 <= size <= max_size and (best is None or size < len(best)):
+                best = members + other
+    return best
+
+
+def _split_amounts(transaction: Transaction) -> List[int]:
+    """Milliunit amounts of a YNAB split's live subtransactions; empty for other rows"""
+    raw = transaction.raw_data or {}
+    return [
+        sub['amount'] for sub in raw.get('subtransactions') or ()
+        if not sub.get('deleted') and sub.get('amount')
+    ]
+
+
+def _match_split(
+    target: Transaction,
+    splits: Sequence[int],
+    pool: TransactionIndex,
+    tolerance_days: int,
+    threshold: int
+) -> Optional[List[Transaction]]:
+    """
+    One pool row per subtransaction of a YNAB split, each within the date
+    window and threshold of its part; None (with nothing claimed) unless
+    every part finds one.
+    """
+    claimed: List[int] = []
+    for amount in splits:
+        position = pool.find(target.date, amount, tolerance_days, threshold)
+        if position is None:
+            for p in claimed:
+                pool.release(p)
+            return None
+        pool.claim(position)
+        claimed.append(position)
+    return [pool[p] for p in claimed]
+
+
+def _match_targets(
+    targets: Sequence[Transaction],
+    pool: TransactionIndex,
+    tolerance_days: int,
+    threshold: int,
+    max_group_size: int,
+    target_side: str
+) -> Tuple[List[GroupMatch], List[Transaction]]:
+    groups = []
+    unmatched_targets = []
+    for target in targets:
+        splits = _split_amounts(target) if target_side == 'ynab' else []
+        if len(splits) >= 2:
+            # A split paid part by part: its subtransactions name the bank rows to look for,
+            # whatever their number; otherwise it is searched like any other target
+            parts = _match_split(target, splits, pool, tolerance_days, threshold)
+            if parts is not None:
+                groups.append(GroupMatch(target=target, members=parts, target_side=target_side))
+                continue
+        amount = target.amount_milliunits
+        sign = 1 if amount > 0 else -1
+        # Same-sign candidates in the date window, no larger than the target itself
+        window = pool.find_all(target.date, amount // 2, tolerance_days, abs(amount) // 2 + threshold)
+        candidates = [
+            p for p in window
+            if 0 < pool[p].amount_milliunits * sign <= abs(amount) + threshold
+        ]
+        if len(candidates) < 2:
+            unmatched_targets.append(target)
+            continue
+        if len(candidates) > MAX_CANDIDATES:
+            day = target.date.toordinal()
+            candidates = sorted(candidates, key=lambda p: (abs(pool[p].date.toordinal() - day), p))[:MAX_CANDIDATES]
+
+        subset = find_subset(
+            [pool[p].amount_milliunits * sign for p in candidates], abs(amount), threshold, max_group_size
+        )
+        if subset is None:
+            unmatched_targets.append(target)
+            continue
+        members = [pool.claim(candidates[i]) for i in sorted(subset)]
+        groups.append(GroupMatch(target=target, members=members, target_side=target_side))
+    return groups, unmatched_targets
+
+
+def find_group_matches(
+    unmatched_ynab: Sequence[Transaction],
+    unmatched_csv: Sequence[Transaction],
+    tolerance_days: int = 1,
+    amount_threshold: Amount = 0.01,
+    max_group_size: int = 4
+) -> Tuple[List[GroupMatch], List[Transaction], List[Transaction]]:
+    """
+    Match one transaction against a group of 2..max_group_size transactions
+    on the other side whose amounts sum to it (within `amount_threshold`)
+    and whose dates are within `tolerance_days` of it.
+
+    Meant to run on the residual of 1:1 matching. CSV rows are tried as
+    targets first (one card settlement covering several YNAB entries), then
+    YNAB rows (one YNAB entry paid in several bank rows). A YNAB split whose
+    subtransactions each match a bank row is grouped with those rows, even
+    beyond `max_group_size`.
+
+    Returns (groups, unmatched_ynab, unmatched_csv).
+    """
+    threshold = to_milliunits(amount_threshold)
+
+    with span('match.groups', rows=len(unmatched_ynab) + len(unmatched_csv)) as groups_span:
+        ynab_pool = TransactionIndex(unmatched_ynab)
+        groups, remaining_csv = _match_targets(
+            unmatched_csv, ynab_pool, tolerance_days, threshold, max_group_size, 'csv'
+        )
+
+        csv_pool = TransactionIndex(remaining_csv)
+        ynab_groups, remaining_ynab = _match_targets(
+            ynab_pool.unclaimed(), csv_pool, tolerance_days, threshold, max_group_size, 'ynab'
+        )
+        groups.extend(ynab_groups)
+        groups_span.annotate(groups=len(groups))
+
+    return groups, remaining_ynab, csv_pool.unclaimed()
@@ -0,0 +1,110 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..adapters.base import Transaction
+
+
+class TransactionIndex:
+    """
+    Hash-bucketed lookup structure for transactions.
+
+    Unclaimed positions are kept per exact (calendar day, milliunit amount)
+    key, so an exact-amount lookup is a dict hit per day. Each day also keeps
+    its distinct amounts sorted, so a non-zero amount window is located with
+    a binary search instead of a scan.
+    """
+
+    def __init__(self, transactions: Iterable[Transaction] = ()):
+        self._transactions: List[Transaction] = []
+        self._positions: Dict[Tuple[int, int], List[int]] = {}  # (day, amount) -> unclaimed positions, ascending
+        self._amounts: Dict[int, List[int]] = {}  # day -> sorted amounts with unclaimed positions
+        self.extend(transactions)
+
+    def extend(self, transactions: Iterable[Transaction]) -> None:
+        """Add transactions to the index, keeping their insertion order"""
+        touched = set()
+        for transaction in transactions:
+            position = len(self._transactions)
+            self._transactions.append(transaction)
+            day = transaction.date.toordinal()
+            positions = self._positions.get((day, transaction.amount_milliunits))
+            if positions is None:
+                self._positions[(day, transaction.amount_milliunits)] = [position]
+                self._amounts.setdefault(day, []).append(transaction.amount_milliunits)
+                touched.add(day)
+            else:
+                positions.append(position)
+
+        for day in touched:
+            self._amounts[day].sort()
+
+    def _window(self, date: datetime, amount: int, tolerance_days: int, threshold: int) -> Iterator[List[int]]:
+        """Yield the ascending unclaimed positions of each key inside the window"""
+        day = date.toordinal()
+        for candidate_day in range(day - tolerance_days, day + tolerance_days + 1):
+            if threshold == 0:
+                positions = self._positions.get((candidate_day, amount))
+                if positions:
+                    yield positions
+                continue
+            amounts = self._amounts.get(candidate_day)
+            if not amounts:
+                continue
+            start = bisect_left(amounts, amount - threshold)
+            end = bisect_right(amounts, amount + threshold)
+            for candidate_amount in amounts[start:end]:
+                yield self._positions[(candidate_day, candidate_amount)]
+
+    def find(self, date: datetime, amount: int, tolerance_days: int, threshold: int) -> Optional[int]:
+        """
+        Return the earliest-inserted unclaimed position within the window.
+
+        `amount` and `threshold` are in milliunits. Returning the lowest
+        position keeps results identical to a first-fit scan over the list.
+        """
+        return min((positions[0] for positions in self._window(date, amount, tolerance_days, threshold)), default=None)
+
+    def find_all(self, date: datetime, amount: int, tolerance_days: int, threshold: int) -> List[int]:
+        """Return every unclaimed position within the window, in insertion order"""
+        return sorted(chain.from_iterable(self._window(date, amount, tolerance_days, threshold)))
+
+    def claim(self, position: int) -> Transaction:
+        """Remove a position from the lookup buckets and return its transaction"""
+        transaction = self._transactions[position]
+        day = transaction.date.toordinal()
+        key = (day, transaction.amount_milliunits)
+        positions = self._positions[key]
+        del positions[bisect_left(positions, position)]
+        if not positions:
+            del self._positions[key]
+            amounts = self._amounts[day]
+            del amounts[bisect_left(amounts, transaction.amount_milliunits)]
+        return transaction
+
+    def release(self, position: int) -> None:
+        """Put a claimed position back into the lookup buckets"""
+        transaction = self._transactions[position]
+        day = transaction.date.toordinal()
+        key = (day, transaction.amount_milliunits)
+        positions = self._positions.get(key)
+        if positions is None:
+            self._positions[key] = [position]
+            insort(self._amounts.setdefault(day, []), transaction.amount_milliunits)
+        else:
+            insort(positions, position)
+
+    def unclaimed(self) -> List[Transaction]:
+        """Return transactions that have not been claimed, in insertion order"""
+        positions = sorted(chain.from_iterable(self._positions.values()))
+        return [self._transactions[position] for position in positions]
+
+    def __getitem__(self, position: int) -> Transaction:
+        return self._transactions[position]
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        return iter(self._transactions)
@@ -0,0 +1,169 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from ..adapters.base import Transaction, TransactionBatch
+from ..money import Amount, to_milliunits
+from ..tracing import span
+from .assignment import match_global
+from .description import DescriptionIndex
+from .engine import (MATCH_MODES, MatchResult, find_candidate,
+                     find_matching_transactions)
+from .index import TransactionIndex
+
+Transactions = Union[TransactionBatch, Sequence[Transaction]]
+
+# One partition: YNAB rows of a run of days and the CSV rows of the same days
+Partition = Tuple[TransactionBatch, np.ndarray, TransactionBatch, np.ndarray]
+
+# Independent blocks are packed into partitions of at least this many rows, so
+# sparse accounts do not turn into thousands of tiny worker tasks
+MIN_PARTITION_ROWS = 5000
+
+
+def _as_batch(transactions: Transactions) -> TransactionBatch:
+    """Columnar copy without raw data, cheap to pickle to worker processes"""
+    if isinstance(transactions, TransactionBatch):
+        batch = transactions.take(np.arange(len(transactions)))
+    else:
+        batch = TransactionBatch.from_transactions(transactions)
+    batch.raw_data = None
+    return batch
+
+
+def _materialise(transactions: Iterable[Transaction]) -> Transactions:
+    """Batches as they are, any other iterable as a list, so it can be read twice"""
+    return transactions if isinstance(transactions, TransactionBatch) else list(transactions)
+
+
+def _split(positions_by_block: np.ndarray, blocks: int) -> List[np.ndarray]:
+    """Ascending positions of each block, for blocks 0..blocks-1"""
+    order = np.argsort(positions_by_block, kind='stable')
+    return np.split(order, np.cumsum(np.bincount(positions_by_block, minlength=blocks))[:-1])
+
+
+def partition(ynab: TransactionBatch, csv: TransactionBatch, tolerance_days: int) -> List[Partition]:
+    """
+    Split one account pair into partitions that cannot interact.
+
+    The days of both sides are cut only where neither side has a
+    transaction for more than `tolerance_days` days, so no candidate pair
+    crosses a cut and matching each partition on its own gives the same
+    pairs as matching the whole account. Partitions without rows on both
+    sides are dropped (nothing in them can match); the rest are returned in
+    date order.
+    """
+    ynab_days, csv_days = ynab.days, csv.days
+    if not len(ynab_days) or not len(csv_days):
+        return []
+    days = np.unique(np.concatenate([ynab_days, csv_days]))
+    cuts = days[1:][np.diff(days) > tolerance_days]
+    ynab_blocks = _split(np.searchsorted(cuts, ynab_days, side='right'), len(cuts) + 1)
+    csv_blocks = _split(np.searchsorted(cuts, csv_days, side='right'), len(cuts) + 1)
+
+    partitions = []
+    ynab_parts: List[np.ndarray] = []
+    csv_parts: List[np.ndarray] = []
+    size = 0
+    for ynab_positions, csv_positions in zip(ynab_blocks, csv_blocks):
+        if not len(ynab_positions) or not len(csv_positions):
+            continue
+        ynab_parts.append(ynab_positions)
+        csv_parts.append(csv_positions)
+        size += len(ynab_positions) + len(csv_positions)
+        if size >= MIN_PARTITION_ROWS:
+            partitions.append((ynab_parts, csv_parts))
+            ynab_parts, csv_parts, size = [], [], 0
+    if ynab_parts:
+        partitions.append((ynab_parts, csv_parts))
+
+    result = []
+    for ynab_parts, csv_parts in partitions:
+        ynab_positions, csv_positions = np.concatenate(ynab_parts), np.concatenate(csv_parts)
+        result.append((ynab.take(ynab_positions), ynab_positions, csv.take(csv_positions), csv_positions))
+    return result
+
+
+def _match_pairs(ynab: Transactions, csv: Transactions, tolerance_days: int,
+                 threshold: int, mode: str, use_descriptions: bool) -> List[Tuple[int, int]]:
+    """Match two lists and return (ynab_position, csv_position) pairs"""
+    if mode == 'global':
+        return match_global(ynab, csv, tolerance_days, threshold)
+
+    index = TransactionIndex(csv)
+    descriptions = DescriptionIndex(index) if use_descriptions else None
+    pairs = []
+    for ynab_position, yt in enumerate(ynab):
+        csv_position = find_candidate(index, yt, tolerance_days, threshold, descriptions)
+        if csv_position is not None:
+            index.claim(csv_position)
+            pairs.append((ynab_position, csv_position))
+    return pairs
+
+
+def _match_partition(args: Tuple[Partition, int, int, str, bool]) -> List[Tuple[int, int]]:
+    """Worker entry point: match one partition and return pairs in account-level positions"""
+    (ynab, ynab_positions, csv, csv_positions), tolerance_days, threshold, mode, use_descriptions = args
+    ynab_rows = ynab if mode == 'global' else list(ynab)
+    csv_rows = csv if mode == 'global' else list(csv)
+    return [
+        (int(ynab_positions[y]), int(csv_positions[c]))
+        for y, c in _match_pairs(ynab_rows, csv_rows, tolerance_days, threshold, mode, use_descriptions)
+    ]
+
+
+def match_parallel(
+    jobs: Iterable[Tuple[Transactions, Transactions]],
+    tolerance_days: int = 1,
+    amount_threshold: Amount = 0.01,
+    mode: str = 'greedy',
+    use_descriptions: bool = False,
+    max_workers: Optional[int] = None
+) -> List[MatchResult]:
+    """
+    Match several account pairs on a process pool. Returns one
+    (matches, unmatched_ynab, unmatched_csv) per job, identical to
+    `find_matching_transactions` on that job.
+
+    Each account is split only at date gaps no candidate pair can cross
+    (see `partition`), so accounts with a transaction every few days stay
+    one task and the speedup comes from matching accounts side by side.
+    max_workers=1 runs `find_matching_transactions` inline.
+    """
+    if mode not in MATCH_MODES:
+        raise ValueError(f"Unknown matching mode: {mode}")
+    threshold = to_milliunits(amount_threshold)
+    jobs = [(_materialise(ynab), _materialise(csv)) for ynab, csv in jobs]
+
+    if max_workers == 1:
+        with span('match.parallel', mode=mode, partitions=len(jobs), workers=1):
+            return [
+                find_matching_transactions(ynab, csv, tolerance_days, amount_threshold, mode, use_descriptions)
+                for ynab, csv in jobs
+            ]
+
+    with span('match.partition', rows=sum(len(ynab) + len(csv) for ynab, csv in jobs)):
+        job_partitions = [partition(_as_batch(ynab), _as_batch(csv), tolerance_days) for ynab, csv in jobs]
+    tasks = [
+        (part, tolerance_days, threshold, mode, use_descriptions)
+        for partitions in job_partitions
+        for part in partitions
+    ]
+
+    with span('match.parallel', mode=mode, partitions=len(tasks), workers=max_workers):
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            task_pairs = list(executor.map(_match_partition, tasks))
+
+    results = []
+    task_iter = iter(task_pairs)
+    for (ynab, csv), partitions in zip(jobs, job_partitions):
+        ynab, csv = list(ynab), list(csv)
+        pairs = sorted(pair for _ in partitions for pair in next(task_iter))
+        matched_ynab = {y for y, _ in pairs}
+        matched_csv = {c for _, c in pairs}
+        matches = [(ynab[y], csv[c]) for y, c in pairs]
+        unmatched_ynab = [t for i, t in enumerate(ynab) if i not in matched_ynab]
+        unmatched_csv = [t for i, t in enumerate(csv) if i not in matched_csv]
+        results.append((matches, unmatched_ynab, unmatched_csv))
+    return results
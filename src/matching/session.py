@@ -0,0 +1,168 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+from ..adapters.base import Transaction
+from ..money import Amount, to_milliunits
+from ..tracing import span
+from .assignment import match_global
+from .description import DescriptionIndex
+from .engine import MATCH_MODES, MatchResult, find_candidate
+from .index import TransactionIndex
+
+
+class ReconciliationSession:
+    """
+    Loaded, indexed transactions plus the current match state.
+
+    `match()` only re-evaluates what a change can affect:
+    - widening the tolerances re-matches previously unmatched rows only;
+    - narrowing them unpairs matches that fall outside the new window and
+      re-matches the freed rows;
+    - added or removed transactions re-match the rows in their date/amount
+      window.
+    Existing pairs are kept, so after a change the result can differ from a
+    from-scratch run where a different first-fit pairing would have won.
+    """
+
+    def __init__(self, ynab_trans: Iterable[Transaction] = (), csv_trans: Iterable[Transaction] = (),
+                 mode: str = 'greedy', use_descriptions: bool = False):
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown matching mode: {mode}")
+        self.mode = mode
+        # Normalised descriptions of CSV rows, aligned with csv_index positions
+        self.descriptions: Optional[DescriptionIndex] = DescriptionIndex() if use_descriptions else None
+        # Claimed positions in these indexes are either matched or removed
+        self.ynab_index = TransactionIndex()
+        self.csv_index = TransactionIndex()
+        self.pairs: Dict[int, int] = {}  # ynab position -> csv position
+        self.tolerance_days: Optional[int] = None
+        self.threshold: Optional[int] = None
+        self._ynab_positions: Dict[int, int] = {}  # id(transaction) -> position
+        self._csv_positions: Dict[int, int] = {}
+        self._dirty: Set[int] = set()  # ynab positions to re-evaluate
+        self.add_ynab(ynab_trans)
+        self.add_csv(csv_trans)
+
+    def add_ynab(self, transactions: Iterable[Transaction]) -> None:
+        start = len(self.ynab_index)
+        transactions = list(transactions)
+        with span('match.index', rows=len(transactions), side='ynab'):
+            self.ynab_index.extend(transactions)
+            for position, transaction in enumerate(transactions, start):
+                self._ynab_positions[id(transaction)] = position
+                self._dirty.add(position)
+
+    def add_csv(self, transactions: Iterable[Transaction]) -> None:
+        start = len(self.csv_index)
+        transactions = list(transactions)
+        with span('match.index', rows=len(transactions), side='csv'):
+            self.csv_index.extend(transactions)
+            if self.descriptions is not None:
+                self.descriptions.extend(transactions)
+            for position, transaction in enumerate(transactions, start):
+                self._csv_positions[id(transaction)] = position
+                self._mark_window(transaction)
+
+    def remove_ynab(self, transactions: Iterable[Transaction]) -> None:
+        for transaction in transactions:
+            position = self._ynab_positions.pop(id(transaction))
+            self._dirty.discard(position)
+            if position in self.pairs:
+                csv_position = self.pairs.pop(position)
+                self.csv_index.release(csv_position)
+                self._mark_window(self.csv_index[csv_position])
+            else:
+                self.ynab_index.claim(position)
+
+    def remove_csv(self, transactions: Iterable[Transaction]) -> None:
+        partners = {c: y for y, c in self.pairs.items()}
+        for transaction in transactions:
+            position = self._csv_positions.pop(id(transaction))
+            if position in partners:
+                ynab_position = partners.pop(position)
+                del self.pairs[ynab_position]
+                self.ynab_index.release(ynab_position)
+                self._dirty.add(ynab_position)
+            else:
+                self.csv_index.claim(position)
+
+    def _mark_window(self, transaction: Transaction) -> None:
+        """Mark unmatched YNAB rows that could pair with this CSV row"""
+        if self.tolerance_days is None or self.threshold is None:
+            return
+        self._dirty.update(self.ynab_index.find_all(
+            transaction.date, transaction.amount_milliunits, self.tolerance_days, self.threshold
+        ))
+
+    def _unpair_outside(self, tolerance_days: int, threshold: int) -> None:
+        for ynab_position, csv_position in list(self.pairs.items()):
+            yt, ct = self.ynab_index[ynab_position], self.csv_index[csv_position]
+            if (abs(yt.date.toordinal() - ct.date.toordinal()) > tolerance_days
+                    or abs(yt.amount_milliunits - ct.amount_milliunits) > threshold):
+                del self.pairs[ynab_position]
+                self.ynab_index.release(ynab_position)
+                self.csv_index.release(csv_position)
+                self._dirty.add(ynab_position)
+                # Other unmatched YNAB rows may now take the freed CSV row
+                self._mark_window(ct)
+
+    def _pair(self, ynab_position: int, csv_position: int) -> None:
+        self.ynab_index.claim(ynab_position)
+        self.csv_index.claim(csv_position)
+        self.pairs[ynab_position] = csv_position
+
+    def _rematch(self, ynab_positions: List[int], tolerance_days: int, threshold: int) -> None:
+        if self.mode == 'greedy':
+            for ynab_position in ynab_positions:
+                csv_position = find_candidate(
+                    self.csv_index, self.ynab_index[ynab_position], tolerance_days, threshold,
+                    self.descriptions
+                )
+                if csv_position is not None:
+                    self._pair(ynab_position, csv_position)
+            return
+
+        csv_positions = sorted({
+            c
+            for y in ynab_positions
+            for c in self.csv_index.find_all(
+                self.ynab_index[y].date, self.ynab_index[y].amount_milliunits, tolerance_days, threshold
+            )
+        })
+        pairs = match_global(
+            [self.ynab_index[y] for y in ynab_positions],
+            [self.csv_index[c] for c in csv_positions],
+            tolerance_days,
+            threshold
+        )
+        for y, c in pairs:
+            self._pair(ynab_positions[y], csv_positions[c])
+
+    def match(self, tolerance_days: int = 1, amount_threshold: Amount = 0.01) -> MatchResult:
+        """Bring the match state up to date for these tolerances and return it"""
+        threshold = to_milliunits(amount_threshold)
+        if self.tolerance_days is None or self.threshold is None:
+            self._dirty = set(self._ynab_positions.values()) - set(self.pairs)
+        elif tolerance_days != self.tolerance_days or threshold != self.threshold:
+            narrowed = tolerance_days < self.tolerance_days or threshold < self.threshold
+            widened = tolerance_days > self.tolerance_days or threshold > self.threshold
+            # Set first so windows marked while unpairing use the new tolerances
+            self.tolerance_days, self.threshold = tolerance_days, threshold
+            if narrowed:
+                self._unpair_outside(tolerance_days, threshold)
+            if widened:
+                self._dirty.update(p for p in self._ynab_positions.values() if p not in self.pairs)
+
+        self.tolerance_days, self.threshold = tolerance_days, threshold
+        dirty = sorted(p for p in self._dirty if p not in self.pairs)
+        self._dirty = set()
+        if dirty:
+            with span('match.session', rows=len(dirty)):
+                self._rematch(dirty, tolerance_days, threshold)
+        return self.result()
+
+    def result(self) -> MatchResult:
+        matches = [
+            (self.ynab_index[y], self.csv_index[c])
+            for y, c in sorted(self.pairs.items())
+        ]
+        return matches, self.ynab_index.unclaimed(), self.csv_index.unclaimed()
@@ -0,0 +1,108 @@
+"""
+Exact money arithmetic.
+
+Amounts are integer milliunits (YNAB's native unit, 1000 per currency unit)
+from parsing to matching to write-back. Text is parsed as decimal, never
+through float; floats only appear when an amount is displayed.
+"""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Optional, Union
+
+MILLIUNITS = 1000
+
+# ISO 4217 currencies whose minor unit is not 1/100
+CURRENCY_DECIMALS = {
+    'BHD': 3, 'CLP': 0, 'ISK': 0, 'IQD': 3, 'JOD': 3, 'JPY': 0, 'KRW': 0,
+    'KWD': 3, 'LYD': 3, 'OMR': 3, 'PYG': 0, 'TND': 3, 'UGX': 0, 'VND': 0,
+}
+DEFAULT_DECIMALS = 2
+
+Amount = Union[int, float, str, Decimal]
+
+# Sign, whole units and up to three decimals; anything else is parsed by Decimal
+_AMOUNT_PATTERN = r'^(?P<sign>[+-]?)(?P<whole>\d{0,15})(?:\.(?P<fraction>\d{0,3}))?$'
+
+
+def currency_decimals(currency: Optional[str]) -> int:
+    return CURRENCY_DECIMALS.get((currency or '').upper(), DEFAULT_DECIMALS)
+
+
+def minor_unit(currency: Optional[str]) -> int:
+    """Milliunits in the currency's smallest unit, e.g. 10 for EUR and 1000 for JPY"""
+    return 10 ** (3 - currency_decimals(currency))
+
+
+def to_milliunits(amount: Amount) -> int:
+    """
+    Convert a currency amount to milliunits, rounding half away from zero.
+    Floats are converted through their shortest repr, so 0.01 is exactly 10.
+    """
+    value = Decimal(repr(amount)) if isinstance(amount, float) else Decimal(amount)
+    if not value.is_finite():
+        raise ValueError(f"Not a finite amount: {amount!r}")
+    return int(value.scaleb(3).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_milliunits(milliunits: int) -> Decimal:
+    return Decimal(int(milliunits)).scaleb(-3)
+
+
+def round_to_currency(milliunits, currency: Optional[str]):
+    """Round an int64 array of milliunits half away from zero to the currency's minor unit"""
+    import numpy as np
+
+    unit = minor_unit(currency)
+    if unit == 1:
+        return milliunits
+    magnitude = (np.abs(milliunits) + unit // 2) // unit * unit
+    return np.where(milliunits < 0, -magnitude, magnitude)
+
+
+def format_amount(milliunits: int, currency: Optional[str] = None) -> str:
+    """Group thousands and show the currency's decimals, e.g. '-1,234.50'"""
+    decimals = currency_decimals(currency)
+    value = from_milliunits(milliunits).quantize(Decimal(1).scaleb(-decimals), rounding=ROUND_HALF_UP)
+    return f"{value:,.{decimals}f}"
+
+
+def _parse_decimal(text: str) -> Optional[int]:
+    try:
+        milliunits = to_milliunits(Decimal(text))
+    except (InvalidOperation, ValueError):
+        return None
+    return milliunits if abs(milliunits) < 2 ** 63 else None
+
+
+def parse_milliunits(values, currency: Optional[str] = None):
+    """
+    Parse a Series of plain decimal strings ('-1234.5', no grouping) into a
+    nullable Int64 Series of milliunits; unparseable values become <NA>.
+    Amounts are rounded to the minor unit of `currency` when one is given.
+
+    The common shape is split into whole and fractional digits with Arrow
+    string kernels; longer fractions, exponents and the like fall back to
+    Decimal row by row.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    text = pc.utf8_trim_whitespace(pa.array(values.astype(object), type=pa.string(), from_pandas=True))
+    parts = pc.extract_regex(text, _AMOUNT_PATTERN)
+    whole = pc.struct_field(parts, 'whole')
+    fraction = pc.utf8_rpad(pc.struct_field(parts, 'fraction'), 3, '0')
+    digits = pc.binary_join_element_wise(pc.if_else(pc.equal(whole, ''), '0', whole), fraction, '')
+    # '', '-' and '.' match the pattern but hold no digits
+    empty = pc.and_(pc.equal(whole, ''), pc.equal(pc.struct_field(parts, 'fraction'), ''))
+    magnitude = pc.cast(pc.if_else(empty, pa.scalar(None, pa.string()), digits), pa.int64())
+    signed = pc.if_else(pc.equal(pc.struct_field(parts, 'sign'), '-'), pc.negate(magnitude), magnitude)
+
+    milliunits = signed.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get).set_axis(values.index)
+
+    fallback = milliunits.isna() & values.notna()
+    if fallback.any():
+        milliunits[fallback] = pd.array([_parse_decimal(str(v)) for v in values[fallback]], dtype='Int64')
+    if currency is not None and minor_unit(currency) > 1:
+        valid = milliunits.notna()
+        milliunits[valid] = round_to_currency(milliunits[valid].to_numpy(dtype='int64'), currency)
+    return milliunits
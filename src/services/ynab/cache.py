@@ -0,0 +1,156 @@
+import json
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ...tracing import span
+from .client import YNABClient
+
+DEFAULT_CACHE_PATH = Path("data/cache/ynab.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    budget_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    server_knowledge INTEGER NOT NULL,
+    since_date TEXT,
+    synced_at TEXT NOT NULL,
+    PRIMARY KEY (budget_id, account_id)
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    budget_id TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (budget_id, account_id, id)
+);
+CREATE INDEX IF NOT EXISTS transactions_by_date ON transactions (budget_id, account_id, date);
+"""
+
+
+class TransactionCache:
+    """
+    Local SQLite store of raw YNAB transactions keyed by budget and account.
+
+    The first load fetches the full list and records YNAB's server_knowledge;
+    later loads send it back as last_knowledge_of_server so only changed and
+    deleted transactions are downloaded and merged in.
+    """
+
+    def __init__(self, path: Path = DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per operation so the cache is safe to share across Streamlit threads
+        return sqlite3.connect(self.path)
+
+    def get_transactions(
+        self,
+        client: YNABClient,
+        budget_id: str,
+        account_id: Optional[str] = None,
+        since_date: Optional[datetime] = None,
+        full_resync: bool = False,
+        until_date: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Sync the budget/account with YNAB and return the cached slice from
+        since_date to until_date (inclusive); the slice is selected in SQL.
+        """
+        scope = account_id or ''
+        since = since_date.strftime('%Y-%m-%d') if since_date else None
+        state = self._get_state(budget_id, scope)
+
+        # A cache filled from a later since_date cannot answer an earlier one
+        covers = state is not None and (state['since_date'] is None or (since is not None and since >= state['since_date']))
+
+        if full_resync or state is None or not covers:
+            transactions, server_knowledge = client.get_transactions_delta(budget_id, account_id, since_date)
+            with span('ynab.cache.write', rows=len(transactions), full=True):
+                self._replace(budget_id, scope, transactions, server_knowledge, since)
+        else:
+            transactions, server_knowledge = client.get_transactions_delta(
+                budget_id, account_id, last_knowledge_of_server=state['server_knowledge']
+            )
+            with span('ynab.cache.write', rows=len(transactions), full=False):
+                self._merge(budget_id, scope, transactions, server_knowledge)
+
+        until = until_date.strftime('%Y-%m-%d') if until_date else None
+        with span('ynab.cache.read') as read_span:
+            cached = self._read(budget_id, scope, since, until)
+            read_span.rows = len(cached)
+        return cached
+
+    def invalidate(self, budget_id: Optional[str] = None, account_id: Optional[str] = None) -> None:
+        """Drop cached transactions for one account, one budget, or everything"""
+        clauses, params = [], []
+        if budget_id is not None:
+            clauses.append("budget_id = ?")
+            params.append(budget_id)
+            if account_id is not None:
+                clauses.append("account_id = ?")
+                params.append(account_id)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"DELETE FROM transactions{where}", params)
+            conn.execute(f"DELETE FROM sync_state{where}", params)
+
+    def _get_state(self, budget_id: str, scope: str) -> Optional[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT server_knowledge, since_date FROM sync_state WHERE budget_id = ? AND account_id = ?",
+                (budget_id, scope)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'server_knowledge': row[0], 'since_date': row[1]}
+
+    def _replace(self, budget_id: str, scope: str, transactions: List[Dict[str, Any]],
+                 server_knowledge: int, since: Optional[str]) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM transactions WHERE budget_id = ? AND account_id = ?", (budget_id, scope))
+            self._upsert(conn, budget_id, scope, [t for t in transactions if not t.get('deleted')])
+            self._save_state(conn, budget_id, scope, server_knowledge, since)
+
+    def _merge(self, budget_id: str, scope: str, transactions: List[Dict[str, Any]], server_knowledge: int) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "DELETE FROM transactions WHERE budget_id = ? AND account_id = ? AND id = ?",
+                [(budget_id, scope, t['id']) for t in transactions if t.get('deleted')]
+            )
+            self._upsert(conn, budget_id, scope, [t for t in transactions if not t.get('deleted')])
+            conn.execute(
+                "UPDATE sync_state SET server_knowledge = ?, synced_at = ? WHERE budget_id = ? AND account_id = ?",
+                (server_knowledge, datetime.now().isoformat(), budget_id, scope)
+            )
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, budget_id: str, scope: str, transactions: List[Dict[str, Any]]) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO transactions (budget_id, account_id, id, date, payload) VALUES (?, ?, ?, ?, ?)",
+            [(budget_id, scope, t['id'], t['date'], json.dumps(t)) for t in transactions]
+        )
+
+    @staticmethod
+    def _save_state(conn: sqlite3.Connection, budget_id: str, scope: str,
+                    server_knowledge: int, since: Optional[str]) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_state (budget_id, account_id, server_knowledge, since_date, synced_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (budget_id, scope, server_knowledge, since, datetime.now().isoformat())
+        )
+
+    def _read(self, budget_id: str, scope: str, since: Optional[str], until: Optional[str]) -> List[Dict[str, Any]]:
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT payload FROM transactions WHERE budget_id = ? AND account_id = ? AND date >= ? AND date <= ? "
+                "ORDER BY date, id",
+                (budget_id, scope, since or '', until or '9999-12-31')
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
@@ -1,62 +1,328 @@
-from dataclasses import dataclass
+import random
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
+from ...tracing import span
 from .config import YNABConfig
 
+# YNAB allows 200 requests per hour per access token
+RATE_LIMIT_REQUESTS = 200
+RATE_LIMIT_PERIOD = 3600.0
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Rejections that can come from a single bad item, so a chunk is split to find it;
+# any other error (e.g. 401, 403, 404) fails the whole chunk at once
+BISECT_STATUSES = {400, 422}
+
+# Transactions per bulk create/update request
+WRITE_CHUNK_SIZE = 500
+
+
+class RateLimitExceeded(Exception):
+    """Raised when no request budget becomes available within the allowed wait"""
+
 
 @dataclass
 class YNABBudget:
     id: str
     name: str
     last_modified: datetime
+    currency: Optional[str] = None  # ISO code of the budget's currency format
     
 @dataclass
 class YNABAccount:
     id: str
     name: str
     type: str
-    balance: float
+    balance: int  # Milliunits
     closed: bool = False
 
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at capacity/period tokens per second."""
+
+    def __init__(self, capacity: int = RATE_LIMIT_REQUESTS, period: float = RATE_LIMIT_PERIOD):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, max_wait: float) -> None:
+        """Take one token, waiting up to max_wait seconds for it"""
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self.lock:
+                self._refill()
+                blocked = self.blocked_until - time.monotonic()
+                if blocked <= 0 and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(blocked, (1 - self.tokens) / self.rate)
+            if time.monotonic() + wait > deadline:
+                raise RateLimitExceeded(f"YNAB request budget exhausted; next slot in {wait:.0f}s")
+            time.sleep(wait)
+
+    def block(self, seconds: float) -> None:
+        """Hold back every request for the next `seconds` (e.g. after a 429)"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    @property
+    def available(self) -> float:
+        with self.lock:
+            self._refill()
+            return self.tokens
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def _bucket_for(api_key: str) -> TokenBucket:
+    """Share one bucket per access token across all clients in the process"""
+    with _buckets_lock:
+        if api_key not in _buckets:
+            _buckets[api_key] = TokenBucket()
+        return _buckets[api_key]
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    retries: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.requests if self.requests else 0.0
+
+
+@dataclass
+class RequestMetrics:
+    """Per-endpoint latency and quota counters for a client"""
+    endpoints: Dict[str, EndpointStats] = field(default_factory=dict)
+    # Last value of YNAB's X-Rate-Limit header, e.g. "36/200"
+    rate_limit: Optional[str] = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, endpoint: str, seconds: float, status: Optional[int], retried: bool) -> None:
+        with self.lock:
+            stats = self.endpoints.setdefault(endpoint, EndpointStats())
+            stats.requests += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            if retried:
+                stats.retries += 1
+            if status is None or status >= 400:
+                stats.errors += 1
+            if status == 429:
+                stats.rate_limited += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            return {
+                endpoint: {
+                    'requests': s.requests,
+                    'retries': s.retries,
+                    'errors': s.errors,
+                    'rate_limited': s.rate_limited,
+                    'mean_seconds': s.mean_seconds,
+                    'max_seconds': s.max_seconds,
+                }
+                for endpoint, s in self.endpoints.items()
+            }
+
+
+@dataclass
+class WriteResult:
+    """Outcome of a bulk create or update"""
+    transactions: List[Dict[str, Any]] = field(default_factory=list)  # As returned by YNAB
+    duplicate_import_ids: List[str] = field(default_factory=list)  # Already imported; skipped by YNAB
+    failed: List[Tuple[Dict[str, Any], str]] = field(default_factory=list)  # (payload, error)
+    requests: int = 0
+    server_knowledge: Optional[int] = None
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+
+
+def _error_message(error: requests.HTTPError) -> str:
+    """The HTTP error plus the `error.detail` YNAB puts in the response body, when there is one"""
+    if error.response is None:
+        return str(error)
+    try:
+        detail = error.response.json()['error']['detail']
+    except (KeyError, TypeError, ValueError):
+        return str(error)
+    return f"{error} ({detail})" if detail else str(error)
+
+
 class YNABClient:
-    def __init__(self, config: YNABConfig):
+    def __init__(
+        self,
+        config: YNABConfig,
+        timeout: Tuple[float, float] = (5.0, 30.0),
+        max_retries: int = 4,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        max_rate_wait: float = 60.0,
+        pool_size: int = 10,
+        bucket: Optional[TokenBucket] = None,
+        metadata_ttl: Optional[float] = None
+    ):
         self.config = config
+        self.metadata_ttl = config.metadata_ttl if metadata_ttl is None else metadata_ttl
+        self._metadata: Dict[Tuple[str, ...], Tuple[float, Any]] = {}
+        self._metadata_lock = threading.Lock()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_rate_wait = max_rate_wait
+        self.bucket = bucket or _bucket_for(config.api_key)
+        self.metrics = RequestMetrics()
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.headers.update({
             "Authorization": f"Bearer {config.api_key}"
         })
+
+    def _backoff_seconds(self, attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _request(self, method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+        """
+        Send a request through the rate limiter, retrying connection errors,
+        429 and 5xx responses with exponential backoff. Retry-After is honoured
+        when the server sends it.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        with span('ynab.request', method=method, endpoint=endpoint) as request_span:
+            attempt = 0
+            while True:
+                self.bucket.acquire(self.max_rate_wait)
+                started = time.perf_counter()
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout):
+                    self.metrics.record(endpoint, time.perf_counter() - started, None, attempt > 0)
+                    if attempt >= self.max_retries:
+                        raise
+                    time.sleep(self._backoff_seconds(attempt))
+                    attempt += 1
+                    continue
+
+                self.metrics.record(endpoint, time.perf_counter() - started, response.status_code, attempt > 0)
+                if 'X-Rate-Limit' in response.headers:
+                    self.metrics.rate_limit = response.headers['X-Rate-Limit']
+
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    request_span.bytes = len(response.content)
+                    request_span.annotate(status=response.status_code, attempts=attempt + 1)
+                    response.raise_for_status()
+                    return response
+
+                retry_after = _retry_after_seconds(response)
+                if retry_after is not None and retry_after > self.max_rate_wait:
+                    response.raise_for_status()
+                delay = retry_after if retry_after is not None else self._backoff_seconds(attempt)
+                if response.status_code == 429:
+                    # Make every client sharing this token back off, not just this one;
+                    # the next acquire() waits the block out
+                    self.bucket.block(delay)
+                else:
+                    time.sleep(delay)
+                attempt += 1
+
+    def _get(self, url: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        return self._request("GET", url, endpoint, **kwargs).json()['data']
     
+    def _cached(self, key: Tuple[str, ...], load: Callable[[], List[Any]]) -> List[Any]:
+        """Return a metadata list from the TTL cache, loading it on a miss"""
+        now = time.monotonic()
+        with self._metadata_lock:
+            entry = self._metadata.get(key)
+            if entry is not None and entry[0] > now:
+                return list(entry[1])
+        value = load()
+        with self._metadata_lock:
+            self._metadata[key] = (now + self.metadata_ttl, value)
+        return list(value)
+
+    def invalidate_metadata(self, budget_id: Optional[str] = None) -> None:
+        """Forget cached budgets/accounts: everything, or one budget's accounts"""
+        with self._metadata_lock:
+            if budget_id is None:
+                self._metadata.clear()
+            else:
+                self._metadata.pop(('accounts', budget_id), None)
+
     def get_budgets(self) -> List[YNABBudget]:
-        """Get list of budgets."""
-        response = self.session.get(f"{self.config.api_url}/budgets")
-        response.raise_for_status()
+        """Get list of budgets (cached for metadata_ttl seconds)."""
+        return self._cached(('budgets',), self._fetch_budgets)
+
+    def get_accounts(self, budget_id: str) -> List[YNABAccount]:
+        """Get list of accounts for a budget (cached for metadata_ttl seconds)."""
+        return self._cached(('accounts', budget_id), lambda: self._fetch_accounts(budget_id))
+
+    def _fetch_budgets(self) -> List[YNABBudget]:
+        data = self._get(f"{self.config.api_url}/budgets", endpoint="budgets")
         
         budgets = []
-        for b in response.json()['data']['budgets']:
+        for b in data['budgets']:
             budget = YNABBudget(
                 id=b['id'],
                 name=b['name'],
-                last_modified=datetime.strptime(b['last_modified_on'], '%Y-%m-%dT%H:%M:%S%z')
+                last_modified=datetime.strptime(b['last_modified_on'], '%Y-%m-%dT%H:%M:%S%z'),
+                currency=(b.get('currency_format') or {}).get('iso_code')
             )
             budgets.append(budget)
             
         return budgets
     
-    def get_accounts(self, budget_id: str) -> List[YNABAccount]:
-        """Get list of accounts for a budget."""
-        response = self.session.get(f"{self.config.api_url}/budgets/{budget_id}/accounts")
-        response.raise_for_status()
+    def _fetch_accounts(self, budget_id: str) -> List[YNABAccount]:
+        data = self._get(f"{self.config.api_url}/budgets/{budget_id}/accounts", endpoint="accounts")
         
         accounts = []
-        for a in response.json()['data']['accounts']:
+        for a in data['accounts']:
             account = YNABAccount(
                 id=a['id'],
                 name=a['name'],
                 type=a['type'],
-                balance=float(a['balance']) / 1000,  # Convert milliunits to actual amount
+                balance=a['balance'],
                 closed=a['closed']
             )
             accounts.append(account)
@@ -65,9 +331,26 @@ class YNABClient:
     
     def get_transactions(self, budget_id: str, account_id: str = None, since_date: datetime = None) -> List[Dict[str, Any]]:
         """Get transactions for a budget and optionally specific account."""
-        params = {}
+        transactions, _ = self.get_transactions_delta(budget_id, account_id, since_date)
+        return transactions
+
+    def get_transactions_delta(
+        self,
+        budget_id: str,
+        account_id: Optional[str] = None,
+        since_date: Optional[datetime] = None,
+        last_knowledge_of_server: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Get transactions plus the server_knowledge to pass on the next call.
+        With last_knowledge_of_server, only transactions changed since then
+        are returned, including deleted ones (flagged `deleted: true`).
+        """
+        params: Dict[str, Any] = {}
         if since_date:
             params['since_date'] = since_date.strftime('%Y-%m-%d')
+        if last_knowledge_of_server is not None:
+            params['last_knowledge_of_server'] = last_knowledge_of_server
             
         # If account_id is provided, get transactions for specific account
         url = f"{self.config.api_url}/budgets/{budget_id}"
@@ -76,6 +359,105 @@ class YNABClient:
         else:
             url += "/transactions"
             
-        response = self.session.get(url, params=params)
-        response.raise_for_status()
-        return response.json()['data']['transactions']
+        data = self._get(url, endpoint="transactions", params=params)
+        return data['transactions'], data['server_knowledge']
+
+    def create_transactions(
+        self,
+        budget_id: str,
+        transactions: List[Dict[str, Any]],
+        chunk_size: int = WRITE_CHUNK_SIZE
+    ) -> WriteResult:
+        """
+        Create transactions with YNAB's bulk POST endpoint, `chunk_size` per
+        request. Give each one an `import_id` so re-running is idempotent:
+        YNAB skips ids it already has and reports them as duplicates.
+        """
+        return self._write("POST", budget_id, transactions, chunk_size, "transactions.create")
+
+    def update_transactions(
+        self,
+        budget_id: str,
+        updates: List[Dict[str, Any]],
+        chunk_size: int = WRITE_CHUNK_SIZE
+    ) -> WriteResult:
+        """
+        Update transactions (each with its `id` and the fields to change,
+        e.g. {'id': ..., 'cleared': 'cleared'}) with the bulk PATCH endpoint.
+        """
+        return self._write("PATCH", budget_id, updates, chunk_size, "transactions.update")
+
+    def _write(
+        self,
+        method: str,
+        budget_id: str,
+        items: List[Dict[str, Any]],
+        chunk_size: int,
+        endpoint: str
+    ) -> WriteResult:
+        """
+        Send items in chunks. Transient errors are retried by `_request`; a
+        chunk rejected with 400 or 422 is split in halves until the offending
+        items are isolated, so only those fail. Other errors fail the chunk. Items YNAB did not confirm are sent
+        once more on their own.
+        """
+        url = f"{self.config.api_url}/budgets/{budget_id}/transactions"
+        result = WriteResult()
+        for start in range(0, len(items), chunk_size):
+            missing = self._send_chunk(method, url, endpoint, items[start:start + chunk_size], result)
+            if missing:
+                for item in self._send_chunk(method, url, endpoint, missing, result):
+                    result.failed.append((item, "not confirmed by YNAB"))
+        return result
+
+    def _send_chunk(
+        self,
+        method: str,
+        url: str,
+        endpoint: str,
+        items: List[Dict[str, Any]],
+        result: WriteResult
+    ) -> List[Dict[str, Any]]:
+        """Send one chunk, recording outcomes in `result`; returns items missing from the response"""
+        result.requests += 1
+        try:
+            data = self._request(method, url, endpoint, json={'transactions': items}).json()['data']
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status in BISECT_STATUSES and len(items) > 1:
+                middle = len(items) // 2
+                return (
+                    self._send_chunk(method, url, endpoint, items[:middle], result)
+                    + self._send_chunk(method, url, endpoint, items[middle:], result)
+                )
+            result.failed.extend((item, _error_message(e)) for item in items)
+            return []
+        except (requests.RequestException, RateLimitExceeded) as e:
+            result.failed.extend((item, str(e)) for item in items)
+            return []
+
+        returned = data.get('transactions') or []
+        duplicates = data.get('duplicate_import_ids') or []
+        result.transactions.extend(returned)
+        result.duplicate_import_ids.extend(duplicates)
+        if data.get('server_knowledge') is not None:
+            result.server_knowledge = max(result.server_knowledge or 0, data['server_knowledge'])
+
+        if method == "POST":
+            confirmed = {t.get('import_id') for t in returned} | set(duplicates)
+            return [item for item in items if item.get('import_id') and item['import_id'] not in confirmed]
+        confirmed = {t.get('id') for t in returned}
+        return [item for item in items if item.get('id') not in confirmed]
+
+
+_shared_clients: Dict[Tuple[str, str], YNABClient] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_shared_client(config: YNABConfig) -> YNABClient:
+    """Return the process-wide client for this token and API URL, creating it once"""
+    key = (config.api_key, config.api_url)
+    with _shared_clients_lock:
+        if key not in _shared_clients:
+            _shared_clients[key] = YNABClient(config)
+        return _shared_clients[key]
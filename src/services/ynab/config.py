@@ -1,6 +1,7 @@
 import os
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Dict
 
 import yaml
 
@@ -9,6 +10,7 @@ import yaml
 class YNABConfig:
     api_key: str
     api_url: str = "https://api.ynab.com/v1"
+    metadata_ttl: float = 300.0  # Seconds to cache budget/account lists
     
     @classmethod
     def load(cls, config_path: Path = None) -> 'YNABConfig':
@@ -17,12 +19,23 @@ class YNABConfig:
         api_key = os.environ.get('YNAB_API_KEY')
         
         # If not in env vars, try config file
-        if not api_key and config_path and config_path.exists():
+        settings: Dict[str, Any] = {}
+        if config_path and config_path.exists():
             with open(config_path) as f:
-                config = yaml.safe_load(f)
-                api_key = config.get('ynab', {}).get('api_key')
+                settings = (yaml.safe_load(f) or {}).get('ynab') or {}
+        if not api_key:
+            api_key = settings.get('api_key')
         
         if not api_key:
             raise ValueError("YNAB API key not found in environment or config file")
+        
+        config = cls(api_key=api_key)
+        # Allow pointing the client at a local stub server
+        api_url = os.environ.get('YNAB_API_URL')
+        if api_url:
+            config.api_url = api_url.rstrip('/')
+        metadata_ttl = os.environ.get('YNAB_METADATA_TTL', settings.get('metadata_ttl'))
+        if metadata_ttl is not None:
+            config.metadata_ttl = float(metadata_ttl)
             
-        return cls(api_key=api_key)
+        return config
@@ -0,0 +1,169 @@
+"""
+Lightweight spans for timing pipeline stages.
+
+    with span('csv.load', bytes=len(data)) as s:
+        batch = adapter.load_batch()
+        s.rows = len(batch)
+
+Spans are only recorded while a Trace is active in the current context
+(`with Trace() as trace:` or `activate(trace)`). Otherwise `span` returns a
+shared no-op object, so instrumentation costs one ContextVar lookup.
+Worker threads see the trace when started with `contextvars.copy_context()`.
+"""
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional
+
+_active: ContextVar[Optional['Trace']] = ContextVar('trace', default=None)
+
+
+class Span:
+    __slots__ = ('trace', 'name', 'start', 'end', 'thread', 'rows', 'bytes', 'attrs')
+
+    def __init__(self, trace: 'Trace', name: str, rows: Optional[int], bytes: Optional[int], attrs: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.rows = rows
+        self.bytes = bytes
+        self.attrs = attrs
+        self.thread = threading.get_ident()
+        self.start = self.end = 0.0
+
+    def __enter__(self) -> 'Span':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.trace._add(self)
+
+    def annotate(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    @property
+    def seconds(self) -> float:
+        return self.end - self.start
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off; attribute writes are ignored"""
+    __slots__ = ()
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+    def annotate(self, **attrs) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name: str, rows: Optional[int] = None, bytes: Optional[int] = None, **attrs):
+    """Time a block as `name`; set `.rows`/`.bytes` on the result to count what it handled"""
+    trace = _active.get()
+    if trace is None:
+        return _NOOP
+    return Span(trace, name, rows, bytes, attrs)
+
+
+def activate(trace: Optional['Trace']) -> Token:
+    """Make `trace` (or None, turning tracing off) the active trace of this context"""
+    return _active.set(trace)
+
+
+def current() -> Optional['Trace']:
+    return _active.get()
+
+
+class Trace:
+    """Collects finished spans; thread-safe"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._token: Optional[Token] = None
+
+    def _add(self, finished: Span) -> None:
+        with self._lock:
+            self.spans.append(finished)
+
+    def __enter__(self) -> 'Trace':
+        self._token = activate(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._token is not None:
+            _active.reset(self._token)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Totals per span name, slowest first"""
+        totals: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for s in spans:
+            entry = totals.setdefault(s.name, {'name': s.name, 'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                                               'rows': None, 'bytes': None})
+            entry['calls'] += 1
+            entry['seconds'] += s.seconds
+            entry['max_seconds'] = max(entry['max_seconds'], s.seconds)
+            if s.rows is not None:
+                entry['rows'] = (entry['rows'] or 0) + s.rows
+            if s.bytes is not None:
+                entry['bytes'] = (entry['bytes'] or 0) + s.bytes
+        return sorted(totals.values(), key=lambda e: e['seconds'], reverse=True)
+
+    def to_json(self) -> str:
+        with self._lock:
+            spans = list(self.spans)
+        return json.dumps({
+            'summary': self.summary(),
+            'spans': [
+                {
+                    'name': s.name,
+                    'start': s.start - self.origin,
+                    'seconds': s.seconds,
+                    'thread': s.thread,
+                    'rows': s.rows,
+                    'bytes': s.bytes,
+                    **s.attrs,
+                }
+                for s in sorted(spans, key=lambda s: s.start)
+            ],
+        }, default=str)
+
+    def to_chrome_trace(self) -> str:
+        """Trace Event Format, for chrome://tracing or https://ui.perfetto.dev"""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+        events = []
+        for s in sorted(spans, key=lambda s: s.start):
+            args = dict(s.attrs)
+            if s.rows is not None:
+                args['rows'] = s.rows
+            if s.bytes is not None:
+                args['bytes'] = s.bytes
+            events.append({
+                'name': s.name,
+                'cat': s.name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': (s.start - self.origin) * 1e6,
+                'dur': s.seconds * 1e6,
+                'pid': pid,
+                'tid': s.thread,
+                'args': args,
+            })
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, default=str)
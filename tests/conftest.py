@@ -0,0 +1,65 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pytest
+
+from src.services.ynab.client import TokenBucket, YNABClient
+from src.services.ynab.config import YNABConfig
+
+# (status, JSON body, headers) returned by a stub route
+Reply = Tuple[int, Any, Dict[str, str]]
+
+
+class StubYNAB:
+    """
+    A local YNAB API. `reply(method, path, body)` answers every request;
+    each request is recorded in `calls` as (method, path, parsed body).
+    """
+
+    def __init__(self):
+        self.calls: List[Tuple[str, str, Optional[Dict[str, Any]]]] = []
+        self.reply: Callable[[str, str, Optional[Dict[str, Any]]], Reply] = lambda method, path, body: (404, {}, {})
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                stub.calls.append((self.command, self.path, body))
+                status, payload, headers = stub.reply(self.command, self.path, body)
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = _handle
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    def client(self, **kwargs) -> YNABClient:
+        """A client against the stub with its own bucket and quick retries"""
+        kwargs.setdefault('backoff', 0.01)
+        kwargs.setdefault('bucket', TokenBucket())
+        return YNABClient(YNABConfig(api_key='test-token', api_url=self.url), **kwargs)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def ynab_stub():
+    stub = StubYNAB()
+    yield stub
+    stub.close()
@@ -0,0 +1,78 @@
+import random
+from datetime import datetime, timedelta
+from itertools import permutations
+from typing import List, Set, Tuple
+
+import numpy as np
+import pytest
+
+from src.adapters.base import Transaction
+from src.matching import assignment
+from src.matching.assignment import match_global, solve_assignment
+
+START = datetime(2024, 1, 1)
+
+
+def _row(day: int, amount: int, bank: str = 'LHV') -> Transaction:
+    return Transaction(date=START + timedelta(days=day), description='', amount_milliunits=amount, bank_name=bank)
+
+
+def _fits(y: Transaction, c: Transaction, tolerance_days: int, threshold: int) -> bool:
+    return (abs(y.date.toordinal() - c.date.toordinal()) <= tolerance_days
+            and abs(y.amount_milliunits - c.amount_milliunits) <= threshold)
+
+
+def _maximum_matching_size(edges: List[Set[int]], taken: frozenset = frozenset()) -> int:
+    """Brute force: each YNAB row is either left out or given a free CSV row it fits"""
+    if not edges:
+        return 0
+    best = _maximum_matching_size(edges[1:], taken)
+    for c in edges[0] - taken:
+        best = max(best, 1 + _maximum_matching_size(edges[1:], taken | {c}))
+    return best
+
+
+def _check(pairs: List[Tuple[int, int]], ynab, csv, tolerance_days: int, threshold: int):
+    assert len({r for r, _ in pairs}) == len(pairs) == len({c for _, c in pairs})
+    assert all(_fits(ynab[r], csv[c], tolerance_days, threshold) for r, c in pairs)
+    edges = [{c for c, t in enumerate(csv) if _fits(y, t, tolerance_days, threshold)} for y in ynab]
+    assert len(pairs) == _maximum_matching_size(edges)
+
+
+def _random_rows(rng: random.Random, bank: str) -> List[Transaction]:
+    return [_row(rng.randrange(12), rng.choice([-1000, -1000, -1010, -2000]), bank) for _ in range(rng.randint(0, 9))]
+
+
+@pytest.mark.parametrize('block_size', [128, 3, 1])
+@pytest.mark.parametrize('seed', range(200))
+def test_match_global_is_a_maximum_matching(seed, block_size, monkeypatch):
+    monkeypatch.setattr(assignment, 'MAX_BLOCK_SIZE', block_size)
+    rng = random.Random(seed)
+    ynab, csv = _random_rows(rng, 'YNAB'), _random_rows(rng, 'LHV')
+    tolerance_days, threshold = rng.randint(0, 3), rng.choice([0, 10])
+    _check(match_global(ynab, csv, tolerance_days, threshold), ynab, csv, tolerance_days, threshold)
+
+
+def test_small_blocks_do_not_strand_a_row(monkeypatch):
+    # Solved alone, the first block takes the cheaper CSV row, which is the
+    # only one the later YNAB row fits
+    monkeypatch.setattr(assignment, 'MAX_BLOCK_SIZE', 1)
+    ynab = [_row(1, -1000, 'YNAB'), _row(3, -1000, 'YNAB')]
+    csv = [_row(2, -1000), _row(0, -1010)]
+    assert sorted(match_global(ynab, csv, 1, 10)) == [(0, 1), (1, 0)]
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_solve_assignment_finds_the_cheapest_assignment(seed):
+    rng = np.random.default_rng(seed)
+    n, m = (int(k) for k in rng.integers(1, 6, size=2))
+    cost = rng.integers(0, 20, size=(n, m)).astype(float)
+
+    pairs = solve_assignment(cost)
+    assert len(pairs) == min(n, m)
+    assert len({r for r, _ in pairs}) == len({c for _, c in pairs}) == len(pairs)
+    if n <= m:
+        best = min(sum(cost[r, c] for r, c in enumerate(p)) for p in permutations(range(m), n))
+    else:
+        best = min(sum(cost[r, c] for c, r in enumerate(p)) for p in permutations(range(n), m))
+    assert sum(cost[r, c] for r, c in pairs) == best
@@ -0,0 +1,65 @@
+import os
+import shutil
+
+import pytest
+
+from src.adapters.csv import (bank_names, get_csv_adapter, mapping,
+                              register_adapter, spec)
+from src.adapters.csv.lhv_csv import LHVCSVAdapter
+
+COOP = """
+Coop:
+  date_format: "%d.%m.%Y"
+  columns:
+    date: Kuupäev
+    description: Selgitus
+    amount: Summa
+"""
+
+STATEMENT = "Kuupäev,Selgitus,Summa\n05.01.2024,Pood,-12.50\n".encode('utf-8')
+
+
+@pytest.fixture
+def banks_file(tmp_path, monkeypatch):
+    """A copy of banks.yaml the registry reads instead of the real one"""
+    path = tmp_path / "banks.yaml"
+    shutil.copy(spec.DEFAULT_BANKS_PATH, path)
+    monkeypatch.setattr(mapping, 'load_bank_specs', lambda: spec.load_bank_specs(path))
+    yield path
+    monkeypatch.undo()
+    mapping._REGISTERED.pop('Hand-written', None)
+    mapping.refresh_adapters()
+
+
+def _edit(path, text):
+    stat = path.stat()
+    path.write_text(text, encoding='utf-8')
+    # Make the change visible even on filesystems with coarse timestamps
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_old_lhv_import_path_gives_the_registered_adapter():
+    assert get_csv_adapter('LHV', b"Date,Amount\n").__class__ is LHVCSVAdapter
+
+
+def test_registry_is_rebuilt_when_banks_yaml_changes(banks_file):
+    original = banks_file.read_text(encoding='utf-8')
+    with pytest.raises(ValueError):
+        get_csv_adapter('Coop', STATEMENT)
+
+    _edit(banks_file, original + COOP)
+    assert 'Coop' in bank_names()
+    batch = get_csv_adapter(None, STATEMENT).load_batch()
+    assert batch.amounts.tolist() == [-12500]
+    assert get_csv_adapter('Coop', STATEMENT).get_bank_name() == 'Coop'
+
+    _edit(banks_file, original)
+    assert 'Coop' not in bank_names()
+    with pytest.raises(ValueError):
+        get_csv_adapter('Coop', STATEMENT)
+
+
+def test_hand_written_adapters_survive_a_rebuild(banks_file):
+    register_adapter('Hand-written', LHVCSVAdapter)
+    _edit(banks_file, banks_file.read_text(encoding='utf-8') + COOP)
+    assert {'LHV', 'Coop', 'Hand-written'} <= set(bank_names())
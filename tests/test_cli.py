@@ -0,0 +1,19 @@
+from src.cli import _parse_export
+
+STATEMENT = "Date,Description,Amount\n2024-01-05,Cafe,-4.50\n"
+
+
+def test_a_bad_export_is_skipped_with_its_reason(tmp_path):
+    good, headerless, unknown = tmp_path / "good.csv", tmp_path / "headerless.csv", tmp_path / "unknown.csv"
+    good.write_text(STATEMENT, encoding='utf-8')
+    headerless.write_text("Date,Amount\n2024-01-05,-4.50\n", encoding='utf-8')
+    unknown.write_text(STATEMENT, encoding='utf-8')
+
+    path, batch, summary = _parse_export((str(good), 'LHV', None, False))
+    assert batch is not None and batch.amounts.tolist() == [-4500]
+
+    path, batch, summary = _parse_export((str(headerless), 'LHV', None, False))
+    assert (path, batch) == (str(headerless), None) and 'description' in summary
+
+    path, batch, summary = _parse_export((str(unknown), 'No such bank', None, False))
+    assert batch is None and 'No such bank' in summary
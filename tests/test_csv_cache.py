@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.adapters.base import CATEGORICAL_FIELDS, TransactionBatch
+from src.adapters.csv import StatementCache, get_csv_adapter
+
+HEADER = ("Customer account no,Date,Description,Amount,Debit/Credit (D/C),"
+          "Sender/receiver name,Sender/receiver account,Reference number\n")
+
+STATEMENT = (HEADER
+             + "EE01,2024-01-02,,\"15,37\",D,,,\n"
+             + "EE01,2024-01-03,Card payment,\"1,00\",C,SHOP,EE02,123\n"
+             + "EE01,not a date,Broken,\"2,00\",D,SHOP,,\n"
+             + "EE01,2024-01-04,Card payment,\"1,00\",C,SHOP,EE02,123\n"
+             + "EE01,2024-01-05,Salary,\"2500,00\",C,EMPLOYER,,\n").encode('utf-8')
+
+
+def _assert_same_batch(actual: TransactionBatch, expected: TransactionBatch):
+    np.testing.assert_array_equal(actual.dates, expected.dates)
+    np.testing.assert_array_equal(actual.amounts, expected.amounts)
+    assert actual.descriptions.tolist() == expected.descriptions.tolist()
+    assert actual.counterparties.tolist() == expected.counterparties.tolist()
+    for name in CATEGORICAL_FIELDS:
+        assert actual.column(name).tolist() == expected.column(name).tolist()
+    pd.testing.assert_frame_equal(actual.raw_data.reset_index(drop=True), expected.raw_data.reset_index(drop=True))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StatementCache(tmp_path)
+
+
+def test_cache_hit_equals_miss_and_uncached_parse(cache):
+    uncached = get_csv_adapter('LHV', STATEMENT).load_batch()
+    miss_adapter = get_csv_adapter('LHV', STATEMENT, cache=cache)
+    miss = miss_adapter.load_batch()
+    hit_adapter = get_csv_adapter('LHV', STATEMENT, cache=cache)
+    hit = hit_adapter.load_batch()
+
+    assert uncached.descriptions.tolist() == ['', 'Card payment', 'Card payment', 'Salary']
+    _assert_same_batch(miss, uncached)
+    _assert_same_batch(hit, uncached)
+    assert len(miss_adapter.errors) == len(hit_adapter.errors) == 1
+
+
+def test_streaming_miss_and_hit_equal_whole_load(cache):
+    expected = get_csv_adapter('LHV', STATEMENT).load_batch()
+
+    miss = list(get_csv_adapter('LHV', STATEMENT, cache=cache).iter_transactions(chunksize=2))
+    assert len(list(cache.path.glob('*.arrow'))) == 1
+    hit_adapter = get_csv_adapter('LHV', STATEMENT, cache=cache)
+    hit = list(hit_adapter.iter_transactions(chunksize=2))
+
+    assert max(len(batch) for batch in miss + hit) <= 2
+    _assert_same_batch(TransactionBatch.concat(miss), expected)
+    _assert_same_batch(TransactionBatch.concat(hit), expected)
+    assert len(hit_adapter.errors) == 1
+
+
+def test_statement_read_halfway_is_not_cached(cache):
+    chunks = get_csv_adapter('LHV', STATEMENT, cache=cache).iter_transactions(chunksize=2)
+    next(chunks)
+    chunks.close()
+    assert not list(cache.path.iterdir())
+    # The whole-statement path still finds nothing and parses afresh
+    assert len(get_csv_adapter('LHV', STATEMENT, cache=cache).load_batch()) == 4
@@ -0,0 +1,123 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from src.adapters.base import TransactionBatch
+from src.adapters.dedup import (EXACT, NEAR, StatementMerger, dedup_ynab,
+                                merge_statements)
+from src.adapters.ynab.source import _to_batch
+
+# (date, milliunits, counterparty)
+Row = Tuple[str, int, str]
+
+
+def _statement(rows: List[Row], account: str = 'EE01') -> TransactionBatch:
+    return TransactionBatch(
+        dates=[date for date, _, _ in rows],
+        amounts=[amount for _, amount, _ in rows],
+        descriptions=[f"Card payment {counterparty}" for _, _, counterparty in rows],
+        account_id=account,
+        counterparties=[counterparty for _, _, counterparty in rows],
+    )
+
+
+def _kept(batch: TransactionBatch) -> List[Row]:
+    return list(zip(np.datetime_as_string(batch.dates, unit='D').tolist(), batch.amounts.tolist(),
+                    batch.counterparties.tolist()))
+
+
+def test_overlapping_statements_collapse_exact_repeats():
+    january = _statement([('2024-01-05', -4500, 'CAFE'), ('2024-01-20', -4500, 'CAFE'), ('2024-01-31', -900, 'BAKERY')])
+    january_to_february = _statement([('2024-01-20', -4500, 'CAFE'), ('2024-01-31', -900, 'BAKERY'),
+                                      ('2024-02-03', -4500, 'CAFE')])
+    merged = merge_statements([january, january_to_february])
+    assert _kept(merged.batch) == [('2024-01-05', -4500, 'CAFE'), ('2024-01-20', -4500, 'CAFE'),
+                                   ('2024-01-31', -900, 'BAKERY'), ('2024-02-03', -4500, 'CAFE')]
+    assert len(merged.exact) == 2 and len(merged.near) == 0
+    assert merged.exact_of.tolist() == [1, 2]
+
+
+def test_identical_rows_within_one_statement_are_kept():
+    rows = [('2024-01-05', -300, 'CAFE'), ('2024-01-05', -300, 'CAFE')]
+    merged = merge_statements([_statement(rows), _statement(rows + [('2024-01-06', -300, 'CAFE')])])
+    # Both coffees survive; the second statement repeats them and adds one more
+    assert _kept(merged.batch) == rows + [('2024-01-06', -300, 'CAFE')]
+    assert len(merged.exact) == 2 and len(merged.near) == 0
+
+
+def test_date_shift_inside_the_overlap_is_a_near_duplicate():
+    first = _statement([('2024-01-10', -2000, 'SHOP'), ('2024-01-15', -100, 'KIOSK')])
+    second = _statement([('2024-01-11', -2000, 'SHOP'), ('2024-01-20', -700, 'SHOP')])
+    merged = merge_statements([first, second])
+    assert [kind for kind, _, _ in merged.pairs()] == [NEAR]
+    assert _kept(merged.batch) == [('2024-01-10', -2000, 'SHOP'), ('2024-01-15', -100, 'KIOSK'),
+                                   ('2024-01-20', -700, 'SHOP')]
+
+
+def test_consecutive_statements_without_overlap_keep_adjacent_charges():
+    # The same charge on Jan 31 and Feb 1 is two real transactions when the exports do not overlap
+    january = _statement([('2024-01-02', -1500, 'GYM'), ('2024-01-31', -999, 'STREAMING')])
+    february = _statement([('2024-02-01', -999, 'STREAMING'), ('2024-02-27', -1500, 'GYM')])
+    merged = merge_statements([january, february])
+    assert merged.duplicates == 0
+    assert len(merged.batch) == 4
+
+
+def test_different_accounts_never_collapse():
+    rows = [('2024-01-05', -300, 'CAFE')]
+    merged = merge_statements([_statement(rows, 'EE01'), _statement(rows, 'EE02')])
+    assert merged.duplicates == 0
+
+
+def test_chunked_statement_matches_whole_statement():
+    first = _statement([(f'2024-01-0{day}', -100 * day, 'SHOP') for day in range(1, 9)])
+    second_rows = [('2024-01-05', -500, 'SHOP'), ('2024-01-05', -600, 'SHOP'), ('2024-01-09', -900, 'SHOP'),
+                   ('2024-01-02', -100, 'SHOP'), ('2024-01-09', -900, 'SHOP')]
+    whole = merge_statements([first, _statement(second_rows)])
+
+    merger = StatementMerger()
+    merger.add(first, source='first')
+    for start in range(0, len(second_rows), 2):
+        merger.add(_statement(second_rows[start:start + 2]), source='second')
+    chunked = merger.result()
+
+    assert _kept(chunked.batch) == _kept(whole.batch)
+    assert [(kind, d.amount_milliunits) for kind, _, d in chunked.pairs()] == \
+        [(kind, d.amount_milliunits) for kind, _, d in whole.pairs()]
+    assert sorted(kind for kind, _, _ in whole.pairs()) == [EXACT, NEAR, NEAR]
+    assert len(whole.batch) == 10
+
+
+def _ynab(id, date, amount, payee, import_id=None, payee_id=None, account='acc-1'):
+    return {'id': id, 'date': date, 'amount': amount, 'payee_name': payee, 'payee_id': payee_id,
+            'import_id': import_id, 'account_id': account, 'memo': None, 'category_name': None}
+
+
+def test_ynab_import_loaded_twice_is_an_exact_duplicate():
+    raw = [_ynab('a', '2024-01-05', -4500, 'Cafe', 'YNAB:-4500:2024-01-05:1'),
+           _ynab('b', '2024-01-05', -4500, 'Cafe', 'YNAB:-4500:2024-01-05:1')]
+    deduplicated = dedup_ynab(_to_batch(raw))
+    assert [kind for kind, _, _ in deduplicated.pairs()] == [EXACT]
+    assert len(deduplicated.batch) == 1
+
+
+def test_ynab_hand_entered_repeat_of_an_import_is_a_near_duplicate():
+    raw = [_ynab('imported', '2024-01-05', -4500, 'Corner Cafe', 'YNAB:-4500:2024-01-05:1'),
+           _ynab('typed', '2024-01-06', -4500, 'corner  cafe')]
+    deduplicated = dedup_ynab(_to_batch(raw))
+    assert [(kind, kept.raw_data['id'], duplicate.raw_data['id']) for kind, kept, duplicate in deduplicated.pairs()] == \
+        [(NEAR, 'imported', 'typed')]
+
+
+def test_ynab_same_payee_id_is_a_near_duplicate():
+    raw = [_ynab('imported', '2024-01-05', -4500, 'CORNER CAFE TALLINN', 'YNAB:-4500:2024-01-05:1', 'payee-1'),
+           _ynab('typed', '2024-01-05', -4500, 'Corner Cafe', payee_id='payee-1')]
+    assert len(dedup_ynab(_to_batch(raw)).near) == 1
+
+
+def test_ynab_same_amount_from_another_payee_on_the_next_day_is_kept():
+    raw = [_ynab('imported', '2024-01-05', -1000, 'Bakery', 'YNAB:-1000:2024-01-05:1', 'payee-1'),
+           _ynab('typed', '2024-01-06', -1000, 'Pharmacy', payee_id='payee-2')]
+    deduplicated = dedup_ynab(_to_batch(raw))
+    assert deduplicated.duplicates == 0
+    assert len(deduplicated.batch) == 2
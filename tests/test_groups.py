@@ -0,0 +1,86 @@
+import random
+from datetime import datetime, timedelta
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Sequence
+
+import pytest
+
+from src.adapters.base import Transaction
+from src.matching import find_group_matches
+from src.matching.groups import find_subset
+
+START = datetime(2024, 1, 1)
+
+
+def _row(day: int, amount: int, bank: str = 'LHV', raw: Optional[Dict[str, Any]] = None) -> Transaction:
+    return Transaction(date=START + timedelta(days=day), description='', amount_milliunits=amount, bank_name=bank,
+                       raw_data=raw or {})
+
+
+def _smallest_subset_size(amounts: List[int], target: int, threshold: int, max_size: int) -> Optional[int]:
+    for size in range(2, max_size + 1):
+        for subset in combinations(amounts, size):
+            if abs(sum(subset) - target) <= threshold:
+                return size
+    return None
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_find_subset_finds_a_smallest_subset(seed):
+    rng = random.Random(seed)
+    amounts = [rng.randint(1, 60) * 10 for _ in range(rng.randint(0, 10))]
+    target, threshold, max_size = rng.randint(2, 150) * 10, rng.choice([0, 10]), rng.randint(2, 4)
+
+    subset = find_subset(amounts, target, threshold, max_size)
+    expected_size = _smallest_subset_size(amounts, target, threshold, max_size)
+    if expected_size is None:
+        assert subset is None
+    else:
+        assert subset is not None and len(subset) == expected_size == len(set(subset))
+        assert abs(sum(amounts[i] for i in subset) - target) <= threshold
+
+
+def test_card_settlement_covers_several_ynab_entries():
+    ynab = [_row(1, -1200, 'YNAB'), _row(2, -800, 'YNAB'), _row(2, -5000, 'YNAB')]
+    settlement = _row(3, -2000)
+    groups, unmatched_ynab, unmatched_csv = find_group_matches(ynab, [settlement], tolerance_days=2, amount_threshold=0)
+
+    assert [(g.target, g.members, g.target_side) for g in groups] == [(settlement, ynab[:2], 'csv')]
+    assert unmatched_ynab == [ynab[2]] and unmatched_csv == []
+
+
+def test_ynab_entry_paid_in_several_bank_rows():
+    rent = _row(1, -900000, 'YNAB')
+    csv = [_row(1, -450000), _row(2, -450000), _row(2, -1000)]
+    groups, unmatched_ynab, unmatched_csv = find_group_matches([rent], csv, tolerance_days=1, amount_threshold=0)
+
+    assert [(g.target, g.members, g.target_side) for g in groups] == [(rent, csv[:2], 'ynab')]
+    assert unmatched_ynab == [] and unmatched_csv == [csv[2]]
+
+
+def _split(day: int, parts: List[int], deleted: Sequence[int] = ()) -> Transaction:
+    subtransactions = [{'id': f's{i}', 'amount': amount, 'deleted': False} for i, amount in enumerate(parts)]
+    subtransactions += [{'id': 'gone', 'amount': amount, 'deleted': True} for amount in deleted]
+    return _row(day, sum(parts), 'YNAB', {'id': 'split', 'subtransactions': subtransactions})
+
+
+def test_ynab_split_is_matched_part_by_part_beyond_the_group_size():
+    parts = [-1000, -2000, -3000, -4000, -5000, -6000]
+    split = _split(1, parts, deleted=[-7000])
+    csv = [_row(2, amount) for amount in reversed(parts)] + [_row(1, -7000)]
+    groups, unmatched_ynab, unmatched_csv = find_group_matches([split], csv, tolerance_days=1, amount_threshold=0,
+                                                              max_group_size=2)
+
+    assert len(groups) == 1 and groups[0].target is split and groups[0].target_side == 'ynab'
+    assert [m.amount_milliunits for m in groups[0].members] == parts
+    assert unmatched_ynab == [] and unmatched_csv == [csv[-1]]
+
+
+def test_split_without_a_bank_row_for_every_part_falls_back_to_subset_search():
+    split = _split(1, [-1000, -2500, -500])
+    csv = [_row(1, -1000), _row(1, -3000), _row(9, -500)]
+    groups, unmatched_ynab, unmatched_csv = find_group_matches([split], csv, tolerance_days=1, amount_threshold=0)
+
+    # The -500 part is outside the window, but -1000 and -3000 still add up to the split
+    assert [g.members for g in groups] == [csv[:2]]
+    assert unmatched_csv == [csv[2]]
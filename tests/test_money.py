@@ -0,0 +1,80 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.money import (format_amount, from_milliunits, minor_unit,
+                       parse_milliunits, round_to_currency, to_milliunits)
+
+
+@pytest.mark.parametrize('amount, expected', [
+    (0.01, 10),
+    (0.1 + 0.2, 300),
+    (19.99, 19990),
+    (-19.99, -19990),
+    ('1.0005', 1001),
+    ('-1.0005', -1001),
+    ('1.0004', 1000),
+    (Decimal('2.5e-3'), 3),
+    (12, 12000),
+])
+def test_to_milliunits_rounds_half_away_from_zero(amount, expected):
+    assert to_milliunits(amount) == expected
+
+
+@pytest.mark.parametrize('amount', [float('nan'), float('inf'), 'NaN'])
+def test_to_milliunits_rejects_non_finite_amounts(amount):
+    with pytest.raises(ValueError):
+        to_milliunits(amount)
+
+
+def test_from_milliunits_is_exact():
+    assert from_milliunits(-1234567) == Decimal('-1234.567')
+
+
+def test_minor_units():
+    assert (minor_unit('EUR'), minor_unit('jpy'), minor_unit('KWD'), minor_unit(None)) == (10, 1000, 1, 10)
+
+
+def test_round_to_currency_rounds_half_away_from_zero():
+    milliunits = np.array([1234, 1235, -1235, -1234, 5, -5, 0], dtype=np.int64)
+    assert round_to_currency(milliunits, 'EUR').tolist() == [1230, 1240, -1240, -1230, 10, -10, 0]
+    assert round_to_currency(np.array([1500, -1500, 2499]), 'JPY').tolist() == [2000, -2000, 2000]
+    assert round_to_currency(milliunits, 'KWD') is milliunits
+
+
+def test_parse_milliunits_matches_decimal_parsing():
+    values = pd.Series(['-1234.5', ' 0.01 ', '.5', '7', '+3.25', '1.23456', '1e3', '', '-', 'abc', None],
+                       index=range(10, 21))
+    parsed = parse_milliunits(values)
+    assert parsed.index.tolist() == list(range(10, 21))
+    assert parsed.tolist() == [-1234500, 10, 500, 7000, 3250, 1235, 1000000, pd.NA, pd.NA, pd.NA, pd.NA]
+
+
+@pytest.mark.parametrize('values, expected', [
+    (['abc'], [pd.NA]),
+    (['1e3'], [1000000]),
+    (['abc', '1.5e1'], [pd.NA, 15000]),
+])
+def test_parse_milliunits_when_every_value_falls_back(values, expected):
+    assert parse_milliunits(pd.Series(values)).tolist() == expected
+
+
+def test_parse_milliunits_rounds_to_the_currency():
+    values = pd.Series(['0.005', '-0.005', '1.004', '2.5', '12.3456'])
+    assert parse_milliunits(values, 'EUR').tolist() == [10, -10, 1000, 2500, 12350]
+    assert parse_milliunits(values, 'JPY').tolist() == [0, 0, 1000, 3000, 12000]
+
+
+def test_parse_milliunits_has_no_float_drift():
+    cents = np.arange(-100_000, 100_000, 7)
+    values = pd.Series([f"{c // 100}.{c % 100:02d}" if c >= 0 else f"-{-c // 100}.{-c % 100:02d}" for c in cents])
+    assert parse_milliunits(values, 'EUR').tolist() == (cents * 10).tolist()
+
+
+def test_format_amount():
+    assert format_amount(-1234500, 'EUR') == '-1,234.50'
+    assert format_amount(1005) == '1.01'
+    assert format_amount(1500, 'JPY') == '2'
+    assert format_amount(1234, 'KWD') == '1.234'
@@ -0,0 +1,103 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.adapters.base import Transaction
+from src.matching import find_matching_transactions, match_parallel, parallel
+
+WORDS = ['coffee', 'rent', 'grocer', 'fuel', 'salary', 'pharmacy']
+
+
+class _InlineExecutor:
+    """Runs worker tasks in-process so hundreds of cases stay fast"""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+    def map(self, func, iterable, **kwargs):
+        return map(func, iterable)
+
+
+def _random_pair(rng: random.Random):
+    """Clustered dates (so some gaps can be cut), few distinct amounts (so candidates compete), drift on the CSV side"""
+    start = datetime(2024, 1, 1)
+    clusters = [rng.randrange(120) for _ in range(rng.randint(1, 6))]
+    amounts = [rng.randint(-300, 300) * 10 for _ in range(rng.randint(1, 8))]
+
+    def row(bank):
+        day = rng.choice(clusters) + rng.randint(0, 4)
+        return Transaction(
+            date=start + timedelta(days=day),
+            description=f"{rng.choice(WORDS)} {rng.randint(1, 3)}",
+            amount_milliunits=rng.choice(amounts) + rng.choice([0, 0, 0, 10, -10]),
+            bank_name=bank,
+        )
+
+    ynab = [row('YNAB') for _ in range(rng.randint(0, 40))]
+    csv = [row('LHV') for _ in range(rng.randint(0, 40))]
+    for t in rng.sample(ynab, k=len(ynab) // 2):
+        csv.append(Transaction(date=t.date + timedelta(days=rng.randint(-2, 2)), description=t.description,
+                               amount_milliunits=t.amount_milliunits, bank_name='LHV'))
+    rng.shuffle(csv)
+    return ynab, csv
+
+
+def _positions(result, ynab, csv):
+    ynab_position = {id(t): i for i, t in enumerate(ynab)}
+    csv_position = {id(t): i for i, t in enumerate(csv)}
+    matches, unmatched_ynab, unmatched_csv = result
+    return (
+        [(ynab_position[id(y)], csv_position[id(c)]) for y, c in matches],
+        [ynab_position[id(t)] for t in unmatched_ynab],
+        [csv_position[id(t)] for t in unmatched_csv],
+    )
+
+
+@pytest.mark.parametrize('seed', range(600))
+def test_parallel_matches_serial(seed, monkeypatch):
+    monkeypatch.setattr(parallel, 'ProcessPoolExecutor', _InlineExecutor)
+    # Every independent block becomes its own partition
+    monkeypatch.setattr(parallel, 'MIN_PARTITION_ROWS', 1)
+    rng = random.Random(seed)
+    jobs = [_random_pair(rng) for _ in range(rng.randint(1, 3))]
+    tolerance_days = rng.randint(0, 3)
+    threshold = rng.choice([0, 0.01, 0.05])
+    mode = rng.choice(['greedy', 'global'])
+    use_descriptions = mode == 'greedy' and rng.random() < 0.5
+
+    results = match_parallel(jobs, tolerance_days, threshold, mode, use_descriptions, max_workers=4)
+    for (ynab, csv), result in zip(jobs, results):
+        serial = find_matching_transactions(ynab, csv, tolerance_days, threshold, mode, use_descriptions)
+        assert _positions(result, ynab, csv) == _positions(serial, ynab, csv)
+
+
+@pytest.mark.parametrize('mode', ['greedy', 'global'])
+def test_process_pool_matches_serial(mode):
+    rng = random.Random(7)
+    jobs = [_random_pair(rng) for _ in range(3)]
+    for max_workers in (1, 2):
+        results = match_parallel(jobs, 1, 0.01, mode, max_workers=max_workers)
+        for (ynab, csv), result in zip(jobs, results):
+            serial = find_matching_transactions(ynab, csv, 1, 0.01, mode)
+            assert _positions(result, ynab, csv) == _positions(serial, ynab, csv)
+
+
+def test_partition_cuts_at_gaps_wider_than_tolerance(monkeypatch):
+    monkeypatch.setattr(parallel, 'MIN_PARTITION_ROWS', 1)
+    start = datetime(2024, 1, 1)
+
+    def rows(days):
+        return [Transaction(date=start + timedelta(days=d), description='', amount_milliunits=1000) for d in days]
+
+    ynab = parallel._as_batch(rows([0, 1, 10, 30]))
+    # Blocks {0, 1, 2}, {5}, {10, 12}, {30}, {40}; the one-sided blocks are dropped
+    csv = parallel._as_batch(rows([2, 5, 12, 40]))
+    partitions = parallel.partition(ynab, csv, 2)
+    assert [(p[1].tolist(), p[3].tolist()) for p in partitions] == [([0, 1], [0]), ([2], [2])]
@@ -0,0 +1,102 @@
+import random
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+
+from src.adapters.base import Transaction
+from src.matching import find_matching_transactions
+from src.matching.session import ReconciliationSession
+
+START = datetime(2024, 1, 1)
+
+
+def _row(day: int, amount: int = -1000, bank: str = 'LHV') -> Transaction:
+    return Transaction(date=START + timedelta(days=day), description='', amount_milliunits=amount, bank_name=bank)
+
+
+def _pairs(result):
+    matches, unmatched_ynab, unmatched_csv = result
+    return sorted((id(y), id(c)) for y, c in matches), sorted(map(id, unmatched_ynab)), sorted(map(id, unmatched_csv))
+
+
+def _assert_maximal(result, tolerance_days: int, threshold: int):
+    """Every pair lies inside the window and no unmatched YNAB row could still take an unmatched CSV row"""
+    matches, unmatched_ynab, unmatched_csv = result
+
+    def fits(y, c):
+        return (abs(y.date.toordinal() - c.date.toordinal()) <= tolerance_days
+                and abs(y.amount_milliunits - c.amount_milliunits) <= threshold)
+
+    assert all(fits(y, c) for y, c in matches)
+    assert not any(fits(y, c) for y in unmatched_ynab for c in unmatched_csv)
+
+
+def test_narrowing_frees_a_csv_row_for_another_ynab_row():
+    y1, y2, c1 = _row(1, bank='YNAB'), _row(3, bank='YNAB'), _row(3)
+    session = ReconciliationSession([y1, y2], [c1])
+    assert _pairs(session.match(2, 0)) == _pairs(find_matching_transactions([y1, y2], [c1], 2, 0))
+    assert _pairs(session.match(1, 0)) == _pairs(find_matching_transactions([y1, y2], [c1], 1, 0))
+
+
+def test_widening_matches_previously_unmatched_rows():
+    ynab, csv = [_row(1, bank='YNAB'), _row(5, -2000, 'YNAB')], [_row(3), _row(5, -2010)]
+    session = ReconciliationSession(ynab, csv)
+    assert _pairs(session.match(0, 0)) == _pairs(find_matching_transactions(ynab, csv, 0, 0))
+    assert _pairs(session.match(2, 0.01)) == _pairs(find_matching_transactions(ynab, csv, 2, 0.01))
+
+
+def test_added_and_removed_rows_match_like_a_fresh_run():
+    ynab, csv = [_row(1, bank='YNAB'), _row(4, bank='YNAB')], [_row(2)]
+    session = ReconciliationSession(ynab, csv)
+    session.match(1, 0)
+
+    extra_csv = [_row(4)]
+    session.add_csv(extra_csv)
+    assert _pairs(session.match(1, 0)) == _pairs(find_matching_transactions(ynab, csv + extra_csv, 1, 0))
+
+    session.remove_ynab([ynab[0]])
+    expected = find_matching_transactions(ynab[1:], csv + extra_csv, 1, 0)
+    assert _pairs(session.match(1, 0)) == _pairs(expected)
+
+    session.remove_csv(extra_csv)
+    assert _pairs(session.match(1, 0)) == _pairs(find_matching_transactions(ynab[1:], csv, 1, 0))
+
+
+def _random_rows(rng: random.Random, bank: str) -> List[Transaction]:
+    return [_row(rng.randrange(20), rng.choice([-1000, -1010, -2000]), bank) for _ in range(rng.randint(0, 12))]
+
+
+@pytest.mark.parametrize('mode', ['greedy', 'global'])
+@pytest.mark.parametrize('seed', range(100))
+def test_incremental_changes_leave_no_missed_pairs(seed, mode):
+    rng = random.Random(seed)
+    ynab, csv = _random_rows(rng, 'YNAB'), _random_rows(rng, 'LHV')
+    session = ReconciliationSession(ynab, csv, mode=mode)
+    tolerance_days, threshold = rng.randint(0, 3), rng.choice([0, 10])
+    session.match(tolerance_days, threshold / 1000)
+
+    for _ in range(6):
+        change = rng.choice(['tolerance', 'add', 'remove'])
+        if change == 'tolerance':
+            tolerance_days, threshold = rng.randint(0, 3), rng.choice([0, 10])
+        elif change == 'add':
+            new_ynab, new_csv = _random_rows(rng, 'YNAB')[:3], _random_rows(rng, 'LHV')[:3]
+            session.add_ynab(new_ynab)
+            session.add_csv(new_csv)
+            ynab, csv = ynab + new_ynab, csv + new_csv
+        else:
+            gone_ynab, gone_csv = ynab[:rng.randint(0, 2)], csv[:rng.randint(0, 2)]
+            session.remove_ynab(gone_ynab)
+            session.remove_csv(gone_csv)
+            ynab, csv = ynab[len(gone_ynab):], csv[len(gone_csv):]
+
+        result = session.match(tolerance_days, threshold / 1000)
+        _assert_maximal(result, tolerance_days, threshold)
+        matches, unmatched_ynab, unmatched_csv = result
+        assert sorted(map(id, [y for y, _ in matches] + unmatched_ynab)) == sorted(map(id, ynab))
+        assert sorted(map(id, [c for _, c in matches] + unmatched_csv)) == sorted(map(id, csv))
+        scratch = find_matching_transactions(ynab, csv, tolerance_days, threshold / 1000, mode)
+        if mode == 'global':
+            # Kept pairs can block a larger assignment, never beat a fresh maximum one
+            assert len(matches) <= len(scratch[0])
@@ -0,0 +1,89 @@
+import time
+
+import pytest
+import requests
+
+from src.adapters.ynab.source import YNABSourceAdapter
+from src.services.ynab import client as client_module
+from src.tracing import Trace
+
+TRANSACTIONS = {'data': {'transactions': [{'id': 't1', 'date': '2024-01-05', 'amount': -4500, 'payee_name': 'Cafe',
+                                           'memo': None, 'account_id': 'acc-1', 'category_name': None}],
+                         'server_knowledge': 5}}
+
+
+def _replies(*replies):
+    """Answer requests with `replies` in order, repeating the last one"""
+    queue = list(replies)
+
+    def reply(method, path, body):
+        return queue.pop(0) if len(queue) > 1 else queue[0]
+    return reply
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of sleeping; jitter always takes its upper bound"""
+    recorded = []
+    monkeypatch.setattr(client_module.time, 'sleep', recorded.append)
+    monkeypatch.setattr(client_module.random, 'uniform', lambda low, high: high)
+    return recorded
+
+
+def test_429_waits_for_retry_after(ynab_stub):
+    ynab_stub.reply = _replies((429, {}, {'Retry-After': '1'}), (200, TRANSACTIONS, {'X-Rate-Limit': '2/200'}))
+    client = ynab_stub.client()
+
+    started = time.monotonic()
+    transactions = client.get_transactions('budget', 'acc-1')
+    assert time.monotonic() - started >= 0.9
+    assert [t['id'] for t in transactions] == ['t1']
+    assert len(ynab_stub.calls) == 2
+    stats = client.metrics.snapshot()['transactions']
+    assert (stats['requests'], stats['retries'], stats['rate_limited']) == (2, 1, 1)
+    assert client.metrics.rate_limit == '2/200'
+
+
+def test_retry_after_beyond_the_allowed_wait_fails_at_once(ynab_stub):
+    ynab_stub.reply = _replies((429, {}, {'Retry-After': '3600'}))
+    with pytest.raises(requests.HTTPError):
+        ynab_stub.client(max_rate_wait=5).get_transactions('budget')
+    assert len(ynab_stub.calls) == 1
+
+
+def test_5xx_is_retried_with_exponential_backoff(ynab_stub, sleeps):
+    ynab_stub.reply = _replies((503, {}, {}), (502, {}, {}), (500, {}, {}), (200, TRANSACTIONS, {}))
+    transactions = ynab_stub.client(backoff=0.5).get_transactions('budget')
+    assert [t['id'] for t in transactions] == ['t1']
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+def test_gives_up_once_the_retry_budget_is_spent(ynab_stub, sleeps):
+    ynab_stub.reply = _replies((503, {}, {}))
+    client = ynab_stub.client(max_retries=2, backoff=0.5)
+    with pytest.raises(requests.HTTPError) as error:
+        client.get_transactions('budget')
+    assert error.value.response.status_code == 503
+    assert len(ynab_stub.calls) == 3 and sleeps == [0.5, 1.0]
+    stats = client.metrics.snapshot()['transactions']
+    assert (stats['requests'], stats['retries'], stats['errors']) == (3, 2, 3)
+
+
+def test_4xx_is_not_retried(ynab_stub, sleeps):
+    ynab_stub.reply = _replies((404, {'error': {'id': '404.2', 'name': 'resource_not_found', 'detail': 'Not found'}}, {}))
+    with pytest.raises(requests.HTTPError):
+        ynab_stub.client().get_transactions('budget')
+    assert len(ynab_stub.calls) == 1 and sleeps == []
+
+
+def test_load_many_records_requests_inside_the_load_span(ynab_stub):
+    ynab_stub.reply = _replies((200, TRANSACTIONS, {}))
+    adapter = YNABSourceAdapter('budget', client=ynab_stub.client())
+    with Trace() as trace:
+        batch = adapter.load_many([('budget', 'acc-1', None), ('budget', 'acc-2', None)])
+
+    assert len(batch) == 2
+    load = next(s for s in trace.spans if s.name == 'ynab.load')
+    requests_made = [s for s in trace.spans if s.name == 'ynab.request']
+    assert len(requests_made) == 2
+    assert all(load.start <= s.start and s.end <= load.end for s in requests_made)
@@ -0,0 +1,100 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+from src.adapters.base import Transaction
+from src.adapters.ynab.writeback import clear_payloads, create_payloads
+from src.matching.groups import GroupMatch
+
+BAD_AMOUNT = 0
+
+
+def _bank(day: int, amount: int, counterparty: str = 'SHOP') -> Transaction:
+    return Transaction(date=datetime(2024, 1, day), description=f"Card payment {counterparty}",
+                       amount_milliunits=amount, counterparty=counterparty, bank_name='LHV')
+
+
+def _ynab(id: str, cleared: str = 'uncleared') -> Transaction:
+    return Transaction(date=datetime(2024, 1, 1), description='', amount_milliunits=-1000,
+                       raw_data={'id': id, 'cleared': cleared})
+
+
+class _Budget:
+    """Stub bulk-create endpoint: rejects a chunk holding a zero amount, skips import ids it has seen"""
+
+    def __init__(self):
+        self.imported: Dict[str, Dict[str, Any]] = {}
+
+    def __call__(self, method, path, body):
+        items: List[Dict[str, Any]] = body['transactions']
+        if any(item['amount'] == BAD_AMOUNT for item in items):
+            return 400, {'error': {'id': '400', 'name': 'bad_request', 'detail': 'amount must not be zero'}}, {}
+        created, duplicates = [], []
+        for item in items:
+            if item['import_id'] in self.imported:
+                duplicates.append(item['import_id'])
+            else:
+                self.imported[item['import_id']] = item
+                created.append(dict(item, id=f"t{len(self.imported)}"))
+        return 201, {'data': {'transactions': created, 'duplicate_import_ids': duplicates,
+                              'server_knowledge': len(self.imported)}}, {}
+
+
+def test_create_sends_one_request_per_chunk(ynab_stub):
+    ynab_stub.reply = _Budget()
+    statement = [_bank(day, -100 * day) for day in range(1, 8)]
+    result = ynab_stub.client().create_transactions('budget', create_payloads(statement, 'acc-1'), chunk_size=3)
+
+    assert [len(body['transactions']) for _, _, body in ynab_stub.calls] == [3, 3, 1]
+    assert {path for _, path, _ in ynab_stub.calls} == {'/budgets/budget/transactions'}
+    assert len(result.transactions) == 7 and result.requests == 3
+    assert not result.failed and result.server_knowledge == 7
+
+
+def test_rejected_chunk_is_bisected_down_to_the_bad_item(ynab_stub):
+    ynab_stub.reply = _Budget()
+    statement = [_bank(day, BAD_AMOUNT if day == 6 else -100 * day) for day in range(1, 9)]
+    payloads = create_payloads(statement, 'acc-1')
+    result = ynab_stub.client().create_transactions('budget', payloads, chunk_size=8)
+
+    assert [(payload['date'], payload['amount']) for payload, _ in result.failed] == [('2024-01-06', BAD_AMOUNT)]
+    assert 'amount must not be zero' in result.failed[0][1]
+    assert len(result.transactions) == 7
+    # Days 1-8 rejected; 1-4 created; 5-8 rejected; 5-6 rejected; 5 created, 6 failed; 7-8 created
+    assert [len(body['transactions']) for _, _, body in ynab_stub.calls] == [8, 4, 4, 2, 1, 1, 2]
+
+
+def test_rerun_reuses_import_ids_and_creates_nothing_new(ynab_stub):
+    budget = ynab_stub.reply = _Budget()
+    statement = [_bank(5, -4500, 'CAFE'), _bank(5, -4500, 'CAFE'), _bank(6, -900, 'BAKERY')]
+    client = ynab_stub.client()
+
+    first = client.create_transactions('budget', create_payloads(statement, 'acc-1'))
+    # The second run sees only the last two rows missing, but numbers occurrences over the whole statement
+    second = client.create_transactions('budget', create_payloads(statement[1:], 'acc-1', statement=statement))
+
+    assert sorted(budget.imported) == ['YNAB:-4500:2024-01-05:1', 'YNAB:-4500:2024-01-05:2', 'YNAB:-900:2024-01-06:1']
+    assert len(first.transactions) == 3
+    assert second.transactions == [] and second.duplicate_import_ids == ['YNAB:-4500:2024-01-05:2',
+                                                                         'YNAB:-900:2024-01-06:1']
+    assert not second.failed
+
+
+def test_clear_payloads_include_the_ynab_side_of_group_matches():
+    bank = _bank(1, -1000)
+    matches = [(_ynab('pair'), bank), (_ynab('done', cleared='cleared'), bank)]
+    groups = [
+        GroupMatch(target=_ynab('settlement'), members=[_bank(1, -400), _bank(1, -600)], target_side='ynab'),
+        GroupMatch(target=bank, members=[_ynab('part-1'), _ynab('part-2', cleared='reconciled')], target_side='csv'),
+    ]
+    assert [update['id'] for update in clear_payloads(matches, groups)] == ['pair', 'settlement', 'part-1']
+
+
+def test_missing_budget_fails_each_chunk_without_splitting(ynab_stub):
+    ynab_stub.reply = lambda method, path, body: (
+        404, {'error': {'id': '404.2', 'name': 'resource_not_found', 'detail': 'Resource not found'}}, {}
+    )
+    statement = [_bank(day, -100 * day) for day in range(1, 8)]
+    result = ynab_stub.client().create_transactions('budget', create_payloads(statement, 'acc-1'), chunk_size=4)
+
+    assert len(ynab_stub.calls) == result.requests == 2
+    assert len(result.failed) == 7 and all('Resource not found' in error for _, error in result.failed)